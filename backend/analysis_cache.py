@@ -0,0 +1,88 @@
+"""
+VocalGuard Analysis Cache
+Bounded LRU/TTL cache of transcript-only detection results, so robocall
+scripts that reach thousands of subscribers word-for-word are analyzed once
+"""
+
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+class AnalysisCache:
+    """
+    Content-addressed cache for the transcript stages of a verdict.
+
+    Keys are a hash of the normalized transcript plus every other input the
+    cached stages depend on (the signature version at least). Entries expire
+    after ttl seconds and the least recently used entry is evicted once
+    max_entries is reached. Cached values are shared between requests and
+    must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=4096, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(transcript, *context):
+        """Hash of the normalized transcript and the extra key inputs"""
+        digest = hashlib.sha256(unicodedata.normalize('NFC', transcript).encode())
+        for part in context:
+            digest.update(b'\x1f' + str(part).encode())
+        return digest.hexdigest()
+
+    def sync_version(self, version):
+        """Drop every entry when the signature set has changed"""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def get(self, key):
+        """Cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'version': self.version
+            }
+
+    def __len__(self):
+        return len(self._entries)
@@ -6,19 +6,32 @@ Flask application with advanced pattern analysis and database storage
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 import os
+import atexit
+import base64
+import json
+import threading
 from dotenv import load_dotenv
 from openai import OpenAI
 import requests
 from scam_detector import ScamDetector
 from database import VocalGuardDB
+from call_writer import CallWriter
+from write_server import ReadReplicaDB, WriteClient
 from advanced_detector import AdvancedScamDetector
 from voice_analyzer import VoiceAnalyzer
 from caller_intelligence import CallerIntelligence
+from blocklist import read_stream
+import phone_numbers
 from spoofing_detector import SpoofingDetector
 from threat_intelligence import ThreatIntelligence
+from call_session import CallSessionManager
+from batch_scorer import BatchScorer
+from analysis_cache import AnalysisCache
+from transcript_view import TranscriptView
+from signature_pack import SignaturePackWatcher, load_category_table, load_latest_pack
 from auth import require_auth, hash_password, verify_password, generate_token, validate_email, validate_password
 import tempfile
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Load environment variables (optional)
 try:
@@ -43,12 +56,94 @@ except:
 
 # Initialize scam detectors and new modules
 scam_detector = ScamDetector()
-advanced_detector = AdvancedScamDetector()
+# Optional category table that replaces the one in every signature pack
+CATEGORY_TABLE = load_category_table(os.getenv('VOCALGUARD_CATEGORY_TABLE'))
+# Deterministic scoring keeps identical transcripts on identical scores
+# (thread-safe and cacheable); set to false for time-varying demo jitter
+advanced_detector = AdvancedScamDetector(
+    deterministic=os.getenv('VOCALGUARD_DETERMINISTIC_SCORING', 'true').lower() != 'false',
+    pack=load_latest_pack(categories=CATEGORY_TABLE)
+)
 voice_analyzer = VoiceAnalyzer()
-caller_intelligence = CallerIntelligence()
 spoofing_detector = SpoofingDetector()
 threat_intelligence = ThreatIntelligence()
-db = VocalGuardDB()
+# Database file; tests and extra instances point this elsewhere
+DB_PATH = os.getenv('VOCALGUARD_DB', 'vocalguard.db')
+# Under several workers (see gunicorn.conf.py) one write server owns all
+# database writes; each worker reads through read-only WAL connections
+if os.getenv('VOCALGUARD_WRITE_SERVER'):
+    db = ReadReplicaDB(DB_PATH, WriteClient(
+        os.environ['VOCALGUARD_WRITE_SERVER'], os.environ['VOCALGUARD_WRITE_SERVER_KEY'].encode()
+    ))
+else:
+    db = VocalGuardDB(DB_PATH)
+# Call rows are committed in the background; call ids are handed out up front
+call_writer = CallWriter(
+    db,
+    batch_size=int(os.getenv('VOCALGUARD_WRITE_BATCH_SIZE', 256)),
+    flush_interval=float(os.getenv('VOCALGUARD_WRITE_FLUSH_INTERVAL', 0.05)),
+    max_queue=int(os.getenv('VOCALGUARD_WRITE_QUEUE_SIZE', 10000))
+)
+# Caller reputation is answered from memory; call counts are written back
+# and other workers' changes pulled in every flush interval
+caller_intelligence = CallerIntelligence(
+    db, flush_interval=float(os.getenv('VOCALGUARD_REPUTATION_FLUSH_INTERVAL', 1.0)),
+    # Calls from one number within the window that count as burst dialing
+    velocity_window=int(os.getenv('VOCALGUARD_VELOCITY_WINDOW', 300)),
+    burst_calls=int(os.getenv('VOCALGUARD_VELOCITY_BURST_CALLS', 20)),
+    # Bulk-imported blocklist file; workers pick up a replaced file within the interval
+    blocklist_path=os.getenv('VOCALGUARD_BLOCKLIST', 'blocklist.bin'),
+    blocklist_interval=int(os.getenv('VOCALGUARD_BLOCKLIST_RELOAD_INTERVAL', 30))
+)
+
+
+def shutdown_storage():
+    """Drain queued call rows and reputation counts, then close pooled database connections"""
+    call_writer.close()
+    caller_intelligence.close()
+    db.close()
+
+
+atexit.register(shutdown_storage)
+# Newer signature packs dropped into backend/signature_packs are compiled
+# in the background and swapped in without a restart
+signature_watcher = SignaturePackWatcher(
+    advanced_detector.install_pack, current=advanced_detector.pack,
+    interval=int(os.getenv('VOCALGUARD_SIGNATURE_RELOAD_INTERVAL', 30)),
+    categories=CATEGORY_TABLE
+)
+signature_watcher.start()
+
+
+def compact_rollups_periodically(interval, retain_hours):
+    """Fold old hourly statistics rollups into daily ones, every interval seconds"""
+    while not rollup_compaction_stop.wait(interval):
+        try:
+            db.compact_rollups(retain_hours)
+        except Exception as e:
+            print(f"Rollup compaction error: {e}")
+
+
+# Hourly rollups behind /api/statistics/timeseries are folded into days once old
+rollup_compaction_stop = threading.Event()
+threading.Thread(
+    target=compact_rollups_periodically, name='rollup-compaction', daemon=True,
+    args=(int(os.getenv('VOCALGUARD_ROLLUP_COMPACT_INTERVAL', 3600)),
+          int(os.getenv('VOCALGUARD_ROLLUP_HOURLY_RETENTION_HOURS', 48)))
+).start()
+call_sessions = CallSessionManager(advanced_detector, scam_detector)
+batch_scorer = BatchScorer(advanced_detector)
+
+# Transcript-only detection results, reused for repeated robocall scripts
+analysis_cache = AnalysisCache(
+    max_entries=int(os.getenv('VOCALGUARD_ANALYSIS_CACHE_SIZE', 4096)),
+    ttl=int(os.getenv('VOCALGUARD_ANALYSIS_CACHE_TTL', 3600))
+)
+
+# Upper bound on transcripts per /api/analyze/batch request
+MAX_BATCH_SIZE = int(os.getenv('VOCALGUARD_MAX_BATCH_SIZE', 5000))
+# Numbers per /api/reputation/batch request
+MAX_REPUTATION_BATCH_SIZE = int(os.getenv('VOCALGUARD_MAX_REPUTATION_BATCH_SIZE', 100000))
 
 # ElevenLabs API configuration
 ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
@@ -72,7 +167,11 @@ def index():
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'call_writer': call_writer.stats()
+    })
 
 
 # === AUTHENTICATION ENDPOINTS ===
@@ -306,221 +405,552 @@ def analyze_call():
     """
     try:
         # Check if user is authenticated (optional)
-        user_id = None
-        token = None
-        try:
-            from auth import get_token_from_request, decode_token
-            token = get_token_from_request()
-            if token:
-                payload = decode_token(token)
-                user_id = payload.get('user_id')
-        except:
-            pass  # Not authenticated, continue anyway
+        user_id = get_optional_user_id()
         
         data = request.json
         transcript = data.get('transcript', '')
         caller_name = data.get('caller_name', 'Unknown')
-        caller_number = data.get('caller_number', 'Unknown')
+        caller_number = caller_number_of(data)
         generate_audio = data.get('generate_audio', False)
         call_time = datetime.now().isoformat()
         
         if not transcript:
             return jsonify({'error': 'Transcript is required'}), 400
         
-        # === FEATURE 1: Dynamic Risk Scoring ===
-        risk_score, detected_patterns, threat_level, sentiment, bg_noise, is_synthetic, deepfake_score, volume_spike, silence_ratio = advanced_detector.calculate_risk_score(
-            transcript, caller_number, call_time
-        )
+        # Lowercased text, tokens and counters are derived once for every detector
+        view = TranscriptView(transcript)
         
-        # === FEATURE 2: Voice Pattern Analysis ===
-        voice_analysis = voice_analyzer.comprehensive_voice_analysis(transcript)
-        risk_score += voice_analysis['total_voice_risk_score']
+        # === FEATURE 1: Dynamic Risk Scoring & PII detection (cached per transcript) ===
+        detection = cached_detection(view, caller_number, call_time)
         
-        # === FEATURE 3: Caller Reputation Check ===
-        # In a real app, we'd get the user's phone number from their profile
-        user_phone_number = "+1555" # Dummy for neighbor spoofing demo
-        reputation_data = caller_intelligence.check_number_reputation(caller_number, user_phone_number)
-        risk_score += reputation_data['risk_modifier']
+        # === FEATURE 3, 5 & 6: Caller reputation, robocall & spoofing ===
+        caller_context = assess_caller(caller_number, caller_name)
         
-        # === FEATURE 4: Threat Intelligence Matching ===
-        threat_match = threat_intelligence.match_emerging_patterns(transcript)
-        risk_score += threat_match['total_emerging_threat_risk']
+        result = combine_analysis(detection, caller_context)
         
-        # === FEATURE 5 & 6: Robocall & Spoofing Detection ===
-        spoofing_analysis = spoofing_detector.calculate_spoofing_probability(
-            caller_number, caller_name
-        )
-        risk_score += spoofing_analysis['total_spoofing_risk_score']
+        # Queue the call for the database; the id is valid immediately
+        try:
+            call_id = call_writer.submit(
+                call_record(result, transcript, caller_name, caller_number, data.get('duration', 0)),
+                user_id
+            )
+            result['call_id'] = call_id
+        except Exception as db_err:
+            print(f"Database save error: {db_err}")
+            # Continue even if save fails
         
-        # === FEATURE 7: Time-based assessment (already in calculate_risk_score) ===
+        record_caller_activity(caller_number, result)
         
-        # === FEATURE 8: Industry-specific detection ===
-        scam_category = detect_scam_category(detected_patterns, transcript)
+        # Generate audio warning if requested
+        if generate_audio and result['is_scam']:
+            audio_url = generate_audio_warning(result['warning_message'])
+            result['audio_url'] = audio_url
         
-        # Cap final risk score at 100
-        risk_score = min(risk_score, 100)
+        return jsonify(result)
         
-        # Redetermine threat level with enhanced score
-        if risk_score >= 70:
-            threat_level = 'HIGH'
-        elif risk_score >= 40:
-            threat_level = 'MEDIUM'
-        else:
-            threat_level = 'LOW'
+    except Exception as e:
+        import traceback
+        print(f"Analysis error: {e}")
+        print(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    Analyze many transcripts in one request (voicemail backlogs, QA exports)
+    
+    Expected JSON payload, either a bare array or:
+    {
+        "calls": [
+            {"transcript": "...", "caller_name": "...", "caller_number": "...", "duration": 0},
+            "or just a transcript string"
+        ]
+    }
+    
+    Scoring runs vectorized over the whole batch and all rows are queued for
+    the background writer together. Each item matches what /api/analyze would return.
+    """
+    try:
+        user_id = get_optional_user_id()
         
-        # === Standard PII detection ===
-        redacted_result = scam_detector.redact_pii(transcript)
-        redacted_transcript = redacted_result['redacted_text']
-        detected_pii = redacted_result['pii_found']
+        data = request.json
+        items = data.get('calls', []) if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'A non-empty array of calls is required'}), 400
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_BATCH_SIZE} calls per batch'}), 413
         
-        # === Language detection ===
-        detected_language = advanced_detector.detect_language(transcript)
+        calls = [item if isinstance(item, dict) else {'transcript': item} for item in items]
+        call_time = datetime.now().isoformat()
         
-        # === Generate insights ===
-        insights = advanced_detector.generate_insights(
-            transcript, risk_score, threat_level, 
-            sentiment=sentiment, bg_noise=bg_noise, is_synthetic=is_synthetic,
-            deepfake_score=deepfake_score, volume_spike=volume_spike, silence_ratio=silence_ratio
+        valid = [i for i, call in enumerate(calls) if isinstance(call.get('transcript'), str) and call['transcript']]
+        transcripts = [calls[i]['transcript'] for i in valid]
+        
+        # The whole batch is scored with the pack that is active right now
+        pack = advanced_detector.pack
+        
+        # Only transcripts missing from the cache go through the vectorized scorer
+        detections = {}
+        cache_keys = {}
+        if advanced_detector.deterministic:
+            analysis_cache.sync_version(pack.tag)
+            for transcript in transcripts:
+                if transcript not in cache_keys:
+                    cache_keys[transcript] = detection_cache_key(transcript, pack)
+                    cached = analysis_cache.get(cache_keys[transcript])
+                    if cached is not None:
+                        detections[transcript] = cached
+        pending = list(dict.fromkeys(t for t in transcripts if t not in detections))
+        views = [TranscriptView(t) for t in pending]
+        scorings = batch_scorer.score(
+            [advanced_detector.extract_signals(view, pack) for view in views], call_time
         )
-        
-        # === Determine if scam ===
-        is_scam = risk_score >= 40
-        confidence = risk_score / 100.0
-        
-        # Generate warning message
-        warning_message = generate_warning_message(is_scam, threat_level, detected_patterns)
-        
-        # === FEATURE 10: Auto-disconnect recommendation ===
-        auto_disconnect_recommended = risk_score >= 75
-        
-        # Prepare comprehensive result
-        result = {
-            'is_scam': is_scam,
-            'confidence': round(confidence, 2),
-            'risk_score': round(risk_score, 2),
-            'threat_level': threat_level,
-            'detected_threats': detected_patterns,
-            'scam_category': scam_category,
-            'redacted_transcript': redacted_transcript,
-            'detected_pii': detected_pii,
-            'warning_message': warning_message,
-            'detected_language': detected_language,
-            'insights': insights,
+        for transcript, view, scoring in zip(pending, views, scorings):
+            detections[transcript] = detect_transcript(view, scoring, scam_detector.redact_pii(view), pack)
+            if transcript in cache_keys:
+                analysis_cache.put(cache_keys[transcript], detections[transcript])
+        
+        results = [{'index': i, 'error': 'Transcript is required'} for i in range(len(calls))]
+        records = []
+        caller_contexts = {}
+        for i, transcript in zip(valid, transcripts):
+            caller_name = calls[i].get('caller_name', 'Unknown')
+            caller_number = caller_number_of(calls[i])
+            key = (caller_number, caller_name)
+            if key not in caller_contexts:
+                caller_context = caller_contexts[key] = assess_caller(caller_number, caller_name)
+            else:
+                # Same caller again within the batch: only the call rate moves on
+                caller_context = dict(
+                    caller_contexts[key],
+                    velocity=caller_intelligence.track_call_pattern(caller_number)
+                )
             
-            # NEW: Enhanced data
-            'voice_analysis': {
-                'summary': voice_analysis['analysis_summary'],
-                'rapid_speech': voice_analysis['speech_patterns']['rapid_speech_detected'],
-                'robocall': voice_analysis['robocall_detection']['robocall_detected'],
-                'emotional_manipulation': voice_analysis['emotional_manipulation']['emotion_manipulation_detected'],
-                'dominant_emotion': voice_analysis['emotional_manipulation']['dominant_emotion'],
-                'call_center_detected': voice_analysis['background_environment']['call_center_detected']
-            },
-            
-            # NEW: Real-time Analysis Data
-            'real_time_analysis': {
-                'sentiment': sentiment,
-                'background_noise': bg_noise,
-                'is_synthetic': is_synthetic,
-                'deepfake_score': deepfake_score,
-                'volume_spike': volume_spike,
-                'silence_ratio': silence_ratio
-            },
-            
-            'caller_reputation': {
-                'trust_level': reputation_data['trust_level'],
-                'reputation_score': reputation_data['reputation_score'],
-                'is_known_scammer': reputation_data['is_verified_scammer'],
-                'community_reports': reputation_data['community_reports'],
-                'recommendation': reputation_data['recommendation']
-            },
-            
-            'spoofing_analysis': {
-                'spoofing_detected': spoofing_analysis['spoofing_probability'] > 0.4,
-                'spoofing_probability': spoofing_analysis['spoofing_probability'],
-                'verdict': spoofing_analysis['verdict'],
-                'recommendation': spoofing_analysis['recommendation']
-            },
-            
-            'threat_intelligence': {
-                'emerging_threats_matched': threat_match['threat_count'],
-                'matched_threats': threat_match['matched_threats']
-            },
-            
-            'auto_disconnect_recommended': auto_disconnect_recommended
-        }
+            result = combine_analysis(detections[transcript], caller_context)
+            result['index'] = i
+            results[i] = result
+            records.append(call_record(result, transcript, caller_name, caller_number, calls[i].get('duration', 0)))
         
-        # Save call to database
         try:
-            call_data_to_save = {
-                'caller_name': caller_name,
-                'caller_number': caller_number,
-                'transcript': transcript,
-                'is_scam': is_scam,
-                'confidence': confidence,
-                'threat_level': threat_level,
-                'detected_threats': detected_patterns,
-                'redacted_transcript': redacted_transcript,
-                'detected_pii': detected_pii,
-                'warning_message': warning_message,
-                'duration': data.get('duration', 0),
-                'language': detected_language
-            }
-            call_id = db.update_save_call(call_data_to_save, user_id)
-            result['call_id'] = call_id
+            for i, call_id in zip(valid, call_writer.submit_many(records, user_id)):
+                results[i]['call_id'] = call_id
         except Exception as db_err:
             print(f"Database save error: {db_err}")
-            # Continue even if save fails
         
-        # Update caller reputation in database
-        caller_intelligence.update_reputation_score(caller_number, is_scam, risk_score, scam_category)
+        for i in valid:
+            record_caller_activity(caller_number_of(calls[i]), results[i])
         
-        # Track call pattern
-        caller_intelligence.track_call_pattern(caller_number)
+        return jsonify({
+            'results': results,
+            'total': len(results),
+            'scams_detected': sum(1 for i in valid if results[i]['is_scam'])
+        })
         
-        # Generate audio warning if requested
-        if generate_audio and is_scam:
-            audio_url = generate_audio_warning(warning_message)
-            result['audio_url'] = audio_url
+    except Exception as e:
+        import traceback
+        print(f"Batch analysis error: {e}")
+        print(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+
+def caller_number_of(data):
+    """
+    Caller number of a request in E.164 form; anything that is not a
+    number ('Unknown', 'Private') is kept as sent
+    """
+    caller_number = data.get('caller_number', 'Unknown')
+    return phone_numbers.normalize(caller_number) or caller_number
+
+
+def assess_caller(caller_number, caller_name):
+    """
+    Caller-dependent checks, independent of what is being said; counts the
+    call towards the caller's dialing rate
+    """
+    # In a real app, we'd get the user's phone number from their profile
+    user_phone_number = "+1555" # Dummy for neighbor spoofing demo
+    reputation_data = caller_intelligence.check_number_reputation(caller_number, user_phone_number)
+    spoofing_analysis = spoofing_detector.calculate_spoofing_probability(
+        caller_number, caller_name
+    )
+    velocity = caller_intelligence.track_call_pattern(caller_number)
+    return {'reputation': reputation_data, 'spoofing': spoofing_analysis, 'velocity': velocity}
+
+
+def detection_cache_key(transcript, pack):
+    """
+    Cache key for the transcript stages. Deterministic scoring depends on
+    nothing else but the transcript and the signature pack.
+    """
+    return AnalysisCache.key_for(str(transcript), pack.tag)
+
+
+def cached_detection(transcript, caller_number=None, call_time=None):
+    """
+    Transcript stages of the verdict, served from analysis_cache when the
+    same transcript was analyzed before under the same signatures
+    """
+    transcript = TranscriptView.of(transcript)
+    # Pin the active pack: a swap mid-request does not mix two versions
+    pack = advanced_detector.pack
+    
+    def detect():
+        signals = advanced_detector.extract_signals(transcript, pack)
+        scoring = advanced_detector.score_signals(signals, caller_number, call_time)
+        return detect_transcript(transcript, scoring, scam_detector.redact_pii(transcript), pack)
+    
+    if not advanced_detector.deterministic:
+        # Time-seeded scores differ per call, so there is nothing to reuse
+        return detect()
+    
+    analysis_cache.sync_version(pack.tag)
+    key = detection_cache_key(transcript, pack)
+    detection = analysis_cache.get(key)
+    if detection is None:
+        detection = detect()
+        analysis_cache.put(key, detection)
+    return detection
+
+
+def detect_transcript(transcript, scoring, redacted_result, pack=None):
+    """
+    Everything in a verdict that depends only on what was said (and the
+    signature pack that scored it)
+    """
+    pack = pack or advanced_detector.pack
+    view = TranscriptView.of(transcript)
+    transcript = view.text
+    detected_patterns = scoring[1]
+    return {
+        'scoring': scoring,
+        'redacted': redacted_result,
+        # === FEATURE 2: Voice Pattern Analysis ===
+        'voice_analysis': voice_analyzer.comprehensive_voice_analysis(transcript),
+        # === FEATURE 4: Threat Intelligence Matching ===
+        'threat_match': threat_intelligence.match_emerging_patterns(transcript),
+        # === FEATURE 8: Industry-specific detection ===
+        'scam_categories': detect_scam_category(detected_patterns, view, pack),
+        # === Language detection ===
+        'detected_language': advanced_detector.detect_language(transcript),
+        'signature_version': pack.version,
+        'transcript': transcript
+    }
+
+
+def combine_analysis(detection, caller_context):
+    """
+    Apply the per-caller checks to transcript detection results
+    """
+    risk_score, detected_patterns, threat_level, sentiment, bg_noise, is_synthetic, deepfake_score, volume_spike, silence_ratio = detection['scoring']
+    transcript = detection['transcript']
+    redacted_result = detection['redacted']
+    voice_analysis = detection['voice_analysis']
+    threat_match = detection['threat_match']
+    scam_category, category_candidates = detection['scam_categories']
+    reputation_data = caller_context['reputation']
+    spoofing_analysis = caller_context['spoofing']
+    velocity = caller_context['velocity']
+    
+    risk_score += voice_analysis['total_voice_risk_score']
+    
+    # === FEATURE 3: Caller Reputation Check ===
+    risk_score += reputation_data['risk_modifier']
+    
+    risk_score += threat_match['total_emerging_threat_risk']
+    
+    # === FEATURE 5 & 6: Robocall & Spoofing Detection ===
+    risk_score += spoofing_analysis['total_spoofing_risk_score']
+    
+    # Burst dialing: one number calling many subscribers within minutes
+    risk_score += velocity['risk_modifier']
+    
+    # === FEATURE 7: Time-based assessment (already in calculate_risk_score) ===
+    
+    # Cap final risk score at 100
+    risk_score = min(risk_score, 100)
+    
+    # Redetermine threat level with enhanced score
+    if risk_score >= 70:
+        threat_level = 'HIGH'
+    elif risk_score >= 40:
+        threat_level = 'MEDIUM'
+    else:
+        threat_level = 'LOW'
+    
+    detected_language = detection['detected_language']
+    
+    # === Generate insights ===
+    insights = advanced_detector.generate_insights(
+        transcript, risk_score, threat_level, 
+        sentiment=sentiment, bg_noise=bg_noise, is_synthetic=is_synthetic,
+        deepfake_score=deepfake_score, volume_spike=volume_spike, silence_ratio=silence_ratio
+    )
+    
+    # === Determine if scam ===
+    is_scam = risk_score >= 40
+    confidence = risk_score / 100.0
+    
+    # Generate warning message
+    warning_message = generate_warning_message(is_scam, threat_level, detected_patterns)
+    
+    # === FEATURE 10: Auto-disconnect recommendation ===
+    auto_disconnect_recommended = risk_score >= 75
+    
+    # Prepare comprehensive result
+    return {
+        'is_scam': is_scam,
+        'confidence': round(confidence, 2),
+        'risk_score': round(risk_score, 2),
+        'threat_level': threat_level,
+        'detected_threats': list(detected_patterns),
+        'scam_category': scam_category,
+        'scam_category_candidates': category_candidates,
+        'redacted_transcript': redacted_result['redacted_text'],
+        'detected_pii': list(redacted_result['pii_found']),
+        'warning_message': warning_message,
+        'detected_language': detected_language,
+        'insights': insights,
+        
+        # NEW: Enhanced data
+        'voice_analysis': {
+            'summary': voice_analysis['analysis_summary'],
+            'rapid_speech': voice_analysis['speech_patterns']['rapid_speech_detected'],
+            'robocall': voice_analysis['robocall_detection']['robocall_detected'],
+            'emotional_manipulation': voice_analysis['emotional_manipulation']['emotion_manipulation_detected'],
+            'dominant_emotion': voice_analysis['emotional_manipulation']['dominant_emotion'],
+            'call_center_detected': voice_analysis['background_environment']['call_center_detected']
+        },
+        
+        # NEW: Real-time Analysis Data
+        'real_time_analysis': {
+            'sentiment': sentiment,
+            'background_noise': bg_noise,
+            'is_synthetic': is_synthetic,
+            'deepfake_score': deepfake_score,
+            'volume_spike': volume_spike,
+            'silence_ratio': silence_ratio
+        },
+        
+        'caller_reputation': {
+            'trust_level': reputation_data['trust_level'],
+            'reputation_score': reputation_data['reputation_score'],
+            'is_known_scammer': reputation_data['is_verified_scammer'],
+            'community_reports': reputation_data['community_reports'],
+            'recommendation': reputation_data['recommendation']
+        },
+        
+        'call_velocity': velocity,
+        
+        'spoofing_analysis': {
+            'spoofing_detected': spoofing_analysis['spoofing_probability'] > 0.4,
+            'spoofing_probability': spoofing_analysis['spoofing_probability'],
+            'verdict': spoofing_analysis['verdict'],
+            'recommendation': spoofing_analysis['recommendation']
+        },
+        
+        'threat_intelligence': {
+            'emerging_threats_matched': threat_match['threat_count'],
+            'matched_threats': threat_match['matched_threats']
+        },
+        
+        'auto_disconnect_recommended': auto_disconnect_recommended,
+        'signature_version': detection['signature_version']
+    }
+
+
+def call_record(result, transcript, caller_name, caller_number, duration=0):
+    """
+    Row to persist for an analyzed call
+    """
+    return {
+        'caller_name': caller_name,
+        'caller_number': caller_number,
+        'transcript': transcript,
+        'is_scam': result['is_scam'],
+        'confidence': result['risk_score'] / 100.0,
+        'threat_level': result['threat_level'],
+        'detected_threats': result['detected_threats'],
+        'redacted_transcript': result['redacted_transcript'],
+        'detected_pii': result['detected_pii'],
+        'warning_message': result['warning_message'],
+        'duration': duration,
+        'language': result['detected_language'],
+        'scam_category': result['scam_category'],
+        'risk_score': result['risk_score']
+    }
+
+
+def record_caller_activity(caller_number, result):
+    """
+    Feed a finished verdict back into caller intelligence
+    """
+    # Update caller reputation in database
+    caller_intelligence.update_reputation_score(
+        caller_number, result['is_scam'], result['risk_score'], result['scam_category']
+    )
+
+
+def get_optional_user_id():
+    """
+    User id from the bearer token if one was sent, otherwise None
+    """
+    try:
+        from auth import get_token_from_request, decode_token
+        token = get_token_from_request()
+        if token:
+            return decode_token(token).get('user_id')
+    except:
+        pass  # Not authenticated, continue anyway
+    return None
+
+
+# === LIVE CALL SESSIONS ===
+
+def feed_session(session, delta):
+    """
+    Append a transcript delta to a live session; the voice and threat
+    analyzers only see the delta
+    """
+    session.append(delta)
+    session.add_findings(
+        voice_analyzer.comprehensive_voice_analysis(delta),
+        threat_intelligence.match_emerging_patterns(delta),
+        advanced_detector.detect_language(delta)
+    )
+
+
+def analyze_session(session, final=False):
+    """
+    Verdict for everything a live session has received so far
+    
+    Interim verdicts come from the session's running state without
+    touching the full transcript; the final verdict, the one that is
+    stored, runs every transcript detector and the PII redaction over the
+    whole call once.
+    """
+    if session.caller_context is None:
+        session.caller_context = assess_caller(session.caller_number, session.caller_name)
+    scoring = advanced_detector.score_signals(session.signals(), session.caller_number, session.call_time)
+    if final:
+        # Redacted again as a whole: PII split across deltas is only seen here
+        transcript = session.transcript
+        detection = detect_transcript(transcript, scoring, scam_detector.redact_pii(transcript), session.pack)
+    else:
+        detection = {
+            'scoring': scoring,
+            'redacted': session.redaction(),
+            'voice_analysis': session.voice_analysis,
+            'threat_match': session.threat_match(),
+            'scam_categories': session.categories(scoring[1]),
+            'detected_language': session.language,
+            'signature_version': session.pack.version,
+            # Interim insights see the newest text only
+            'transcript': session.last_delta
+        }
+    return combine_analysis(detection, session.caller_context)
+
+
+@app.route('/api/calls/session', methods=['POST'])
+def open_call_session():
+    """
+    Open an incremental analysis session for a live call
+    
+    Expected JSON payload:
+    {
+        "caller_name": "Caller name",
+        "caller_number": "Phone number"
+    }
+    """
+    try:
+        data = request.json or {}
+        session = call_sessions.open(
+            caller_name=data.get('caller_name', 'Unknown'),
+            caller_number=caller_number_of(data),
+            user_id=get_optional_user_id()
+        )
+        return jsonify({'success': True, 'session_id': session.session_id}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/calls/session/<session_id>/transcript', methods=['POST'])
+def append_call_transcript(session_id):
+    """
+    Append new transcript text to a live session and return the updated verdict.
+    Only the new text is scanned; nothing is persisted until the call closes.
+    
+    Expected JSON payload:
+    {
+        "delta": "Newly transcribed text"
+    }
+    """
+    try:
+        session = call_sessions.get(session_id)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        delta = (request.json or {}).get('delta', '')
+        if not delta:
+            return jsonify({'error': 'Transcript delta is required'}), 400
+        
+        with session.lock:
+            feed_session(session, delta)
+            result = analyze_session(session)
         
+        result['session_id'] = session_id
         return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/calls/session/<session_id>/close', methods=['POST'])
+def close_call_session(session_id):
+    """
+    Close a live session, persist the final verdict once and return it.
+    An optional last "delta" is appended before closing.
+    """
+    try:
+        session = call_sessions.close(session_id)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        delta = (request.json or {}).get('delta', '') if request.is_json else ''
+        
+        with session.lock:
+            if delta:
+                session.append(delta)
+            transcript = session.transcript
+            if not transcript:
+                return jsonify({'success': True, 'session_id': session_id, 'call_id': None})
+            
+            result = analyze_session(session, final=True)
         
+        try:
+            result['call_id'] = call_writer.submit(
+                call_record(result, transcript, session.caller_name, session.caller_number, session.duration),
+                session.user_id
+            )
+        except Exception as db_err:
+            print(f"Database save error: {db_err}")
+        
+        record_caller_activity(session.caller_number, result)
+        
+        result['session_id'] = session_id
+        return jsonify(result)
     except Exception as e:
-        import traceback
-        print(f"Analysis error: {e}")
-        print(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
 
-def detect_scam_category(patterns: list, transcript: str) -> str:
+def detect_scam_category(patterns: list, transcript, pack=None) -> tuple:
     """
     FEATURE 8: Detect industry-specific scam category
+    
+    Returns the winning category and the other candidate categories, both
+    from one scan of the signature pack's category table
     """
-    transcript_lower = transcript.lower()
-    
-    # Check for various scam categories
-    if any(p in patterns for p in ['impersonation']) and any(word in transcript_lower for word in ['irs', 'tax', 'refund']):
-        return 'IRS/Tax Scam'
-    elif any(word in transcript_lower for word in ['microsoft', 'apple', 'computer', 'virus', 'tech support']):
-        return 'Tech Support Scam'
-    elif any(word in transcript_lower for word in ['bank', 'credit card', 'account', 'fraud department']):
-        return 'Banking/Financial Scam'
-    elif any(word in transcript_lower for word in ['social security', 'ssa', 'benefits']):
-        return 'Social Security Scam'
-    elif any(word in transcript_lower for word in ['lottery', 'prize', 'winner', 'congratulations']):
-        return 'Prize/Lottery Scam'
-    elif any(word in transcript_lower for word in ['invest', 'crypto', 'bitcoin', 'returns']):
-        return 'Investment Scam'
-    elif any(word in transcript_lower for word in ['electric', 'power', 'utility', 'water', 'gas']):
-        return 'Utility Scam'
-    elif any(word in transcript_lower for word in ['package', 'delivery', 'shipping', 'customs']):
-        return 'Delivery Scam'
-    elif any(word in transcript_lower for word in ['medicare', 'medicaid', 'health insurance']):
-        return 'Healthcare Scam'
-    elif 'romance' in patterns:
-        return 'Romance Scam'
-    else:
-        return 'General Scam'
+    pack = pack or advanced_detector.pack
+    return pack.category_index.classify(patterns, TranscriptView.of(transcript).lower)
 
 
 def analyze_with_openai(transcript):
@@ -659,6 +1089,25 @@ def serve_audio(filename):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/signatures', methods=['GET'])
+def signature_pack_info():
+    """Signature pack currently used for scoring"""
+    return jsonify(advanced_detector.pack.info())
+
+
+@app.route('/api/signatures/reload', methods=['POST'])
+def reload_signature_pack():
+    """Load a newer signature pack now instead of waiting for the watcher"""
+    pack = signature_watcher.check()
+    return jsonify({'reloaded': pack is not None, 'pack': advanced_detector.pack.info()})
+
+
+@app.route('/api/analyze/cache', methods=['GET'])
+def analysis_cache_stats():
+    """Hit/miss counters of the transcript analysis cache"""
+    return jsonify(analysis_cache.stats())
+
+
 @app.route('/api/statistics', methods=['GET'])
 @require_auth
 def get_statistics():
@@ -670,46 +1119,186 @@ def get_statistics():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/statistics/threats', methods=['GET'])
+def get_threat_statistics():
+    """
+    Most frequent threats and PII types over a time range
+
+    Query parameters:
+        start: ISO date or datetime, inclusive (optional)
+        end: ISO date or datetime, exclusive (optional)
+        limit: Entries per list (default 10, at most 100)
+    """
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        try:
+            start = parse_range_bound(request.args.get('start'))
+            end = parse_range_bound(request.args.get('end'))
+        except ValueError:
+            return jsonify({'error': 'start and end must be ISO dates'}), 400
+
+        counts = db.get_tag_counts(start, end, user_id=get_optional_user_id(), limit=limit)
+        return jsonify({'start': start, 'end': end, **counts})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/statistics/timeseries', methods=['GET'])
+def get_statistics_timeseries():
+    """
+    Calls and scams per hour or day, read from the rollup tables only
+
+    Query parameters:
+        interval: 'hour' or 'day' (default)
+        start: ISO date or datetime (default 48 hours / 30 days ago)
+        end: ISO date or datetime, exclusive (default now)
+        category: Only this scam category
+    """
+    try:
+        interval = request.args.get('interval', 'day')
+        if interval not in ('hour', 'day'):
+            return jsonify({'error': "interval must be 'hour' or 'day'"}), 400
+        try:
+            start = parse_range_bound(request.args.get('start'))
+            end = parse_range_bound(request.args.get('end'))
+        except ValueError:
+            return jsonify({'error': 'start and end must be ISO dates'}), 400
+
+        # Rollup buckets follow calls.timestamp, which is UTC
+        now = datetime.utcnow()
+        end = end or (now + timedelta(seconds=1)).strftime('%Y-%m-%d %H:%M:%S')
+        default_span = timedelta(hours=48) if interval == 'hour' else timedelta(days=30)
+        start = start or (now - default_span).strftime('%Y-%m-%d %H:%M:%S')
+
+        points = db.get_timeseries(
+            start, end, interval,
+            user_id=get_optional_user_id(), category=request.args.get('category')
+        )
+        return jsonify({'interval': interval, 'start': start, 'end': end, 'points': points})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def parse_range_bound(value):
+    """ISO date/datetime as the calls.timestamp text format, None when absent"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value).strftime('%Y-%m-%d %H:%M:%S')
+
+
 @app.route('/api/calls/history', methods=['GET'])
 def get_call_history():
-    """Get call history (public/generic for demo)"""
+    """
+    Get call history (public/generic for demo), newest first
+    
+    Query parameters:
+        limit: Page size (default 50, at most 500)
+        before: Cursor from next_before; returns the next older page
+        since: Cursor from latest; returns only calls committed after it, so
+            a poll with nothing new is one index probe and an empty list
+    """
     try:
-        limit = request.args.get('limit', 50, type=int)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        try:
+            before = decode_history_cursor(request.args.get('before'))
+            since = decode_delta_cursor(request.args.get('since'))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
         
         # Check for auth optionally
-        user_id = None
-        try:
-            from auth import get_token_from_request, decode_token
-            token = get_token_from_request()
-            if token:
-                payload = decode_token(token)
-                user_id = payload.get('user_id')
-        except:
-            pass
-            
-        if user_id:
-            calls = db.get_user_calls(user_id, limit=limit)
-        else:
-            # If no user, fetch all calls (or you might want to limit this in production)
-            calls = db.get_all_calls(limit=limit)
-            
-        return jsonify({'calls': calls, 'total': len(calls)})
+        user_id = get_optional_user_id()
+        
+        # Read before the page: a call committed in between is delivered by
+        # the next delta poll rather than skipped
+        latest_seq = db.get_latest_call_seq(user_id) if since is None else since
+        
+        # Without a user, page over all calls (demo mode)
+        calls, has_more = db.get_call_page(user_id, limit=limit, before=before, since=since)
+        if since is not None and calls:
+            latest_seq = calls[0]['seq']
+        
+        latest = encode_delta_cursor(latest_seq)
+        next_before = encode_history_cursor(calls[-1]) if calls and has_more and since is None else None
+        return jsonify({
+            'calls': calls,
+            'total': len(calls),
+            'has_more': has_more,
+            'next_before': next_before,
+            'latest': latest
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def encode_history_cursor(call):
+    """Opaque history cursor for a call row: its (timestamp, id) position"""
+    return base64.urlsafe_b64encode(f"{call['timestamp']}|{call['id']}".encode()).decode()
+
+
+def decode_history_cursor(cursor):
+    """(timestamp, id) from a history cursor, None when absent"""
+    if not cursor:
+        return None
+    try:
+        timestamp, call_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return timestamp, int(call_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def encode_delta_cursor(seq):
+    """Opaque delta-poll cursor: the commit sequence number of the last call seen"""
+    return base64.urlsafe_b64encode(f"seq|{seq}".encode()).decode()
+
+
+def decode_delta_cursor(cursor):
+    """Commit sequence number from a delta-poll cursor, None when absent"""
+    if not cursor:
+        return None
+    try:
+        kind, seq = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        if kind != 'seq':
+            raise ValueError(kind)
+        return int(seq)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
 @app.route('/api/calls/search', methods=['POST'])
 def search_calls():
-    """Search calls in database"""
+    """
+    Search calls in database
+    
+    Expected JSON payload:
+    {
+        "query": "words to find, or the start of a phone number",
+        "limit": 20 (optional, at most 100),
+        "offset": 0 (optional)
+    }
+    
+    Text queries are ranked (bm25) with a highlighted transcript snippet;
+    phone-number queries are prefix matches, newest first.
+    """
     try:
         data = request.json
         query = data.get('query', '')
+        limit = min(max(int(data.get('limit', 20)), 1), 100)
+        offset = max(int(data.get('offset', 0)), 0)
         
         if not query:
             return jsonify({'error': 'Search query required'}), 400
         
-        calls = db.search_calls(query)
-        return jsonify({'calls': calls, 'total': len(calls)})
+        # One extra row tells whether another page exists
+        calls = db.search_calls(query, limit=limit + 1, offset=offset)
+        has_more = len(calls) > limit
+        calls = calls[:limit]
+        return jsonify({
+            'calls': calls,
+            'total': len(calls),
+            'offset': offset,
+            'limit': limit,
+            'next_offset': offset + limit if has_more else None
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -723,48 +1312,62 @@ def generate_report():
         
         if not call_id:
             return jsonify({'error': 'Call ID required'}), 400
-        
-        # Get call data
-        calls = db.get_all_calls(limit=999)
-        call = next((c for c in calls if c['id'] == call_id), None)
-        
-        if not call:
-            return jsonify({'error': 'Call not found'}), 404
-        
-        # Generate comprehensive report
-        report = {
-            'call_id': call['id'],
-            'timestamp': call['timestamp'],
-            'caller_info': {
-                'name': call['caller_name'],
-                'number': call['caller_number'],
-                'duration': call['duration']
-            },
-            'analysis': {
-                'is_scam': call['is_scam'],
-                'confidence': call['confidence'],
-                'threat_level': call['threat_level'],
-                'detected_threats': call['detected_threats'],
-                'risk_indicators': call['warning_message']
-            },
-            'protection': {
-                'pii_detected': call['detected_pii'],
-                'redacted_transcript': call['redacted_transcript'],
-                'recommended_action': 'Block number and report to FTC' if call['is_scam'] else 'No action needed'
-            },
-            'tips': [
-                'Never share personal information over the phone',
-                'Verify caller identity independently',
-                'Hang up and call official numbers',
-                'Report suspicious calls to authorities'
-            ]
-        }
-        
-        return jsonify(report)
+        try:
+            call_id = int(call_id)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Call ID must be an integer'}), 400
+        
+        # Reports are rendered once per call and report version, then served
+        # as stored JSON
+        report_json = db.get_report(call_id, CALL_REPORT_TYPE)
+        if report_json is None:
+            call = db.get_call_by_id(call_id)
+            if not call:
+                return jsonify({'error': 'Call not found'}), 404
+            report_json = json.dumps(build_call_report(call))
+            db.save_report(call_id, CALL_REPORT_TYPE, report_json, user_id=call['user_id'])
+        
+        return app.response_class(report_json, mimetype='application/json')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# Bump when build_call_report changes so stored reports are re-rendered
+CALL_REPORT_VERSION = 1
+CALL_REPORT_TYPE = f'call_report:v{CALL_REPORT_VERSION}'
+
+
+def build_call_report(call):
+    """Comprehensive report for one stored call"""
+    return {
+        'call_id': call['id'],
+        'timestamp': call['timestamp'],
+        'caller_info': {
+            'name': call['caller_name'],
+            'number': call['caller_number'],
+            'duration': call['duration']
+        },
+        'analysis': {
+            'is_scam': call['is_scam'],
+            'confidence': call['confidence'],
+            'threat_level': call['threat_level'],
+            'detected_threats': call['detected_threats'],
+            'risk_indicators': call['warning_message']
+        },
+        'protection': {
+            'pii_detected': call['detected_pii'],
+            'redacted_transcript': call['redacted_transcript'],
+            'recommended_action': 'Block number and report to FTC' if call['is_scam'] else 'No action needed'
+        },
+        'tips': [
+            'Never share personal information over the phone',
+            'Verify caller identity independently',
+            'Hang up and call official numbers',
+            'Report suspicious calls to authorities'
+        ]
+    }
+
+
 # === NEW API ENDPOINTS ===
 
 @app.route('/api/submit_scam_report', methods=['POST'])
@@ -789,6 +1392,8 @@ def report_scam():
             'report_id': report_id,
             'message': 'Scam reported successfully'
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -810,6 +1415,145 @@ def block_number():
             'success': success,
             'message': f'Number {phone_number} blocked successfully' if success else 'Number already blocked'
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/calls/top-dialers', methods=['GET'])
+def top_dialers():
+    """Caller numbers with the most calls within the velocity window"""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    return jsonify({
+        'window_seconds': caller_intelligence.velocity.window,
+        'burst_calls': caller_intelligence.burst_calls,
+        'dialers': caller_intelligence.top_dialers(limit)
+    })
+
+
+@app.route('/api/block/range', methods=['POST'])
+@require_auth
+def block_number_range():
+    """
+    Block or score a whole number range by E.164 prefix
+    
+    Expects JSON: {"prefix": "+1900", "reason": "...", "blocked": true, "risk_modifier": 0}
+    A range that is neither blocked nor given a risk modifier is lifted.
+    """
+    try:
+        data = request.json or {}
+        prefix = data.get('prefix')
+        if not prefix:
+            return jsonify({'error': 'Prefix is required'}), 400
+        
+        caller_intelligence.set_range(
+            str(prefix), data.get('reason', 'User blocked range'),
+            blocked=bool(data.get('blocked', True)),
+            risk_modifier=int(data.get('risk_modifier', 0))
+        )
+        return jsonify({'success': True, 'prefix': prefix})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/blocklist', methods=['GET'])
+def get_blocklist():
+    """Numbers blocked one by one, plus the size of the imported blocklist"""
+    try:
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        return jsonify({
+            'success': True,
+            'blocked_numbers': caller_intelligence.get_blocklist(limit),
+            'imported': caller_intelligence.blocklist.table.info()
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/blocklist/import', methods=['POST'])
+@require_auth
+def import_blocklist():
+    """
+    Bulk blocklist import, streamed from the request body
+    
+    Body: CSV (a 'number' column, or numbers in the first column) or
+    NDJSON (?format=ndjson, or an application/x-ndjson body). The numbers
+    are added to the current list; ?replace=true replaces it instead.
+    Memory stays bounded, but the request is held for the whole import:
+    very large lists are better imported with `python blocklist.py import`.
+    """
+    try:
+        format = request.args.get('format')
+        if format is None:
+            format = 'ndjson' if 'ndjson' in (request.mimetype or '') else 'csv'
+        if format not in ('csv', 'ndjson'):
+            return jsonify({'error': "format must be 'csv' or 'ndjson'"}), 400
+        replace = request.args.get('replace', 'false').lower() == 'true'
+        
+        result = caller_intelligence.import_blocklist(read_stream(request.stream, format), merge=not replace)
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        print(f"Blocklist import error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+# Columns of each /api/reputation/batch result row
+REPUTATION_BATCH_FIELDS = [
+    'number', 'e164', 'trust_level', 'risk_modifier', 'on_blocklist',
+    'community_reports', 'matched_range', 'spoofing_probability'
+]
+REPUTATION_BATCH_CHUNK = 1000
+
+
+def reputation_rows(numbers):
+    """Compact result rows for numbers, resolved a chunk at a time"""
+    spoofing = {}
+    for start in range(0, len(numbers), REPUTATION_BATCH_CHUNK):
+        chunk = numbers[start:start + REPUTATION_BATCH_CHUNK]
+        for raw, (number, reputation) in zip(chunk, caller_intelligence.check_numbers(chunk)):
+            if reputation is None:
+                yield [raw, None, 'INVALID', None, False, 0, None, None]
+                continue
+            if number not in spoofing:
+                spoofing[number] = spoofing_detector.calculate_spoofing_probability(number)['spoofing_probability']
+            yield [
+                raw, number, reputation['trust_level'], reputation['risk_modifier'],
+                reputation['on_blocklist'], reputation['community_reports'],
+                reputation['matched_range'], spoofing[number]
+            ]
+
+
+@app.route('/api/reputation/batch', methods=['POST'])
+def check_reputation_batch():
+    """
+    Screen many caller numbers in one request (carrier pre-screening)
+    
+    Expects JSON: {"numbers": ["+12025550123", "(202) 555-0199", ...]}
+    Returns {"count": n, "fields": [...], "results": [[...], ...]}, one row
+    per number in request order. Lists longer than one chunk are streamed
+    as they are resolved.
+    """
+    try:
+        data = request.get_json(silent=True)
+        numbers = data.get('numbers') if isinstance(data, dict) else data
+        if not isinstance(numbers, list) or not numbers:
+            return jsonify({'error': 'numbers must be a non-empty list'}), 400
+        if len(numbers) > MAX_REPUTATION_BATCH_SIZE:
+            return jsonify({'error': f'At most {MAX_REPUTATION_BATCH_SIZE} numbers per request'}), 413
+        numbers = [str(number) for number in numbers]
+        
+        def document():
+            yield f'{{"count":{len(numbers)},"fields":{json.dumps(REPUTATION_BATCH_FIELDS)},"results":['
+            for position, row in enumerate(reputation_rows(numbers)):
+                yield (',' if position else '') + json.dumps(row, separators=(',', ':'))
+            yield ']}'
+        
+        if len(numbers) <= REPUTATION_BATCH_CHUNK:
+            return app.response_class(''.join(document()), mimetype='application/json')
+        return app.response_class(document(), mimetype='application/json')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -819,7 +1563,7 @@ def check_reputation_api(phone_number):
     """Check caller reputation"""
     try:
         reputation = caller_intelligence.check_number_reputation(phone_number)
-        return jsonify({'success': True,' reputation': reputation})
+        return jsonify({'success': True, 'reputation': reputation})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
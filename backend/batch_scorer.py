@@ -0,0 +1,147 @@
+"""
+VocalGuard Batch Scorer
+Vectorized AdvancedScamDetector scoring for many transcripts at once
+"""
+
+import numpy as np
+
+from advanced_detector import (
+    MATCH_BOOSTS, INTENT_SCORES, PATTERN_COUNT_BONUSES, COMBO_BONUSES, SIGNAL_BONUSES
+)
+
+
+class BatchScorer:
+    """
+    Scores a batch of transcripts with NumPy array operations.
+
+    The keyword-count feature matrix is built for the whole batch, then the
+    category weights, match boosts, intent scores and combo bonuses from
+    calculate_risk_score are applied column by column across all rows. The
+    operations run in the same order as the scalar path, so every row
+    produces exactly the tuple calculate_risk_score would.
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.intents = [intent for intent, _ in INTENT_SCORES]
+        self._layout = (None, None)
+
+    def layout(self, pack):
+        """
+        Column layout and weight vectors for a signature pack. Built once per
+        pack and kept as one tuple, so concurrent batches never see a mix.
+        """
+        cached_pack, layout = self._layout
+        if cached_pack is pack:
+            return layout
+        signatures = pack.scam_signatures
+        categories = list(signatures)
+        columns = categories + self.intents
+        layout = {
+            'categories': categories,
+            'columns': columns,
+            'column_index': {name: i for i, name in enumerate(columns)},
+            'keyword_totals': np.array([len(signatures[c]['keywords']) for c in categories], dtype=np.float64),
+            'weights': np.array([signatures[c]['weight'] for c in categories], dtype=np.float64)
+        }
+        self._layout = (pack, layout)
+        return layout
+
+    @staticmethod
+    def feature_matrix(signals_list, columns):
+        """Keyword counts per transcript (rows) and category/intent (columns)"""
+        matrix = np.zeros((len(signals_list), len(columns)), dtype=np.int64)
+        for row, signals in enumerate(signals_list):
+            counts = signals['keyword_counts']
+            matrix[row] = [counts[name] for name in columns]
+        return matrix
+
+    def score(self, signals_list, call_time=None):
+        """
+        Score extracted signals for a whole batch
+
+        Args:
+            signals_list: Output of detector.extract_signals for each
+                transcript, all extracted with the same signature pack
+            call_time: Call time shared by the batch (seeds the simulated
+                detectors unless the detector is deterministic)
+
+        Returns:
+            List of calculate_risk_score tuples, one per transcript
+        """
+        detector = self.detector
+        size = len(signals_list)
+        if size == 0:
+            return []
+
+        layout = self.layout(signals_list[0]['pack'])
+        columns = layout['columns']
+        column_index = layout['column_index']
+        features = self.feature_matrix(signals_list, columns)
+        present = features > 0
+        category_count = len(layout['categories'])
+        category_counts = features[:, :category_count]
+
+        # Category weights and boosts for multiple keyword matches
+        pattern_scores = np.minimum(category_counts / layout['keyword_totals'], 1.0) * layout['weights']
+        for threshold, multiplier in MATCH_BOOSTS:
+            pattern_scores = np.where(category_counts >= threshold, pattern_scores * multiplier, pattern_scores)
+
+        total = np.zeros(size)
+        for column in range(category_count):
+            total += pattern_scores[:, column]
+
+        # Intent scores override lower keyword scores
+        intent_score = np.zeros(size)
+        for intent, weight in INTENT_SCORES:
+            intent_score += np.where(present[:, column_index[intent]], weight, 0.0)
+        total = np.where(intent_score > 0, np.maximum(total, intent_score), total)
+
+        # Pattern count and dangerous combination bonuses
+        pattern_count = present.sum(axis=1)
+        combination_bonus = np.zeros(size)
+        for threshold, bonus in PATTERN_COUNT_BONUSES:
+            combination_bonus += np.where(pattern_count >= threshold, bonus, 0.0)
+        for first, second, bonus in COMBO_BONUSES:
+            both = present[:, column_index[first]] & present[:, column_index[second]]
+            combination_bonus += np.where(both, bonus, 0.0)
+        total += combination_bonus
+
+        # The simulated detectors and the entropy draws use each transcript's
+        # own generator, drawn in the scalar order
+        simulated = []
+        flags = np.zeros((size, 7), dtype=bool)
+        entropy = np.empty(size)
+        jitter = np.empty(size)
+        for row, signals in enumerate(signals_list):
+            rng = detector.request_rng(signals, call_time)
+            sentiment = detector.analyze_sentiment(signals)
+            is_synthetic = detector.detect_synthetic_voice(signals, rng)
+            bg_noise = detector.classify_background(signals, rng)
+            deepfake_score = detector.detect_deepfake_artifacts(signals)
+            volume_spike = detector.detect_volume_spike(signals)
+            silence_ratio = detector.analyze_silence_ratio(signals)
+            entropy[row], jitter[row] = detector.draw_entropy(rng)
+            flags[row] = (
+                sentiment['type'] == 'AGGRESSIVE', sentiment['type'] == 'PANIC', is_synthetic,
+                bg_noise == 'CALL_CENTER', deepfake_score > 0.7, volume_spike, silence_ratio > 0.8
+            )
+            simulated.append((sentiment, bg_noise, is_synthetic, deepfake_score, volume_spike, silence_ratio))
+
+        total += np.where(flags[:, 0], SIGNAL_BONUSES['aggressive'],
+                          np.where(flags[:, 1], SIGNAL_BONUSES['panic'], 0.0))
+        for column, name in enumerate(('synthetic', 'call_center', 'deepfake', 'volume_spike', 'scripted'), start=2):
+            total += np.where(flags[:, column], SIGNAL_BONUSES[name], 0.0)
+
+        total *= entropy
+        risk_scores = np.minimum(total * 120, 100)
+        risk_scores = np.maximum(0, np.minimum(100, risk_scores + jitter))
+
+        results = []
+        for row in range(size):
+            detected_patterns = [name for name in columns if present[row, column_index[name]]]
+            risk_score = float(risk_scores[row])
+            results.append(
+                (risk_score, detected_patterns, detector.threat_level_for(risk_score)) + simulated[row]
+            )
+        return results
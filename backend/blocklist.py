@@ -0,0 +1,369 @@
+"""
+VocalGuard Blocklist
+Carrier and industry blocklists imported into a sorted, fixed-width binary
+file of E.164 numbers that every worker memory-maps and binary-searches
+
+Usage: python blocklist.py import <numbers.csv|numbers.ndjson> [blocklist.bin] [--replace]
+       python blocklist.py info [blocklist.bin]
+"""
+
+import bisect
+import csv
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+import numpy as np
+
+import phone_numbers
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, imports are not serialized
+    fcntl = None
+
+DEFAULT_PATH = 'blocklist.bin'
+
+# magic, format version, number count, log2 of the Bloom filter bits, Bloom hashes
+_HEADER = struct.Struct('<4sIQII')
+_MAGIC = b'VGBL'
+_VERSION = 1
+_HEADER_SIZE = 32
+# Odd 64-bit multipliers; hash i of a number is the top bits of number * multiplier i
+_BLOOM_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+_BLOOM_BITS_PER_NUMBER = 16
+_MASK64 = (1 << 64) - 1
+_CHUNK = 1 << 20
+# Numbers held in memory while importing; each full chunk is sorted and
+# spilled to a temporary run file, and the runs are merged from disk
+IMPORT_CHUNK = 1 << 22
+
+
+def number_key(e164):
+    """The uint64 a normalized number is stored as (its digits)"""
+    return int(e164[1:])
+
+
+def key_number(key):
+    return '+' + str(key)
+
+
+class BlocklistTable:
+    """
+    One immutable, memory-mapped blocklist file.
+
+    Layout: a 32-byte header, the numbers as sorted little-endian uint64
+    keys, then a Bloom filter over them. The pages live in the OS page
+    cache, so every worker that maps the file shares one copy. A lookup
+    checks the Bloom filter first: most callers are not on the list and
+    are answered from a handful of filter bits without touching the
+    (much larger) number table; the rest are binary-searched.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.count = 0
+        self.loaded_at = time.time()
+        self._mmap = None
+        self._keys = ()
+        self._bloom = None
+        if path is None:
+            return
+        with open(path, 'rb') as table_file:
+            self._mmap = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, bloom_log2, _ = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f'Not a VocalGuard blocklist file: {path}')
+        self.count = count
+        keys_end = _HEADER_SIZE + 8 * count
+        # memoryview indexing is native-endian; the format is little-endian
+        view = memoryview(self._mmap)
+        self._keys = view[_HEADER_SIZE:keys_end].cast('Q')
+        self._bloom = view[keys_end:keys_end + (1 << bloom_log2) // 8]
+        self._bloom_shift = 64 - bloom_log2
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, e164):
+        if not self.count:
+            return False
+        key = number_key(e164)
+        bloom, shift = self._bloom, self._bloom_shift
+        for multiplier in _BLOOM_MULTIPLIERS:
+            bit = ((key * multiplier) & _MASK64) >> shift
+            if not bloom[bit >> 3] & (1 << (bit & 7)):
+                return False
+        keys = self._keys
+        index = bisect.bisect_left(keys, key)
+        return index < self.count and keys[index] == key
+
+    def keys(self):
+        """Every key as a read-only NumPy array over the mapping"""
+        if not self.count:
+            return np.empty(0, dtype='<u8')
+        return np.frombuffer(self._mmap, dtype='<u8', count=self.count, offset=_HEADER_SIZE)
+
+    def contains_many(self, e164_numbers):
+        """Boolean array: which of the numbers are on the list, in one searchsorted pass"""
+        queries = np.fromiter((number_key(n) for n in e164_numbers), dtype=np.uint64)
+        if not self.count or not len(queries):
+            return np.zeros(len(queries), dtype=bool)
+        keys = self.keys()
+        index = np.minimum(np.searchsorted(keys, queries), self.count - 1)
+        return keys[index] == queries
+
+    def info(self):
+        return {'path': self.path, 'count': self.count, 'loaded_at': self.loaded_at}
+
+
+def write_table(path, keys):
+    """
+    Write sorted unique uint64 keys as a blocklist file, atomically
+
+    keys may be memory-mapped: they are copied a chunk at a time and the
+    Bloom filter is built in the mapped output file, so writing needs no
+    memory proportional to the list. The file is written next to path
+    and renamed over it, so workers mapping the old file keep reading it
+    undisturbed and every reader sees either the old list or the new one.
+    """
+    count = len(keys)
+    bloom_log2 = max(int(count * _BLOOM_BITS_PER_NUMBER - 1).bit_length(), 6)
+    bloom_offset = _HEADER_SIZE + 8 * count
+    shift = np.uint64(64 - bloom_log2)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(prefix='.blocklist-', dir=directory)
+    try:
+        with os.fdopen(handle, 'w+b') as table_file:
+            table_file.write(_HEADER.pack(_MAGIC, _VERSION, count, bloom_log2, len(_BLOOM_MULTIPLIERS)).ljust(_HEADER_SIZE, b'\0'))
+            for start in range(0, count, _CHUNK):
+                table_file.write(np.ascontiguousarray(keys[start:start + _CHUNK], dtype='<u8').tobytes())
+            # The filter starts out as the zeros of the extended file
+            table_file.truncate(bloom_offset + (1 << bloom_log2) // 8)
+            table_file.flush()
+            bloom = np.memmap(table_file, dtype=np.uint8, mode='r+', offset=bloom_offset)
+            for start in range(0, count, _CHUNK):
+                chunk = np.asarray(keys[start:start + _CHUNK], dtype=np.uint64)
+                for multiplier in _BLOOM_MULTIPLIERS:
+                    # uint64 multiplication wraps modulo 2**64, like the masked Python product
+                    bits = (chunk * np.uint64(multiplier)) >> shift
+                    np.bitwise_or.at(bloom, bits >> np.uint64(3), np.left_shift(1, bits & np.uint64(7)).astype(np.uint8))
+            bloom.flush()
+            del bloom
+            os.fsync(table_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def read_numbers(lines, format='csv'):
+    """
+    Phone numbers from the lines of a CSV or NDJSON blocklist
+
+    CSV: the 'number' / 'phone_number' / 'phone' column when there is a
+    header, otherwise the first column. NDJSON: objects with one of those
+    keys, or bare JSON strings. Yields raw values; normalizing is up to the caller.
+    """
+    if format == 'ndjson':
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                entry = entry.get('number') or entry.get('phone_number') or entry.get('phone')
+            if isinstance(entry, (str, int)):
+                yield str(entry)
+        return
+
+    column = 0
+    for position, row in enumerate(csv.reader(lines)):
+        if not row:
+            continue
+        if position == 0:
+            header = [cell.strip().lower() for cell in row]
+            named = [name for name in ('number', 'phone_number', 'phone') if name in header]
+            if named:
+                column = header.index(named[0])
+                continue
+        if column < len(row):
+            yield row[column]
+
+
+def merge_runs(runs, out_file, block=_CHUNK):
+    """
+    Merge sorted unique uint64 arrays (usually memory-mapped run files)
+    into out_file, dropping duplicates; returns the number of keys written
+
+    Each round reads up to block keys of every run and writes out all keys
+    up to the smallest last key among them (no later key can sort before
+    it), so memory stays at one block per run.
+    """
+    positions = [0] * len(runs)
+    written = 0
+    while True:
+        windows = [(index, run[positions[index]:positions[index] + block])
+                   for index, run in enumerate(runs) if positions[index] < len(run)]
+        if not windows:
+            return written
+        bound = min(window[-1] for _, window in windows)
+        parts = []
+        for index, window in windows:
+            taken = int(np.searchsorted(window, bound, side='right'))
+            parts.append(window[:taken])
+            positions[index] += taken
+        merged = np.unique(np.concatenate(parts))
+        out_file.write(merged.astype('<u8').tobytes())
+        written += len(merged)
+
+
+def import_numbers(path, numbers, merge=True, chunk_size=IMPORT_CHUNK):
+    """
+    Build the blocklist file at path from an iterable of raw numbers
+
+    Numbers are collected chunk_size at a time; each chunk is sorted and
+    spilled to a run file next to path, then the runs (and the current
+    list, when merging) are merged into the new file, so memory does not
+    grow with the size of the import.
+
+    Args:
+        path: blocklist file to (atomically) replace
+        numbers: raw phone numbers in any format phone_numbers understands
+        merge: keep the numbers already in the file; False replaces them
+
+    Returns:
+        Dict with the rows read, the rows that were not phone numbers and
+        the size of the resulting list
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    read = rejected = 0
+    with tempfile.TemporaryDirectory(prefix='.blocklist-', dir=directory) as spill_dir:
+        run_paths = []
+        pending = array('Q')
+
+        def spill():
+            run_path = os.path.join(spill_dir, f'run-{len(run_paths)}')
+            np.unique(np.frombuffer(pending, dtype=np.uint64)).tofile(run_path)
+            run_paths.append(run_path)
+            del pending[:]
+
+        for raw in numbers:
+            read += 1
+            e164 = phone_numbers.normalize(raw)
+            if e164 is None:
+                rejected += 1
+                continue
+            pending.append(number_key(e164))
+            if len(pending) >= chunk_size:
+                spill()
+        if pending:
+            spill()
+
+        # One import at a time per file, across every worker process
+        with open(path + '.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            runs = [np.memmap(run_path, dtype='<u8', mode='r') for run_path in run_paths]
+            if merge and os.path.exists(path):
+                current = BlocklistTable(path)
+                if current.count:
+                    runs.append(current.keys())
+            merged_path = os.path.join(spill_dir, 'merged')
+            with open(merged_path, 'wb') as merged_file:
+                count = merge_runs(runs, merged_file, max(_CHUNK // max(len(runs), 1), 1024))
+            keys = np.memmap(merged_path, dtype='<u8', mode='r') if count else np.empty(0, dtype='<u8')
+            write_table(path, keys)
+            del runs, keys
+    return {'read': read, 'rejected': rejected, 'count': count}
+
+
+def import_file(source, path=DEFAULT_PATH, merge=True, format=None):
+    """Import a CSV or NDJSON file (format taken from the extension by default)"""
+    if format is None:
+        format = 'ndjson' if source.endswith(('.ndjson', '.jsonl')) else 'csv'
+    with open(source, newline='', encoding='utf-8') as source_file:
+        return import_numbers(path, read_numbers(source_file, format), merge)
+
+
+def read_stream(stream, format='csv'):
+    """Numbers from a binary stream (an upload), decoded line by line"""
+    return read_numbers(io.TextIOWrapper(stream, encoding='utf-8', newline=''), format)
+
+
+class Blocklist:
+    """
+    The current BlocklistTable of a path, swapped for a new one when the
+    file is replaced.
+
+    check() compares the file's inode and mtime and maps the new file on
+    a change; lookups keep using whichever table they started with.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, interval=30):
+        self.path = path
+        self.interval = interval
+        self.table = BlocklistTable()
+        self._stamp = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.check()
+
+    def __contains__(self, e164):
+        return e164 in self.table
+
+    def check(self):
+        """Map the file again if it was replaced; returns True when it was"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return False
+        try:
+            table = BlocklistTable(self.path)
+        except Exception as e:
+            print(f"Blocklist reload error: {e}")
+            return False
+        self._stamp = stamp
+        self.table = table
+        return True
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='blocklist-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != '--replace']
+    if args[:1] == ['import'] and len(args) in (2, 3):
+        started = time.time()
+        result = import_file(args[1], *args[2:3], merge='--replace' not in sys.argv)
+        print(f"Imported {result['read'] - result['rejected']} of {result['read']} rows "
+              f"({result['rejected']} not phone numbers); blocklist now holds {result['count']} numbers "
+              f"({time.time() - started:.1f}s)")
+    elif args[:1] == ['info'] and len(args) in (1, 2):
+        print(BlocklistTable(*args[1:2] or [DEFAULT_PATH]).info())
+    else:
+        sys.exit("Usage: python blocklist.py import <numbers.csv|numbers.ndjson> [blocklist.bin] [--replace]\n"
+                 "       python blocklist.py info [blocklist.bin]")
@@ -0,0 +1,190 @@
+"""
+VocalGuard Live Call Sessions
+Incremental analysis state for calls that are still in progress
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+class CallSession:
+    """
+    Running analysis state for one live call.
+
+    Transcript deltas are scanned exactly once as they arrive. Keyword and
+    category hits, both automaton states, case and punctuation counters, PII
+    redactions and the voice and threat findings are carried forward, so an
+    update costs time proportional to the delta rather than to the length of
+    the call. Only the closing verdict looks at the whole transcript again.
+    """
+
+    def __init__(self, session_id, detector, pii_detector, caller_name='Unknown',
+                 caller_number='Unknown', user_id=None):
+        self.session_id = session_id
+        self.caller_name = caller_name
+        self.caller_number = caller_number
+        self.user_id = user_id
+        self.call_time = datetime.now().isoformat()
+        self.opened_at = time.time()
+        self.last_activity = self.opened_at
+        self.lock = threading.Lock()
+
+        # Caller-dependent checks do not change during a call; app.py fills
+        # this in on the first update
+        self.caller_context = None
+
+        # The automaton state only makes sense against the pack that produced
+        # it, so a call keeps the signature pack it started with
+        self.pack = detector.pack
+        self._pii_detector = pii_detector
+        self._chunks = []
+        self._redacted_chunks = []
+        self._found = set()
+        self._automaton_state = 0
+        self._category_found = set()
+        self._category_state = 0
+        self._length = 0
+        self._uppercase = 0
+        self._exclamations = 0
+        self._head = ''
+        self._digest = hashlib.md5()
+        self._pii_types = set()
+        self.pii_matches = []
+        # Findings of the voice and threat analyzers, fed one delta at a time
+        self.last_delta = ''
+        self.language = None
+        self.voice_analysis = None
+        self._threats = []
+        self._threat_risk = 0
+
+    def append(self, delta):
+        """Fold a new piece of transcript into the running state"""
+        if self._chunks and not delta[:1].isspace() and not self._chunks[-1][-1:].isspace():
+            delta = ' ' + delta
+
+        lower = delta.lower()
+        found, self._automaton_state = self.pack.keyword_automaton.scan(lower, self._automaton_state)
+        self._found |= found
+        found, self._category_state = self.pack.category_index.automaton.scan(lower, self._category_state)
+        self._category_found |= found
+        self._uppercase += sum(1 for c in delta if c.isupper())
+        self._exclamations += delta.count('!')
+        if len(self._head) < 50:
+            self._head = (self._head + delta)[:50]
+        self._digest.update(delta.encode())
+
+        redacted = self._pii_detector.redact_pii(delta)
+        self._redacted_chunks.append(redacted['redacted_text'])
+        self._pii_types.update(redacted['pii_found'])
+        for match in redacted['pii_matches']:
+            self.pii_matches.append({
+                'type': match['type'],
+                'start': match['start'] + self._length,
+                'end': match['end'] + self._length
+            })
+
+        self._chunks.append(delta)
+        self._length += len(delta)
+        self.last_delta = delta
+        self.last_activity = time.time()
+
+    def add_findings(self, voice_analysis, threat_match, language):
+        """
+        Fold what the voice and threat analyzers found in the latest delta:
+        the strongest voice reading and every emerging threat matched so far
+        """
+        if self.voice_analysis is None or (
+                voice_analysis['total_voice_risk_score'] > self.voice_analysis['total_voice_risk_score']):
+            self.voice_analysis = voice_analysis
+        for threat in threat_match['matched_threats']:
+            if threat not in self._threats:
+                self._threats.append(threat)
+        self._threat_risk = max(self._threat_risk, threat_match['total_emerging_threat_risk'])
+        self.language = language
+
+    @property
+    def transcript(self):
+        return ''.join(self._chunks)
+
+    @property
+    def duration(self):
+        return int(time.time() - self.opened_at)
+
+    def signals(self):
+        """Scoring signals for everything appended so far"""
+        return {
+            'pack': self.pack,
+            'keyword_counts': self.pack.keyword_automaton.count_groups(self._found),
+            'length': self._length,
+            'uppercase': self._uppercase,
+            'exclamations': self._exclamations,
+            'head': self._head,
+            'digest': self._digest.hexdigest()
+        }
+
+    def categories(self, patterns):
+        """Scam category and other candidates, from the category hits so far"""
+        return self.pack.category_index.classify_terms(patterns, self._category_found)
+
+    def threat_match(self):
+        """Same shape as ThreatIntelligence.match_emerging_patterns for the call so far"""
+        return {
+            'emerging_threats_detected': bool(self._threats),
+            'matched_threats': list(self._threats),
+            'total_emerging_threat_risk': self._threat_risk,
+            'threat_count': len(self._threats)
+        }
+
+    def redaction(self):
+        """
+        Same shape as ScamDetector.redact_pii, from the per-delta redactions;
+        PII split across two deltas is missed until the closing verdict
+        redacts the whole transcript
+        """
+        return {
+            'redacted_text': ''.join(self._redacted_chunks),
+            'pii_found': [t for t in self._pii_detector.pii_patterns if t in self._pii_types],
+            'pii_matches': list(self.pii_matches)
+        }
+
+
+class CallSessionManager:
+    """Registry of open call sessions with idle expiry"""
+
+    def __init__(self, detector, pii_detector, idle_timeout=1800):
+        self.detector = detector
+        self.pii_detector = pii_detector
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def open(self, caller_name='Unknown', caller_number='Unknown', user_id=None):
+        """Start a new session and return it"""
+        session = CallSession(
+            uuid.uuid4().hex, self.detector, self.pii_detector,
+            caller_name=caller_name, caller_number=caller_number, user_id=user_id
+        )
+        with self._lock:
+            self._expire_idle()
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        """Remove a session and hand it back for the final verdict"""
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def _expire_idle(self):
+        cutoff = time.time() - self.idle_timeout
+        for session_id in [s for s, session in self._sessions.items() if session.last_activity < cutoff]:
+            del self._sessions[session_id]
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,118 @@
+"""
+VocalGuard Call Velocity
+Sliding-window call rates per caller number in fixed memory, for spotting
+burst dialing (one number ringing hundreds of subscribers in minutes)
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+class CallVelocityTracker:
+    """
+    Time-bucketed count-min sketch with a heavy-hitters list.
+
+    The window is split into buckets of window / buckets seconds, each a
+    depth x width counter table. A call increments one counter per row in
+    the current bucket; a number's rate is the smallest of its row sums
+    over the live buckets, which can overestimate (on hash collisions) but
+    never underestimates. Buckets are cleared as they fall out of the
+    window. Memory is the same however many distinct numbers call; only
+    the top_k busiest numbers are remembered by name, for top().
+    """
+
+    def __init__(self, window=300, buckets=10, width=4096, depth=4, top_k=50, clock=time.time):
+        self.window = window
+        self.bucket_seconds = window / buckets
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.clock = clock
+        # Rows of each table are laid out flat: cell = row * width + column
+        self._counts = np.zeros((buckets, depth * width), dtype=np.uint32)
+        # Sum of the live buckets, kept up to date so a lookup reads depth cells
+        self._window = np.zeros(depth * width, dtype=np.uint32)
+        # Per-call updates go through memoryviews: cheap scalar access, while
+        # expiring a bucket stays one NumPy operation
+        self._bucket_cells = [memoryview(bucket) for bucket in self._counts]
+        self._window_cells = memoryview(self._window)
+        self._epoch = int(clock() // self.bucket_seconds)
+        self._heavy = {}
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def _cells(self, number):
+        # Double hashing: depth independent-enough columns from two hashes
+        first = hash(number)
+        second = hash((number, 'velocity')) | 1
+        width = self.width
+        return [row * width + (first + row * second) % width for row in range(self.depth)]
+
+    def _advance(self):
+        epoch = int(self.clock() // self.bucket_seconds)
+        if epoch <= self._epoch:
+            return
+        buckets = len(self._counts)
+        for expired in range(max(self._epoch + 1, epoch - buckets + 1), epoch + 1):
+            self._window -= self._counts[expired % buckets]
+            self._counts[expired % buckets] = 0
+        self._epoch = epoch
+        self._refresh_heavy()
+
+    def _refresh_heavy(self):
+        # Counts only ever drop when a bucket expires: re-estimate the named
+        # dialers then, so a newcomer is compared against current rates
+        current = {number: self._estimate(self._cells(number)) for number in self._heavy}
+        self._heavy = {number: count for number, count in current.items() if count}
+        self._floor = min(self._heavy.values()) if len(self._heavy) >= self.top_k else 0
+
+    def _estimate(self, cells):
+        window = self._window_cells
+        return min([window[cell] for cell in cells])
+
+    def record(self, number):
+        """Count one call from number; returns its calls within the window"""
+        cells = self._cells(number)
+        with self._lock:
+            self._advance()
+            bucket = self._bucket_cells[self._epoch % len(self._counts)]
+            window = self._window_cells
+            for cell in cells:
+                bucket[cell] += 1
+                window[cell] += 1
+            count = self._estimate(cells)
+
+            heavy = self._heavy
+            if number in heavy:
+                heavy[number] = count
+            elif len(heavy) < self.top_k:
+                heavy[number] = count
+                if len(heavy) == self.top_k:
+                    self._floor = min(heavy.values())
+            elif count > self._floor:
+                # Displace the quietest name; _floor (the smallest count
+                # when the list is full) spares most calls the scan
+                quietest = min(heavy, key=heavy.get)
+                if count > heavy[quietest]:
+                    del heavy[quietest]
+                    heavy[number] = count
+                self._floor = min(heavy.values())
+        return count
+
+    def rate(self, number):
+        """Calls from number within the window"""
+        cells = self._cells(number)
+        with self._lock:
+            self._advance()
+            return self._estimate(cells)
+
+    def top(self, limit=20):
+        """[(number, calls in window)] of the busiest dialers, busiest first"""
+        with self._lock:
+            self._advance()
+            # Hash collisions can have raised a name's estimate since it last called
+            self._refresh_heavy()
+            ranked = sorted(self._heavy.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
@@ -0,0 +1,178 @@
+"""
+VocalGuard Call Writer
+Write-behind persistence: verdicts are returned right away and their call
+rows are committed in batches by a background thread
+"""
+
+import os
+import queue
+import threading
+import time
+
+
+class CallWriter:
+    """
+    Bounded write-behind queue in front of VocalGuardDB.
+
+    submit() hands out the call id straight away from a block reserved in
+    the database, queues the row and returns. A background thread commits
+    queued rows in transactions of up to batch_size, at least every
+    flush_interval seconds. When the queue is full, submit() waits up to
+    put_timeout for room and then writes the row itself, so a stalled disk
+    slows requests down rather than losing calls. close() drains the queue.
+    """
+
+    def __init__(self, db, batch_size=256, flush_interval=0.05, max_queue=10000,
+                 put_timeout=2.0, id_block=64, max_retries=3):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.put_timeout = put_timeout
+        self.id_block = id_block
+        self.max_retries = max_retries
+        self.written = 0
+        self.failed = 0
+        self.direct_writes = 0
+        self._id_lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._next_id = 0
+        self._end_id = 0
+        self._pid = os.getpid()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='call-writer', daemon=True)
+        self._thread.start()
+
+    def _check_fork(self):
+        # A forked child has neither the writer thread nor a private id block
+        if self._pid != os.getpid():
+            with self._id_lock:
+                if self._pid != os.getpid():
+                    self._start()
+
+    def allocate_ids(self, count):
+        """Call ids for count new rows"""
+        ids = []
+        with self._id_lock:
+            while len(ids) < count:
+                if self._next_id >= self._end_id:
+                    block = max(self.id_block, count - len(ids))
+                    self._next_id = self.db.reserve_call_ids(block)
+                    self._end_id = self._next_id + block
+                take = min(count - len(ids), self._end_id - self._next_id)
+                ids.extend(range(self._next_id, self._next_id + take))
+                self._next_id += take
+        return ids
+
+    def submit(self, call_data, user_id=None):
+        """Queue one call row; returns its call id"""
+        return self.submit_many([call_data], user_id)[0]
+
+    def submit_many(self, calls, user_id=None):
+        """Queue several call rows; returns their call ids in order"""
+        self._check_fork()
+        if self._closed:
+            raise RuntimeError('Call writer is closed')
+        ids = self.allocate_ids(len(calls))
+        for call_id, call_data in zip(ids, calls):
+            entry = (call_id, call_data, user_id)
+            try:
+                self._queue.put(entry, timeout=self.put_timeout)
+            except queue.Full:
+                # Backpressure: the caller pays for the write itself
+                self.db.save_calls_with_ids([entry])
+                self.direct_writes += 1
+        return ids
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._closed:
+                    return
+                continue
+            if first is None:
+                self._queue.task_done()
+                return
+
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    self._queue.task_done()
+                    break
+                batch.append(entry)
+
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch):
+        for attempt in range(self.max_retries):
+            try:
+                self.db.save_calls_with_ids(batch)
+                self.written += len(batch)
+                return
+            except Exception as e:
+                print(f"Call writer flush error (attempt {attempt + 1}): {e}")
+                time.sleep(self.flush_interval * (attempt + 1))
+        # Their ids were already handed out: save every row that can be
+        # written on its own and report the ones that are lost
+        lost = []
+        for entry in batch:
+            try:
+                self.db.save_calls_with_ids([entry])
+                self.written += 1
+            except Exception as e:
+                lost.append(entry[0])
+                print(f"Call writer dropped call {entry[0]}: {e}")
+        self.failed += len(lost)
+
+    def flush(self):
+        """Block until everything queued so far is committed"""
+        self._check_fork()
+        self._queue.join()
+
+    def close(self):
+        """Drain the queue and stop the writer thread"""
+        if self._closed or self._pid != os.getpid():
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        # Rows that raced past the sentinel are written here. The sentinel
+        # itself is still queued when the thread saw _closed on an idle
+        # timeout first, and is skipped
+        leftover = []
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            if entry is not None:
+                leftover.append(entry)
+        if leftover:
+            self._write(leftover)
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'failed': self.failed,
+            'direct_writes': self.direct_writes,
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval
+        }
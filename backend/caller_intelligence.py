@@ -1,62 +1,209 @@
-"""Simple Caller Intelligence Placeholder"""
+"""
+VocalGuard Caller Intelligence
+Caller reputation from community reports, blocks and past verdicts,
+answered from the in-memory reputation store
+"""
+
+import phone_numbers
+from blocklist import DEFAULT_PATH as DEFAULT_BLOCKLIST_PATH, Blocklist, import_numbers
+from call_velocity import CallVelocityTracker
+from reputation_store import ReputationStore
+
+# Community reports at which a number counts as a verified scammer
+VERIFIED_SCAMMER_REPORTS = 3
+# Scam verdicts (and share of all calls) at which a number is high risk
+HIGH_RISK_SCAM_CALLS = 3
+HIGH_RISK_SCAM_RATIO = 0.5
+# Risk added for burst dialing: from BURST_RISK_MIN at the burst threshold
+# up to BURST_RISK_MAX at BURST_RISK_SPAN times the threshold
+BURST_RISK_MIN = 10
+BURST_RISK_MAX = 30
+BURST_RISK_SPAN = 5
+
+
 class CallerIntelligence:
-    def __init__(self, db_path='vocalguard.db'):
-        pass
-    
-    def check_number_reputation(self, phone_number, user_phone_number=None):
-        # 1. Check Offline Blacklist
-        blacklist = ['+1234567890', '+1987654321', '+15550000000'] # Demo blacklist
-        if phone_number in blacklist:
-            return {
-                'is_known': True,
-                'reputation_score': 100,
-                'trust_level': 'BLOCKED',
-                'risk_modifier': 50,
-                'recommendation': 'Known scam number. Auto-block recommended.'
-            }
-            
-        # 2. Check Neighbor Spoofing (Category 2, Item 13)
+    def __init__(self, db, flush_interval=1.0, velocity_window=300, burst_calls=20,
+                 blocklist_path=DEFAULT_BLOCKLIST_PATH, blocklist_interval=30):
+        self.store = ReputationStore(db, flush_interval)
+        # Imported carrier/industry lists, memory-mapped and shared by all workers
+        self.blocklist = Blocklist(blocklist_path, blocklist_interval)
+        self.blocklist.start()
+        self.velocity = CallVelocityTracker(window=velocity_window)
+        self.burst_calls = burst_calls
+
+    def check_number_reputation(self, phone_number, user_phone_number=None, on_blocklist=None):
+        """
+        Reputation of a caller; memory only, safe on the analyze hot path.
+        on_blocklist can be passed in when the imported blocklist was
+        already searched for a whole batch (see check_numbers).
+        """
+        number = phone_numbers.normalize(phone_number)
+        record = self.store.get(number) if number else None
+        matched = self.store.match_range(number) if number else None
+        number_range = matched[1] if matched else None
+        if on_blocklist is None:
+            on_blocklist = number is not None and number in self.blocklist
+        on_blocklist = bool(on_blocklist)
+
+        scam_reports = record.scam_reports if record else 0
+        total_calls = record.total_calls if record else 0
+        scam_calls = record.scam_calls if record else 0
+        is_verified_scammer = scam_reports >= VERIFIED_SCAMMER_REPORTS
+
+        # Neighbor Spoofing (Category 2, Item 13)
         # Scan if incoming number has same area code/prefix as user
         is_neighbor_spoof = False
-        if user_phone_number and len(phone_number) > 6 and len(user_phone_number) > 6:
-            # Check first 6 digits (Area code + prefix)
-            if phone_number[:6] == user_phone_number[:6] and phone_number != user_phone_number:
-                is_neighbor_spoof = True
-        
-        risk_modifier = 0
-        recommendation = 'Exercise caution with unknown caller'
-        
-        if is_neighbor_spoof:
-            risk_modifier = 30
-            recommendation = 'Potential Neighbor Spoofing detected'
+        user_number = phone_numbers.normalize(user_phone_number)
+        exchange = phone_numbers.exchange_prefix(number)
+        if exchange and exchange == phone_numbers.exchange_prefix(user_number) and number != user_number:
+            is_neighbor_spoof = True
+
+        if record and record.blocked:
+            trust_level, risk_modifier = 'BLOCKED', 50
+            recommendation = 'Known scam number. Auto-block recommended.'
+        elif on_blocklist:
+            trust_level, risk_modifier = 'BLOCKED', 50
+            recommendation = 'Number is on an imported blocklist. Auto-block recommended.'
+        elif number_range and number_range.blocked:
+            trust_level, risk_modifier = 'BLOCKED', 50
+            recommendation = f'Number is in blocked range {matched[0]}. Auto-block recommended.'
+        elif is_verified_scammer:
+            trust_level, risk_modifier = 'KNOWN SCAMMER', 40
+            recommendation = f'Reported as a scam {scam_reports} times. Do not engage.'
+        elif scam_calls >= HIGH_RISK_SCAM_CALLS and scam_calls >= HIGH_RISK_SCAM_RATIO * total_calls:
+            trust_level, risk_modifier = 'HIGH RISK', 25
+            recommendation = f'{scam_calls} of {total_calls} earlier calls were scams'
+        elif scam_reports or scam_calls or is_neighbor_spoof or number_range:
+            trust_level = 'SUSPICIOUS'
+            risk_modifier = max(30 if is_neighbor_spoof else 15,
+                                number_range.risk_modifier if number_range else 0)
+            if is_neighbor_spoof:
+                recommendation = 'Potential Neighbor Spoofing detected'
+            elif number_range and not (scam_reports or scam_calls):
+                recommendation = number_range.reason or f'Number is in flagged range {matched[0]}'
+            else:
+                recommendation = 'Number has scam history, exercise caution'
+        else:
+            trust_level, risk_modifier = 'UNKNOWN', 0
+            recommendation = 'Exercise caution with unknown caller'
 
         return {
-            'is_known': False,
-            'reputation_score': 50 + risk_modifier,
-            'trust_level': 'SUSPICIOUS' if is_neighbor_spoof else 'UNKNOWN',
-            'community_reports': 0,
-            'scam_reports': 0,
+            'normalized_number': number,
+            'matched_range': matched[0] if matched else None,
+            'on_blocklist': on_blocklist,
+            'is_known': record is not None,
+            'reputation_score': min(50 + risk_modifier, 100),
+            'trust_level': trust_level,
+            'community_reports': scam_reports,
+            'scam_reports': scam_reports,
             'legitimate_reports': 0,
-            'is_verified_scammer': False,
+            'is_verified_scammer': is_verified_scammer,
             'is_verified_legitimate': False,
-            'total_calls': 0,
-            'blocked_count': 0,
+            'total_calls': total_calls,
+            'scam_calls': scam_calls,
+            'average_risk_score': round(record.average_risk, 2) if record else 0,
+            'last_category': record.last_category if record else None,
+            'blocked_count': (1 if record and record.blocked else 0) + on_blocklist,
             'risk_modifier': risk_modifier,
             'recommendation': recommendation,
             'is_neighbor_spoof': is_neighbor_spoof
         }
-    
+
+    def check_numbers(self, numbers):
+        """
+        Reputations of many callers at once
+
+        Every number is normalized first, the imported blocklist is searched
+        for all of them in one pass, and repeated numbers are looked up once.
+
+        Returns:
+            (normalized number or None, reputation dict or None) per input, in order
+        """
+        normalized = [phone_numbers.normalize(number) for number in numbers]
+        unique = list(dict.fromkeys(number for number in normalized if number))
+        blocked = self.blocklist.table.contains_many(unique)
+        reputations = {
+            number: self.check_number_reputation(number, on_blocklist=on_list)
+            for number, on_list in zip(unique, blocked)
+        }
+        return [(number, reputations.get(number)) for number in normalized]
+
     def update_reputation_score(self, phone_number, is_scam, risk_score, scam_category=None):
-        pass
-    
+        """Count a finished call; written back to the database in batches"""
+        number = phone_numbers.normalize(phone_number)
+        if number:
+            self.store.record_call(number, is_scam, risk_score, scam_category)
+
     def track_call_pattern(self, phone_number):
-        pass
-    
+        """
+        Count a call towards its number's dialing rate
+
+        Returns:
+            Calls from the number within the velocity window (this one
+            included) and the risk modifier they are worth
+        """
+        number = phone_numbers.normalize(phone_number)
+        calls = self.velocity.record(number) if number else 0
+        return self.velocity_assessment(calls)
+
+    def velocity_assessment(self, calls):
+        """Risk modifier for calls made within the velocity window"""
+        burst_detected = calls >= self.burst_calls
+        risk_modifier = 0
+        if burst_detected:
+            excess = (calls - self.burst_calls) / (self.burst_calls * (BURST_RISK_SPAN - 1))
+            risk_modifier = round(min(BURST_RISK_MIN + excess * (BURST_RISK_MAX - BURST_RISK_MIN), BURST_RISK_MAX), 2)
+        return {
+            'calls_in_window': calls,
+            'window_seconds': self.velocity.window,
+            'burst_detected': burst_detected,
+            'risk_modifier': risk_modifier
+        }
+
+    def top_dialers(self, limit=20):
+        """Busiest caller numbers within the velocity window"""
+        return [
+            dict(number=number, **self.velocity_assessment(calls))
+            for number, calls in self.velocity.top(limit)
+        ]
+
+    @staticmethod
+    def _require_number(phone_number):
+        number = phone_numbers.normalize(phone_number)
+        if number is None:
+            raise ValueError(f'Not a phone number: {phone_number}')
+        return number
+
     def report_scam(self, phone_number, description, risk_score, scam_category):
-        return 1
-    
+        """Store a community scam report; returns its id"""
+        return self.store.add_report(
+            self._require_number(phone_number), description, risk_score, scam_category
+        )
+
     def block_number(self, phone_number, reason):
-        return True
-    
+        """Block a number; returns False when it was already blocked"""
+        return self.store.block(self._require_number(phone_number), reason)
+
+    def set_range(self, prefix, reason, blocked=True, risk_modifier=0):
+        """
+        Block or score every number under an E.164 prefix ('+1900', '+1202555');
+        the narrowest matching range wins. Neither blocked nor a modifier lifts it.
+        """
+        digits = prefix[1:] if prefix.startswith('+') else prefix
+        if not (digits.isdigit() and digits[0] != '0' and len(digits) <= 15):
+            raise ValueError(f'Not a number prefix: {prefix}')
+        self.store.set_range('+' + digits, blocked, risk_modifier, reason)
+
     def get_blocklist(self, limit=100):
-        return []
+        """Numbers blocked one by one, most recent first"""
+        return self.store.db.get_blocklist(limit)
+
+    def import_blocklist(self, numbers, merge=True):
+        """Extend (or, without merge, replace) the imported blocklist; every worker maps the new file"""
+        result = import_numbers(self.blocklist.path, numbers, merge)
+        self.blocklist.check()
+        return result
+
+    def close(self):
+        self.blocklist.stop()
+        self.store.close()
@@ -0,0 +1,74 @@
+"""
+VocalGuard Scam Category Index
+Data-driven industry classification: category rules live in a table of
+the signature pack and compile to one keyword automaton whose matches map
+to category bitmasks
+"""
+
+from typing import Dict, List, Set, Tuple
+
+from keyword_engine import KeywordAutomaton
+
+
+class CategoryIndex:
+    """
+    Classifies a transcript into every scam category it fits, in one scan.
+
+    Each category has a priority, a list of terms (any one is enough) and an
+    optional list of detector patterns of which at least one must also have
+    fired. A category with no terms is decided by its patterns alone. The
+    candidate with the highest priority wins; ties keep table order.
+    """
+
+    def __init__(self, table: Dict):
+        self.default = table.get('default', 'General Scam')
+        self.categories = sorted(
+            table['categories'], key=lambda c: -c.get('priority', 0)
+        )
+        self.names = [c['name'] for c in self.categories]
+        self.required_patterns = [set(c.get('requires_patterns', [])) for c in self.categories]
+        self.automaton = KeywordAutomaton({c['name']: c.get('terms', []) for c in self.categories})
+
+        # term id -> bitmask of the categories listing that term
+        self.term_masks = self.automaton.group_masks(self.names)
+        # Categories that match without any term
+        self.termless_mask = 0
+        for position, category in enumerate(self.categories):
+            if not category.get('terms'):
+                self.termless_mask |= 1 << position
+
+    def classify(self, patterns: List[str], transcript_lower: str) -> Tuple[str, List[str]]:
+        """
+        Winning category and every other candidate, highest priority first
+
+        Args:
+            patterns: Patterns reported by the risk scorer
+            transcript_lower: Lowercased transcript
+
+        Returns:
+            Tuple of (category, other candidate categories)
+        """
+        found, _ = self.automaton.scan(transcript_lower)
+        return self.classify_terms(patterns, found)
+
+    def classify_terms(self, patterns: List[str], found: Set[int]) -> Tuple[str, List[str]]:
+        """
+        Same as classify, from term ids already collected with the automaton
+        (live call sessions scan each delta once and keep the set)
+        """
+        mask = self.termless_mask
+        for term_id in found:
+            mask |= self.term_masks[term_id]
+
+        candidates = []
+        for position, name in enumerate(self.names):
+            if not mask >> position & 1:
+                continue
+            required = self.required_patterns[position]
+            if required and not any(p in required for p in patterns):
+                continue
+            candidates.append(name)
+
+        if not candidates:
+            return self.default, []
+        return candidates[0], candidates[1:]
@@ -0,0 +1,127 @@
+"""
+VocalGuard SQLite Connection Manager
+One configured connection per thread, pooled and reused across requests
+"""
+
+import os
+import sqlite3
+import threading
+import weakref
+from pathlib import Path
+
+# Managers to reset in a forked child
+_managers = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for manager in list(_managers):
+        manager._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class ConnectionManager:
+    """
+    Thread-local SQLite connections for one database file.
+
+    A thread takes a connection on first use and keeps it for its lifetime.
+    When the thread ends the connection goes back to an idle pool for the
+    next thread, so thread-per-request servers reuse connections too and
+    requests skip connect/configure entirely. Connections are set up once
+    with WAL journaling, synchronous=NORMAL, a busy timeout, a large page
+    cache and a statement cache. After a fork the child drops (without
+    closing) every connection inherited from the parent and opens its own.
+    With read_only, connections open the file in read-only mode and only
+    ever read the WAL that another process's writer maintains.
+    """
+
+    def __init__(self, db_path, busy_timeout_ms=5000, cache_size_kib=65536, cached_statements=256,
+                 max_idle=16, read_only=False):
+        self.db_path = db_path
+        self.read_only = read_only
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self.max_idle = max_idle
+        self._local = threading.local()
+        self._connections = set()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        _managers.add(self)
+
+    def connection(self):
+        """The calling thread's connection, opened and configured on first use"""
+        if self._pid != os.getpid():
+            self._after_fork()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._open()
+                with self._lock:
+                    self._connections.add(conn)
+            self._local.conn = conn
+            weakref.finalize(threading.current_thread(), self._release, conn)
+        return conn
+
+    def _release(self, conn):
+        """Return a finished thread's connection to the idle pool"""
+        with self._lock:
+            if conn not in self._connections:
+                return  # closed, or inherited across a fork
+            if len(self._idle) < self.max_idle:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.append(conn)
+                return
+            self._connections.discard(conn)
+        conn.close()
+
+    def _open(self):
+        # check_same_thread is off only so close() can run from another
+        # thread at shutdown; each connection is otherwise used by one thread
+        if self.read_only:
+            conn = sqlite3.connect(
+                Path(self.db_path).resolve().as_uri() + '?mode=ro', uri=True,
+                timeout=self.busy_timeout_ms / 1000,
+                cached_statements=self.cached_statements, check_same_thread=False
+            )
+            conn.execute('PRAGMA query_only=ON')
+        else:
+            conn = sqlite3.connect(
+                self.db_path, timeout=self.busy_timeout_ms / 1000,
+                cached_statements=self.cached_statements, check_same_thread=False
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute(f'PRAGMA cache_size={-int(self.cache_size_kib)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    def _after_fork(self):
+        # SQLite handles must not cross a fork; forget the parent's ones
+        self._local = threading.local()
+        self._connections = set()
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def close(self):
+        """Close every connection (clean shutdown); threads reopen on next use"""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+            self._idle = []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"Error closing database connection: {e}")
+        self._local = threading.local()
+
+    def __len__(self):
+        return len(self._connections)
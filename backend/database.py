@@ -5,21 +5,57 @@ Persistent storage for call analysis and user data
 
 import sqlite3
 import json
+import re
 from datetime import datetime
 from pathlib import Path
+from connection_manager import ConnectionManager
+from migrations import run_migrations
+import phone_numbers
 
 class VocalGuardDB:
     """SQLite database for VocalGuard"""
     
     def __init__(self, db_path='vocalguard.db'):
         self.db_path = db_path
+        # Per-thread connections, configured once and reused by every query
+        self.connections = ConnectionManager(db_path)
         self.init_db()
     
+    def connection(self):
+        """This thread's pooled connection"""
+        return self.connections.connection()
+    
+    def close(self):
+        """Close all pooled connections (on shutdown)"""
+        self.connections.close()
+    
     def init_db(self):
-        """Initialize database with required tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        """Bring the database schema up to date"""
+        run_migrations(self.connection(), self._migrations())
+    
+    def _migrations(self):
+        """
+        Schema history, oldest first. Append new steps with the next version
+        number and never edit an applied one; databases created before
+        versioning ran the first steps as CREATE ... IF NOT EXISTS, so those
+        stay idempotent.
+        """
+        return [
+            (1, 'Base tables', self._migrate_base_tables),
+            (2, 'Keyset pagination indexes', self._migrate_history_indexes),
+            (3, 'Call search index', self._init_search),
+            (4, 'Threat and PII tag tables', self._init_tags),
+            (5, 'Statistics counters', self._init_statistics),
+            (6, 'Stored reports', self._migrate_reports),
+            (7, 'Scam and caller number indexes', self._migrate_query_indexes),
+            (8, 'Persist scam category and risk score', self._migrate_call_scores),
+            (9, 'Time-bucketed rollups', self._init_rollups),
+            (10, 'Caller reputation', self._migrate_caller_reputation),
+            (11, 'Caller number ranges', self._migrate_caller_ranges),
+            (12, 'Commit-order call sequence', self._migrate_call_sequence),
+        ]
+    
+    def _migrate_base_tables(self, cursor):
         # Calls table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS calls (
@@ -84,87 +120,348 @@ class VocalGuardDB:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Databases from before user accounts have no calls.user_id
+        call_columns = {row[1] for row in cursor.execute('PRAGMA table_info(calls)')}
+        if 'user_id' not in call_columns:
+            cursor.execute('ALTER TABLE calls ADD COLUMN user_id INTEGER REFERENCES users(id)')
     
-    def save_call(self, call_data):
-        """Save analyzed call to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+    def _migrate_history_indexes(self, cursor):
+        # Keyset pagination over (timestamp, id), per user and overall
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_calls_user_time ON calls(user_id, timestamp, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_calls_time ON calls(timestamp, id)')
+    
+    def _migrate_reports(self, cursor):
+        # Rendered reports are looked up by call and report type (+version),
+        # and dropped when their call changes
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_reports_call_type ON reports(call_id, report_type)')
         cursor.execute('''
-            INSERT INTO calls 
-            (caller_name, caller_number, transcript, is_scam, confidence, 
-             threat_level, detected_threats, redacted_transcript, detected_pii, 
-             warning_message, duration, language)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            call_data.get('caller_name'),
-            call_data.get('caller_number'),
-            call_data.get('transcript'),
-            call_data.get('is_scam'),
-            call_data.get('confidence'),
-            call_data.get('threat_level'),
-            json.dumps(call_data.get('detected_threats', [])),
-            call_data.get('redacted_transcript'),
-            json.dumps(call_data.get('detected_pii', [])),
-            call_data.get('warning_message'),
-            call_data.get('duration', 0),
-            call_data.get('language', 'en')
-        ))
+            CREATE TRIGGER IF NOT EXISTS calls_reports_update AFTER UPDATE ON calls BEGIN
+                DELETE FROM reports WHERE call_id = old.id;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS calls_reports_delete AFTER DELETE ON calls BEGIN
+                DELETE FROM reports WHERE call_id = old.id;
+            END
+        ''')
+    
+    def _migrate_query_indexes(self, cursor):
+        # Scam-only time ranges (threat analytics) and per-number call lookups
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_calls_scam_time ON calls(is_scam, timestamp, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_calls_caller_number ON calls(caller_number, timestamp)')
+    
+    def _migrate_caller_reputation(self, cursor):
+        # One row per caller number; seq orders changes for incremental reloads
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS caller_reputation (
+                number TEXT PRIMARY KEY,
+                scam_reports INTEGER NOT NULL DEFAULT 0,
+                total_calls INTEGER NOT NULL DEFAULT 0,
+                scam_calls INTEGER NOT NULL DEFAULT 0,
+                risk_sum REAL NOT NULL DEFAULT 0,
+                last_category TEXT,
+                blocked INTEGER NOT NULL DEFAULT 0,
+                block_reason TEXT,
+                blocked_at DATETIME,
+                seq INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_caller_reputation_seq ON caller_reputation(seq)')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_caller_reputation_blocked
+            ON caller_reputation(blocked, blocked_at)
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS caller_reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                number TEXT NOT NULL,
+                description TEXT,
+                risk_score REAL,
+                scam_category TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_caller_reports_number ON caller_reports(number, created_at)')
+        # The numbers CallerIntelligence used to hard-code
+        cursor.executemany(
+            f'''INSERT OR IGNORE INTO caller_reputation (number, blocked, block_reason, blocked_at, seq)
+            VALUES (?, 1, 'Demo blacklist', CURRENT_TIMESTAMP, {self._NEXT_REPUTATION_SEQ})''',
+            [('+1234567890',), ('+1987654321',), ('+15550000000',)]
+        )
+    
+    def _migrate_call_sequence(self, cursor):
+        # Call ids are reserved in blocks per process (CallWriter), so they do
+        # not follow commit order; seq does, for history delta polls
+        cursor.execute('ALTER TABLE calls ADD COLUMN seq INTEGER')
+        # Only content changes invalidate a rendered report, not seq
+        cursor.execute('DROP TRIGGER IF EXISTS calls_reports_update')
+        cursor.execute(f'''
+            CREATE TRIGGER calls_reports_update
+            AFTER UPDATE OF {', '.join(self._CALL_CONTENT_COLUMNS)} ON calls BEGIN
+                DELETE FROM reports WHERE call_id = old.id;
+            END
+        ''')
+        cursor.execute('''
+            WITH ordered AS (SELECT id, ROW_NUMBER() OVER (ORDER BY timestamp, id) AS seq FROM calls)
+            UPDATE calls SET seq = ordered.seq FROM ordered WHERE ordered.id = calls.id
+        ''')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_calls_seq ON calls(seq)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_calls_user_seq ON calls(user_id, seq)')
+    
+    def _migrate_caller_ranges(self, cursor):
+        # E.164 prefixes (country, area code, exchange) blocked or scored as a whole
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS caller_ranges (
+                prefix TEXT PRIMARY KEY,
+                blocked INTEGER NOT NULL DEFAULT 0,
+                risk_modifier INTEGER NOT NULL DEFAULT 0,
+                reason TEXT,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                seq INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_caller_ranges_seq ON caller_ranges(seq)')
+    
+    def _migrate_call_scores(self, cursor):
+        cursor.execute('ALTER TABLE calls ADD COLUMN scam_category TEXT')
+        cursor.execute('ALTER TABLE calls ADD COLUMN risk_score REAL')
+        # confidence has always been risk_score / 100
+        cursor.execute('''
+            UPDATE calls SET risk_score = ROUND(confidence * 100, 2) WHERE confidence IS NOT NULL
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_calls_category_time ON calls(scam_category, timestamp)')
+    
+    # Caller numbers reduced to their digits, in SQL for the sync triggers
+    _NUMBER_DIGITS_SQL = (
+        "replace(replace(replace(replace(replace(replace("
+        "coalesce({col}, ''), '+', ''), '-', ''), ' ', ''), '(', ''), ')', ''), '.', '')"
+    )
+    
+    # JSON list column of calls -> (junction table, tag column)
+    _TAG_TABLES = {
+        'detected_threats': ('call_threats', 'threat'),
+        'detected_pii': ('call_pii', 'pii_type'),
+    }
+    
+    # Everything but the JSON tag columns, which are read from the junction tables
+    _CALL_COLUMNS = ', '.join('calls.' + column for column in (
+        'id', 'user_id', 'caller_name', 'caller_number', 'transcript', 'is_scam', 'confidence',
+        'threat_level', 'redacted_transcript', 'warning_message', 'timestamp', 'duration', 'language',
+        'scam_category', 'risk_score', 'seq'
+    ))
+    
+    # Everything a call's rendered report is built from
+    _CALL_CONTENT_COLUMNS = (
+        'user_id', 'caller_name', 'caller_number', 'transcript', 'is_scam', 'confidence',
+        'threat_level', 'detected_threats', 'redacted_transcript', 'detected_pii',
+        'warning_message', 'timestamp', 'duration', 'language', 'scam_category', 'risk_score'
+    )
+    
+    # Next commit-order position; inserts run under the write lock, so seq
+    # increases in the order rows become visible to readers
+    _NEXT_CALL_SEQ = '(SELECT COALESCE(MAX(seq), 0) + 1 FROM calls)'
+    
+    def _init_tags(self, cursor):
+        """
+        Threat and PII tags of every call as junction tables, kept in sync
+        with the JSON columns by triggers, so tag analytics are GROUP BY
+        queries and reads need no JSON decoding
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = 'call_threats'")
+        backfill = cursor.fetchone() is None
         
-        conn.commit()
-        call_id = cursor.lastrowid
-        conn.close()
-        return call_id
+        triggers = []
+        for column, (table, tag) in self._TAG_TABLES.items():
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    call_id INTEGER NOT NULL,
+                    {tag} TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (call_id, {tag})
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{tag} ON {table}({tag}, call_id)')
+            triggers.append((column, table, tag))
+        
+        def insert_tags(row):
+            return ''.join(f'''
+                INSERT OR IGNORE INTO {table} (call_id, {tag}, position)
+                SELECT {row}.id, value, key FROM json_each(
+                    CASE WHEN json_valid({row}.{column}) THEN {row}.{column} ELSE '[]' END
+                ) WHERE type = 'text';''' for column, table, tag in triggers)
+        
+        def delete_tags(row):
+            return ''.join(f'''
+                DELETE FROM {table} WHERE call_id = {row}.id;''' for _, table, _ in triggers)
+        
+        # One execute per trigger: executescript would commit the migration
+        for trigger in (
+            f"""CREATE TRIGGER IF NOT EXISTS calls_tags_insert AFTER INSERT ON calls BEGIN
+                {insert_tags('new')}
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS calls_tags_delete AFTER DELETE ON calls BEGIN
+                {delete_tags('old')}
+            END""",
+            f"""CREATE TRIGGER IF NOT EXISTS calls_tags_update
+            AFTER UPDATE OF detected_threats, detected_pii ON calls BEGIN
+                {delete_tags('old')}
+                {insert_tags('new')}
+            END""",
+        ):
+            cursor.execute(trigger)
+        
+        if backfill:
+            # Migrate rows written before the junction tables existed
+            for column, table, tag in triggers:
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO {table} (call_id, {tag}, position)
+                    SELECT calls.id, tag.value, tag.key FROM calls, json_each(
+                        CASE WHEN json_valid(calls.{column}) THEN calls.{column} ELSE '[]' END
+                    ) AS tag WHERE tag.type = 'text'
+                ''')
     
-    def get_all_calls(self, limit=50):
-        """Get all calls from database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    # call_stats / threat_stats row holding the totals over every call
+    GLOBAL_STATS = 0
+    
+    def _init_statistics(self, cursor):
+        """
+        Aggregate counters per user and overall (scope GLOBAL_STATS), kept
+        up to date by every call insert so reading statistics is a lookup
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = 'call_stats'")
+        backfill = cursor.fetchone() is None
         
         cursor.execute('''
-            SELECT * FROM calls ORDER BY timestamp DESC LIMIT ?
-        ''', (limit,))
+            CREATE TABLE IF NOT EXISTS call_stats (
+                scope INTEGER PRIMARY KEY,
+                total_calls INTEGER NOT NULL DEFAULT 0,
+                scams_detected INTEGER NOT NULL DEFAULT 0,
+                confidence_sum REAL NOT NULL DEFAULT 0,
+                confidence_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS threat_stats (
+                scope INTEGER NOT NULL,
+                threat TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, threat)
+            ) WITHOUT ROWID
+        ''')
         
-        columns = [description[0] for description in cursor.description]
-        calls = []
-        for row in cursor.fetchall():
-            call = dict(zip(columns, row))
-            call['detected_threats'] = json.loads(call['detected_threats'])
-            call['detected_pii'] = json.loads(call['detected_pii'])
-            calls.append(call)
-        
-        conn.close()
-        return calls
+        if backfill:
+            self._rebuild_statistics(cursor)
     
-    def get_statistics(self):
-        """Get overall statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def rebuild_statistics(self):
+        """
+        Recompute every statistics counter and rollup from the calls table
         
-        cursor.execute('SELECT COUNT(*) FROM calls')
-        total_calls = cursor.fetchone()[0]
+        Repair job for counters that drifted, e.g. after rows were inserted
+        or deleted behind the database layer's back.
+        """
+        conn = self.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            self._rebuild_statistics(conn.cursor())
+            self._rebuild_rollups(conn.cursor())
+    
+    def _rebuild_statistics(self, cursor):
+        cursor.execute('DELETE FROM call_stats')
+        cursor.execute('DELETE FROM threat_stats')
         
-        cursor.execute('SELECT COUNT(*) FROM calls WHERE is_scam = 1')
-        scams_detected = cursor.fetchone()[0]
+        totals = '''
+            COUNT(*), COALESCE(SUM(is_scam = 1), 0),
+            COALESCE(SUM(confidence), 0), COUNT(confidence)
+        '''
+        cursor.execute(f'INSERT INTO call_stats SELECT ?, {totals} FROM calls', (self.GLOBAL_STATS,))
+        cursor.execute(f'''
+            INSERT INTO call_stats
+            SELECT user_id, {totals} FROM calls WHERE user_id IS NOT NULL GROUP BY user_id
+        ''')
         
-        cursor.execute('SELECT AVG(confidence) FROM calls')
-        avg_confidence = cursor.fetchone()[0] or 0
+        scam_threats = '''
+            FROM calls JOIN call_threats ON call_threats.call_id = calls.id
+            WHERE calls.is_scam = 1
+        '''
+        cursor.execute(f'''
+            INSERT INTO threat_stats
+            SELECT ?, call_threats.threat, COUNT(*) {scam_threats} GROUP BY call_threats.threat
+        ''', (self.GLOBAL_STATS,))
+        cursor.execute(f'''
+            INSERT INTO threat_stats
+            SELECT calls.user_id, call_threats.threat, COUNT(*) {scam_threats}
+            AND calls.user_id IS NOT NULL GROUP BY calls.user_id, call_threats.threat
+        ''')
         
         cursor.execute('''
-            SELECT detected_threats FROM calls 
-            WHERE is_scam = 1 ORDER BY timestamp DESC LIMIT 10
+            UPDATE users SET
+                total_calls_analyzed = COALESCE(
+                    (SELECT total_calls FROM call_stats WHERE scope = users.id), 0),
+                scams_blocked = COALESCE(
+                    (SELECT scams_detected FROM call_stats WHERE scope = users.id), 0)
         ''')
+    
+    @classmethod
+    def _count_calls(cls, cursor, rows):
+        """
+        Add freshly inserted calls rows (as built by _call_row) to the
+        counters; runs inside the inserting transaction
+        """
+        totals = {}
+        threats = {}
+        for call in (dict(zip(cls._CALL_ROW_COLUMNS, row)) for row in rows):
+            user_id, confidence = call['user_id'], call['confidence']
+            scam = 1 if call['is_scam'] else 0
+            for scope in (cls.GLOBAL_STATS, user_id) if user_id is not None else (cls.GLOBAL_STATS,):
+                counts = totals.setdefault(scope, [0, 0, 0.0, 0])
+                counts[0] += 1
+                counts[1] += scam
+                if confidence is not None:
+                    counts[2] += confidence
+                    counts[3] += 1
+                if scam:
+                    for threat in json.loads(call['detected_threats']):
+                        threats[(scope, threat)] = threats.get((scope, threat), 0) + 1
+        
+        cursor.executemany('''
+            INSERT INTO call_stats (scope, total_calls, scams_detected, confidence_sum, confidence_count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(scope) DO UPDATE SET
+                total_calls = total_calls + excluded.total_calls,
+                scams_detected = scams_detected + excluded.scams_detected,
+                confidence_sum = confidence_sum + excluded.confidence_sum,
+                confidence_count = confidence_count + excluded.confidence_count
+        ''', [(scope,) + tuple(counts) for scope, counts in totals.items()])
+        cursor.executemany('''
+            INSERT INTO threat_stats (scope, threat, count) VALUES (?, ?, ?)
+            ON CONFLICT(scope, threat) DO UPDATE SET count = count + excluded.count
+        ''', [(scope, threat, count) for (scope, threat), count in threats.items()])
+        cursor.executemany('''
+            UPDATE users SET
+                total_calls_analyzed = total_calls_analyzed + ?,
+                scams_blocked = scams_blocked + ?
+            WHERE id = ?
+        ''', [(counts[0], counts[1], scope) for scope, counts in totals.items()
+              if scope != cls.GLOBAL_STATS])
         
-        threat_counts = {}
-        for row in cursor.fetchall():
-            threats = json.loads(row[0])
-            for threat in threats:
-                threat_counts[threat] = threat_counts.get(threat, 0) + 1
+        cls._roll_up_calls(cursor, rows)
+    
+    def _read_statistics(self, scope, top_threats=10):
+        """Statistics for one counter scope: a primary-key lookup and a short index scan"""
+        cursor = self.connection().cursor()
+        cursor.execute('''
+            SELECT total_calls, scams_detected, confidence_sum, confidence_count
+            FROM call_stats WHERE scope = ?
+        ''', (scope,))
+        total_calls, scams_detected, confidence_sum, confidence_count = cursor.fetchone() or (0, 0, 0, 0)
         
-        conn.close()
+        cursor.execute('''
+            SELECT threat, count FROM threat_stats WHERE scope = ?
+            ORDER BY count DESC, threat LIMIT ?
+        ''', (scope, top_threats))
+        threat_counts = dict(cursor.fetchall())
         
+        avg_confidence = confidence_sum / confidence_count if confidence_count else 0
         return {
             'total_calls': total_calls,
             'scams_detected': scams_detected,
@@ -174,34 +471,421 @@ class VocalGuardDB:
             'top_threats': threat_counts
         }
     
-    def search_calls(self, query):
-        """Search calls by transcript, caller name, or number"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    # Rollup scope over every call; the others are 'user:<id>' and 'category:<name>'
+    ROLLUP_ALL = 'all'
+    # Bucket formats: hourly buckets sort after their day's compacted bucket
+    _HOUR_BUCKET = '%Y-%m-%d %H:00:00'
+    _DAY_BUCKET = '%Y-%m-%d'
+    
+    def _init_rollups(self, cursor):
+        """
+        Call counts per hour (compacted into days once old) for every call,
+        each user and each scam category, kept up to date by every insert
+        """
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS call_rollups (
+                scope TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                total_calls INTEGER NOT NULL DEFAULT 0,
+                scams_detected INTEGER NOT NULL DEFAULT 0,
+                risk_sum REAL NOT NULL DEFAULT 0,
+                risk_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, bucket)
+            ) WITHOUT ROWID
+        ''')
+        self._rebuild_rollups(cursor)
+    
+    @classmethod
+    def _rollup_scopes(cls, user_id, category):
+        scopes = [cls.ROLLUP_ALL]
+        if user_id is not None:
+            scopes.append(f'user:{user_id}')
+        if category:
+            scopes.append(f'category:{category}')
+        return scopes
+    
+    @classmethod
+    def _roll_up_calls(cls, cursor, rows):
+        """
+        Add freshly inserted calls rows (as built by _call_row) to the
+        current hour's rollups
+        """
+        buckets = {}
+        for call in (dict(zip(cls._CALL_ROW_COLUMNS, row)) for row in rows):
+            risk_score = call['risk_score']
+            for scope in cls._rollup_scopes(call['user_id'], call['scam_category']):
+                counts = buckets.setdefault(scope, [0, 0, 0.0, 0])
+                counts[0] += 1
+                counts[1] += 1 if call['is_scam'] else 0
+                if risk_score is not None:
+                    counts[2] += risk_score
+                    counts[3] += 1
+        
+        # Bucketed by the database clock, like calls.timestamp
+        cursor.executemany(f'''
+            INSERT INTO call_rollups (scope, bucket, total_calls, scams_detected, risk_sum, risk_count)
+            VALUES (?, strftime('{cls._HOUR_BUCKET}', 'now'), ?, ?, ?, ?)
+            ON CONFLICT(scope, bucket) DO UPDATE SET
+                total_calls = total_calls + excluded.total_calls,
+                scams_detected = scams_detected + excluded.scams_detected,
+                risk_sum = risk_sum + excluded.risk_sum,
+                risk_count = risk_count + excluded.risk_count
+        ''', [(scope,) + tuple(counts) for scope, counts in buckets.items()])
+    
+    def _rebuild_rollups(self, cursor):
+        """Recompute hourly rollups from calls; compact_rollups folds the old ones into days"""
+        cursor.execute('DELETE FROM call_rollups')
+        totals = '''
+            COUNT(*), COALESCE(SUM(is_scam = 1), 0), COALESCE(SUM(risk_score), 0), COUNT(risk_score)
+        '''
+        for scope, condition in (
+            ("?", '1'),
+            ("'user:' || user_id", 'user_id IS NOT NULL'),
+            ("'category:' || scam_category", "scam_category IS NOT NULL AND scam_category != ''"),
+        ):
+            cursor.execute(f'''
+                INSERT INTO call_rollups (scope, bucket, total_calls, scams_detected, risk_sum, risk_count)
+                SELECT {scope}, strftime('{self._HOUR_BUCKET}', timestamp) AS hour, {totals}
+                FROM calls WHERE {condition} AND timestamp IS NOT NULL
+                GROUP BY 1, hour
+            ''', (self.ROLLUP_ALL,) if scope == "?" else ())
+    
+    def compact_rollups(self, retain_hours=48):
+        """
+        Fold hourly rollups of whole days older than retain_hours into one
+        row per day, so old ranges stay cheap to read and the table small
+        
+        Returns:
+            Number of hourly rows compacted
+        """
+        conn = self.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            cutoff = conn.execute(
+                f"SELECT strftime('{self._DAY_BUCKET}', 'now', ?)", (f'-{int(retain_hours)} hours',)
+            ).fetchone()[0]
+            conn.execute('''
+                INSERT INTO call_rollups (scope, bucket, total_calls, scams_detected, risk_sum, risk_count)
+                SELECT scope, substr(bucket, 1, 10), SUM(total_calls), SUM(scams_detected),
+                       SUM(risk_sum), SUM(risk_count)
+                FROM call_rollups WHERE length(bucket) > 10 AND substr(bucket, 1, 10) < ?
+                GROUP BY scope, substr(bucket, 1, 10)
+                ON CONFLICT(scope, bucket) DO UPDATE SET
+                    total_calls = total_calls + excluded.total_calls,
+                    scams_detected = scams_detected + excluded.scams_detected,
+                    risk_sum = risk_sum + excluded.risk_sum,
+                    risk_count = risk_count + excluded.risk_count
+            ''', (cutoff,))
+            compacted = conn.execute(
+                'DELETE FROM call_rollups WHERE length(bucket) > 10 AND substr(bucket, 1, 10) < ?', (cutoff,)
+            ).rowcount
+        return compacted
+    
+    def get_timeseries(self, start, end, interval='day', user_id=None, category=None):
+        """
+        Call counts per hour or day from the rollups alone
+        
+        Args:
+            start: Range start ('YYYY-MM-DD HH:MM:SS'); the bucket holding
+                it is included
+            end: Range end, exclusive
+            interval: 'hour' or 'day'; days already compacted come back as
+                one point even in hourly series
+            user_id: This user's calls only
+            category: This scam category's calls only (ignored with user_id)
+            
+        Returns:
+            List of points, oldest first, each with 'period', 'total_calls',
+            'scams_detected' and 'average_risk_score'
+        """
+        if user_id is not None:
+            scope = f'user:{user_id}'
+        elif category:
+            scope = f'category:{category}'
+        else:
+            scope = self.ROLLUP_ALL
+        
+        # Hourly buckets from the one holding start; compacted days (bare
+        # 'YYYY-MM-DD' buckets) when the day overlaps the range at all
+        hour_start = start[:10] if interval == 'day' else start[:13] + ':00:00'
+        period = 'substr(bucket, 1, 10)' if interval == 'day' else 'bucket'
+        cursor = self.connection().cursor()
+        cursor.execute(f'''
+            SELECT {period} AS period, SUM(total_calls), SUM(scams_detected), SUM(risk_sum), SUM(risk_count)
+            FROM call_rollups
+            WHERE scope = :scope AND bucket >= :day_start AND bucket < :end
+              AND (length(bucket) > 10 AND bucket >= :hour_start
+                   OR length(bucket) = 10 AND bucket || ' 00:00:00' < :end)
+            GROUP BY period
+            ORDER BY period
+        ''', {'scope': scope, 'day_start': start[:10], 'hour_start': hour_start, 'end': end})
+        return [
+            {
+                'period': period,
+                'total_calls': total_calls,
+                'scams_detected': scams_detected,
+                'average_risk_score': round(risk_sum / risk_count, 2) if risk_count else 0
+            }
+            for period, total_calls, scams_detected, risk_sum, risk_count in cursor.fetchall()
+        ]
+    
+    def _init_search(self, cursor):
+        """
+        Full-text index over calls (FTS5, external content) and a digits
+        prefix index over caller numbers, both kept in sync by triggers
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE name = 'calls_fts'")
+        backfill = cursor.fetchone() is None
         
-        search_pattern = f'%{query}%'
         cursor.execute('''
-            SELECT * FROM calls 
-            WHERE transcript LIKE ? OR caller_name LIKE ? OR caller_number LIKE ?
-            ORDER BY timestamp DESC
-        ''', (search_pattern, search_pattern, search_pattern))
+            CREATE VIRTUAL TABLE IF NOT EXISTS calls_fts USING fts5(
+                transcript, caller_name,
+                content='calls', content_rowid='id', tokenize='unicode61'
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS call_numbers (
+                digits TEXT NOT NULL,
+                call_id INTEGER NOT NULL,
+                PRIMARY KEY (digits, call_id)
+            ) WITHOUT ROWID
+        ''')
+        
+        new_digits = self._NUMBER_DIGITS_SQL.format(col='new.caller_number')
+        old_digits = self._NUMBER_DIGITS_SQL.format(col='old.caller_number')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS calls_search_insert AFTER INSERT ON calls BEGIN
+                INSERT INTO calls_fts (rowid, transcript, caller_name)
+                VALUES (new.id, new.transcript, new.caller_name);
+                INSERT OR IGNORE INTO call_numbers (digits, call_id) VALUES ({new_digits}, new.id);
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS calls_search_delete AFTER DELETE ON calls BEGIN
+                INSERT INTO calls_fts (calls_fts, rowid, transcript, caller_name)
+                VALUES ('delete', old.id, old.transcript, old.caller_name);
+                DELETE FROM call_numbers WHERE digits = {old_digits} AND call_id = old.id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS calls_search_update
+            AFTER UPDATE OF transcript, caller_name, caller_number ON calls BEGIN
+                INSERT INTO calls_fts (calls_fts, rowid, transcript, caller_name)
+                VALUES ('delete', old.id, old.transcript, old.caller_name);
+                INSERT INTO calls_fts (rowid, transcript, caller_name)
+                VALUES (new.id, new.transcript, new.caller_name);
+                DELETE FROM call_numbers WHERE digits = {old_digits} AND call_id = old.id;
+                INSERT OR IGNORE INTO call_numbers (digits, call_id) VALUES ({new_digits}, new.id);
+            END
+        ''')
         
+        if backfill:
+            # Index calls stored before search existed
+            cursor.execute("INSERT INTO calls_fts (calls_fts) VALUES ('rebuild')")
+            cursor.execute(
+                f"INSERT OR IGNORE INTO call_numbers (digits, call_id) "
+                f"SELECT {self._NUMBER_DIGITS_SQL.format(col='caller_number')}, id FROM calls"
+            )
+    
+    def save_call(self, call_data):
+        """Save analyzed call to database"""
+        return self.update_save_call(call_data)
+    
+    def get_all_calls(self, limit=50):
+        """Get all calls from database"""
+        conn = self.connection()
+        cursor = conn.cursor()
+        
+        cursor.execute(f'''
+            SELECT {self._CALL_COLUMNS} FROM calls ORDER BY timestamp DESC LIMIT ?
+        ''', (limit,))
+        
+        return self._call_rows(cursor)
+    
+    def get_call_by_id(self, call_id):
+        """Get one call by id, or None"""
+        cursor = self.connection().cursor()
+        cursor.execute(f'SELECT {self._CALL_COLUMNS} FROM calls WHERE id = ?', (call_id,))
+        calls = self._call_rows(cursor)
+        return calls[0] if calls else None
+    
+    def get_report(self, call_id, report_type):
+        """Stored report_data (JSON text) for a call, or None"""
+        cursor = self.connection().cursor()
+        cursor.execute(
+            'SELECT report_data FROM reports WHERE call_id = ? AND report_type = ?',
+            (call_id, report_type)
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def save_report(self, call_id, report_type, report_data, user_id=None):
+        """Store a rendered report (JSON text), replacing any previous one of that type"""
+        conn = self.connection()
+        with conn:
+            conn.execute('''
+                INSERT INTO reports (user_id, call_id, report_type, report_data)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(call_id, report_type) DO UPDATE SET
+                    user_id = excluded.user_id,
+                    report_data = excluded.report_data,
+                    created_at = CURRENT_TIMESTAMP
+            ''', (user_id, call_id, report_type, report_data))
+    
+    def get_statistics(self):
+        """Get overall statistics"""
+        return self._read_statistics(self.GLOBAL_STATS)
+    
+    def search_calls(self, query, limit=20, offset=0):
+        """
+        Search calls by transcript and caller name (ranked full-text match)
+        or by caller number prefix when the query looks like a phone number
+        
+        Returns:
+            One page of calls, best match first, each with a highlighted
+            'snippet' of the transcript
+        """
+        digits = re.sub(r'[\s+().-]', '', query)
+        if digits.isdigit() and len(digits) >= 3:
+            return self._search_numbers(phone_numbers.normalize_prefix(query), digits, limit, offset)
+        
+        match = self._fts_query(query)
+        if not match:
+            return []
+        
+        conn = self.connection()
+        cursor = conn.cursor()
+        
+        # bm25 weights: transcript 1.0, caller name 2.0
+        cursor.execute(f'''
+            SELECT {self._CALL_COLUMNS},
+                   snippet(calls_fts, 0, '<mark>', '</mark>', '...', 12) AS snippet,
+                   bm25(calls_fts, 1.0, 2.0) AS rank
+            FROM calls_fts
+            JOIN calls ON calls.id = calls_fts.rowid
+            WHERE calls_fts MATCH ?
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        ''', (match, limit, offset))
+        
+        return self._call_rows(cursor)
+    
+    def _search_numbers(self, e164_digits, digits, limit, offset):
+        """
+        Newest calls (by time, then commit order: CallWriter hands out ids in
+        per-process blocks, so ids are not time order) whose caller number
+        starts with e164_digits (the query
+        read as E.164) or with digits as typed, which still finds numbers
+        stored before caller numbers were normalized
+        """
+        conn = self.connection()
+        cursor = conn.cursor()
+        
+        # Range scans on the digits index: every string with a prefix sorts
+        # between the prefix and the prefix with its last digit bumped
+        ranges = []
+        for prefix in dict.fromkeys(p for p in (e164_digits, digits) if p):
+            ranges += [prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        matches = ' OR '.join(['(call_numbers.digits >= ? AND call_numbers.digits < ?)'] * (len(ranges) // 2))
+        cursor.execute(f'''
+            SELECT {self._CALL_COLUMNS}, NULL AS snippet, NULL AS rank
+            FROM call_numbers
+            JOIN calls ON calls.id = call_numbers.call_id
+            WHERE {matches}
+            ORDER BY calls.timestamp DESC, calls.seq DESC
+            LIMIT ? OFFSET ?
+        ''', ranges + [limit, offset])
+        
+        return self._call_rows(cursor)
+    
+    @staticmethod
+    def _fts_query(query):
+        """
+        FTS5 MATCH expression for free text: every word quoted (so user input
+        can never be FTS syntax), all required, the last one as a prefix
+        """
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return None
+        quoted = ['"' + term + '"' for term in terms]
+        return ' '.join(quoted) + '*'
+    
+    def _call_rows(self, cursor):
+        """Call dicts for the rows of cursor, with their threat and PII tags"""
         columns = [description[0] for description in cursor.description]
-        calls = []
-        for row in cursor.fetchall():
-            call = dict(zip(columns, row))
-            call['detected_threats'] = json.loads(call['detected_threats'])
-            call['detected_pii'] = json.loads(call['detected_pii'])
-            calls.append(call)
-        
-        conn.close()
+        calls = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if not calls:
+            return calls
+        
+        by_id = {}
+        for call in calls:
+            call['detected_threats'] = []
+            call['detected_pii'] = []
+            by_id[call['id']] = call
+        
+        # One indexed lookup for the tags of the whole page
+        placeholders = ', '.join('?' * len(by_id))
+        cursor.execute(f'''
+            SELECT call_id, 'detected_threats', threat, position FROM call_threats
+            WHERE call_id IN ({placeholders})
+            UNION ALL
+            SELECT call_id, 'detected_pii', pii_type, position FROM call_pii
+            WHERE call_id IN ({placeholders})
+            ORDER BY 1, 2, 4
+        ''', list(by_id) * 2)
+        for call_id, column, tag, _ in cursor.fetchall():
+            by_id[call_id][column].append(tag)
         return calls
     
+    def get_tag_counts(self, start=None, end=None, user_id=None, limit=10):
+        """
+        Most frequent threats on scam calls and PII types on all calls
+        
+        Args:
+            start: Only calls at or after this timestamp
+            end: Only calls before this timestamp
+            user_id: Only this user's calls, or every call when None
+            limit: Entries per list
+            
+        Returns:
+            Dictionary with 'threats' and 'pii' maps of tag -> call count,
+            most frequent first
+        """
+        conditions = []
+        params = []
+        if user_id is not None:
+            conditions.append('calls.user_id = ?')
+            params.append(user_id)
+        if start is not None:
+            conditions.append('calls.timestamp >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('calls.timestamp < ?')
+            params.append(end)
+        
+        cursor = self.connection().cursor()
+        counts = {}
+        for key, table, tag, scams_only in (('threats', 'call_threats', 'threat', True),
+                                            ('pii', 'call_pii', 'pii_type', False)):
+            where = conditions + (['calls.is_scam = 1'] if scams_only else [])
+            # With a user or time range, drive the join from the calls index
+            join = 'CROSS JOIN' if conditions else 'JOIN'
+            cursor.execute(f'''
+                SELECT {table}.{tag}, COUNT(*) AS calls
+                FROM calls {join} {table} ON {table}.call_id = calls.id
+                WHERE {' AND '.join(where) or '1'}
+                GROUP BY {table}.{tag}
+                ORDER BY calls DESC, {table}.{tag}
+                LIMIT ?
+            ''', params + [limit])
+            counts[key] = dict(cursor.fetchall())
+        return counts
+    
     # === User Authentication Methods ===
     
     def create_user(self, email, password_hash=None, username=None, google_id=None, auth_provider='email'):
         """Create a new user (supports both email and Google auth)"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connection()
         cursor = conn.cursor()
         
         try:
@@ -212,15 +896,14 @@ class VocalGuardDB:
             
             conn.commit()
             user_id = cursor.lastrowid
-            conn.close()
             return user_id
         except sqlite3.IntegrityError:
-            conn.close()
+            conn.rollback()
             return None  # User already exists
     
     def get_user_by_email(self, email):
         """Get user by email"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connection()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
@@ -232,12 +915,11 @@ class VocalGuardDB:
         else:
             user = None
         
-        conn.close()
         return user
     
     def get_user_by_google_id(self, google_id):
         """Get user by Google ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connection()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM users WHERE google_id = ?', (google_id,))
@@ -249,12 +931,11 @@ class VocalGuardDB:
         else:
             user = None
         
-        conn.close()
         return user
     
     def get_user_by_id(self, user_id):
         """Get user by ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connection()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
@@ -266,89 +947,103 @@ class VocalGuardDB:
         else:
             user = None
         
-        conn.close()
         return user
     
     def get_user_calls(self, user_id, limit=50):
         """Get calls for a specific user"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT * FROM calls 
+        cursor.execute(f'''
+            SELECT {self._CALL_COLUMNS} FROM calls 
             WHERE user_id = ?
             ORDER BY timestamp DESC 
             LIMIT ?
         ''', (user_id, limit))
         
-        columns = [description[0] for description in cursor.description]
-        calls = []
-        for row in cursor.fetchall():
-            call = dict(zip(columns, row))
-            call['detected_threats'] = json.loads(call['detected_threats'])
-            call['detected_pii'] = json.loads(call['detected_pii'])
-            calls.append(call)
-        
-        conn.close()
-        return calls
+        return self._call_rows(cursor)
     
-    def get_user_statistics(self, user_id):
-        """Get statistics for a specific user"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM calls WHERE user_id = ?', (user_id,))
-        total_calls = cursor.fetchone()[0]
+    def get_call_page(self, user_id=None, limit=50, before=None, since=None):
+        """
+        One page of call history, newest first, using keyset pagination
         
-        cursor.execute('SELECT COUNT(*) FROM calls WHERE user_id = ? AND is_scam = 1', (user_id,))
-        scams_detected = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT AVG(confidence) FROM calls WHERE user_id = ?', (user_id,))
-        avg_confidence = cursor.fetchone()[0] or 0
+        Args:
+            user_id: Only this user's calls, or every call when None
+            limit: Page size
+            before: (timestamp, id) cursor; only calls older than it
+            since: commit sequence number (a call's seq); only calls
+                committed after it, earliest of them first when more than
+                limit are pending. Unlike ids and timestamps, seq follows
+                commit order, so a late commit is never behind the cursor.
+            
+        Returns:
+            Tuple of (calls, whether more rows are pending in the requested
+            direction); newest first, or latest committed first for since
+        """
+        conn = self.connection()
+        cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT detected_threats FROM calls 
-            WHERE user_id = ? AND is_scam = 1 
-            ORDER BY timestamp DESC LIMIT 10
-        ''', (user_id,))
-        
-        threat_counts = {}
-        for row in cursor.fetchall():
-            threats = json.loads(row[0])
-            for threat in threats:
-                threat_counts[threat] = threat_counts.get(threat, 0) + 1
-        
-        # Update user stats
-        cursor.execute('''
-            UPDATE users 
-            SET total_calls_analyzed = ?, scams_blocked = ?
-            WHERE id = ?
-        ''', (total_calls, scams_detected, user_id))
+        conditions = ['user_id = ?' if user_id is not None else '1']
+        params = [user_id] if user_id is not None else []
+        if since is not None:
+            # Delta polls walk forward from the cursor so no new row is skipped
+            conditions.append('seq > ?')
+            params.append(since)
+            ordering = 'seq ASC'
+        else:
+            if before is not None:
+                conditions.append('(timestamp, id) < (?, ?)')
+                params.extend(before)
+            ordering = 'timestamp DESC, id DESC'
         
-        conn.commit()
-        conn.close()
+        cursor.execute(f'''
+            SELECT {self._CALL_COLUMNS} FROM calls
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {ordering}
+            LIMIT ?
+        ''', params + [limit + 1])
         
-        return {
-            'total_calls': total_calls,
-            'scams_detected': scams_detected,
-            'safe_calls': total_calls - scams_detected,
-            'detection_rate': round((scams_detected / total_calls * 100) if total_calls > 0 else 0, 2),
-            'average_confidence': round(avg_confidence, 2),
-            'top_threats': threat_counts
-        }
+        calls = self._call_rows(cursor)
+        has_more = len(calls) > limit
+        calls = calls[:limit]
+        if since is not None:
+            calls.reverse()
+        return calls, has_more
     
-    def update_save_call(self, call_data, user_id=None):
-        """Save analyzed call to database with user association"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO calls 
-            (user_id, caller_name, caller_number, transcript, is_scam, confidence, 
-             threat_level, detected_threats, redacted_transcript, detected_pii, 
-             warning_message, duration, language)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    def get_latest_call_seq(self, user_id=None):
+        """Commit sequence number of the last committed call (0 when there is none)"""
+        cursor = self.connection().cursor()
+        if user_id is None:
+            cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM calls')
+        else:
+            cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM calls WHERE user_id = ?', (user_id,))
+        return cursor.fetchone()[0]
+    
+    def get_user_statistics(self, user_id):
+        """Get statistics for a specific user"""
+        return self._read_statistics(user_id)
+    
+    # The columns of a calls row as built by _call_row, in order
+    _CALL_ROW_COLUMNS = (
+        'user_id', 'caller_name', 'caller_number', 'transcript', 'is_scam', 'confidence',
+        'threat_level', 'detected_threats', 'redacted_transcript', 'detected_pii',
+        'warning_message', 'duration', 'language', 'scam_category', 'risk_score'
+    )
+    
+    _INSERT_CALL_SQL = f'''
+        INSERT INTO calls ({', '.join(_CALL_ROW_COLUMNS)}, seq)
+        VALUES ({', '.join('?' * len(_CALL_ROW_COLUMNS))}, {_NEXT_CALL_SEQ})
+    '''
+    
+    _INSERT_CALL_WITH_ID_SQL = f'''
+        INSERT INTO calls (id, {', '.join(_CALL_ROW_COLUMNS)}, seq)
+        VALUES (?, {', '.join('?' * len(_CALL_ROW_COLUMNS))}, {_NEXT_CALL_SEQ})
+    '''
+    
+    @staticmethod
+    def _call_row(call_data, user_id=None):
+        """Column values for one calls row, in _CALL_ROW_COLUMNS order"""
+        return (
             user_id,
             call_data.get('caller_name'),
             call_data.get('caller_number'),
@@ -361,11 +1056,180 @@ class VocalGuardDB:
             json.dumps(call_data.get('detected_pii', [])),
             call_data.get('warning_message'),
             call_data.get('duration', 0),
-            call_data.get('language', 'en')
-        ))
+            call_data.get('language', 'en'),
+            call_data.get('scam_category'),
+            call_data.get('risk_score')
+        )
+    
+    def update_save_call(self, call_data, user_id=None):
+        """Save analyzed call to database with user association"""
+        conn = self.connection()
+        cursor = conn.cursor()
         
-        conn.commit()
-        call_id = cursor.lastrowid
-        conn.close()
+        row = self._call_row(call_data, user_id)
+        with conn:
+            cursor.execute(self._INSERT_CALL_SQL, row)
+            call_id = cursor.lastrowid
+            self._count_calls(cursor, [row])
         return call_id
-
+    
+    def save_calls(self, calls, user_id=None):
+        """Save many analyzed calls in one transaction, returning their ids"""
+        if not calls:
+            return []
+        
+        conn = self.connection()
+        cursor = conn.cursor()
+        
+        # The connection is reused, so a failed batch must not leave its
+        # transaction open; the with block commits or rolls back
+        with conn:
+            rows = [self._call_row(c, user_id) for c in calls]
+            cursor.executemany(self._INSERT_CALL_SQL, rows)
+            
+            # The transaction holds the write lock from the first insert on,
+            # so the executemany rows get consecutive ids ending at the last
+            # inserted rowid
+            cursor.execute('SELECT last_insert_rowid()')
+            last_id = cursor.fetchone()[0]
+            self._count_calls(cursor, rows)
+        return list(range(last_id - len(calls) + 1, last_id + 1))
+    
+    def reserve_call_ids(self, count):
+        """
+        Reserve count consecutive call ids and return the first one
+        
+        The AUTOINCREMENT counter is advanced inside an immediate
+        transaction, so reserved ids never collide with rows inserted by
+        other threads or processes, with or without explicit ids.
+        """
+        conn = self.connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'calls'").fetchone()
+            last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM calls').fetchone()[0]
+            if row is None:
+                conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('calls', ?)", (last_id + count,))
+            else:
+                last_id = max(last_id, row[0])
+                conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'calls'", (last_id + count,))
+        return last_id + 1
+    
+    def save_calls_with_ids(self, entries):
+        """Insert (call_id, call_data, user_id) entries in one transaction"""
+        if not entries:
+            return
+        rows = [self._call_row(call_data, user_id) for _, call_data, user_id in entries]
+        conn = self.connection()
+        with conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                self._INSERT_CALL_WITH_ID_SQL,
+                [(call_id,) + row for (call_id, _, _), row in zip(entries, rows)]
+            )
+            self._count_calls(cursor, rows)
+    
+    # === Caller Reputation Methods ===
+    
+    _NEXT_REPUTATION_SEQ = '(SELECT COALESCE(MAX(seq), 0) + 1 FROM caller_reputation)'
+    
+    def get_caller_reputation(self, since_seq=0):
+        """Caller reputation rows changed after since_seq, in change order"""
+        cursor = self.connection().cursor()
+        cursor.execute('''
+            SELECT number, scam_reports, total_calls, scam_calls, risk_sum, last_category,
+                   blocked, block_reason, seq
+            FROM caller_reputation WHERE seq > ? ORDER BY seq
+        ''', (since_seq,))
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def apply_caller_activity(self, entries):
+        """Add (number, calls, scam_calls, risk_sum, last_category) deltas in one transaction"""
+        if not entries:
+            return
+        conn = self.connection()
+        with conn:
+            conn.executemany(f'''
+                INSERT INTO caller_reputation (number, total_calls, scam_calls, risk_sum, last_category, seq)
+                VALUES (?, ?, ?, ?, ?, {self._NEXT_REPUTATION_SEQ})
+                ON CONFLICT(number) DO UPDATE SET
+                    total_calls = total_calls + excluded.total_calls,
+                    scam_calls = scam_calls + excluded.scam_calls,
+                    risk_sum = risk_sum + excluded.risk_sum,
+                    last_category = COALESCE(excluded.last_category, last_category),
+                    seq = excluded.seq
+            ''', entries)
+    
+    def save_caller_report(self, number, description, risk_score, scam_category):
+        """Store a community scam report and count it against the number; returns the report id"""
+        conn = self.connection()
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO caller_reports (number, description, risk_score, scam_category)
+                VALUES (?, ?, ?, ?)
+            ''', (number, description, risk_score, scam_category))
+            report_id = cursor.lastrowid
+            cursor.execute(f'''
+                INSERT INTO caller_reputation (number, scam_reports, last_category, seq)
+                VALUES (?, 1, ?, {self._NEXT_REPUTATION_SEQ})
+                ON CONFLICT(number) DO UPDATE SET
+                    scam_reports = scam_reports + 1,
+                    last_category = COALESCE(excluded.last_category, last_category),
+                    seq = excluded.seq
+            ''', (number, scam_category))
+        return report_id
+    
+    def block_caller(self, number, reason):
+        """Block a number; returns False when it was already blocked"""
+        conn = self.connection()
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                INSERT INTO caller_reputation (number, blocked, block_reason, blocked_at, seq)
+                VALUES (?, 1, ?, CURRENT_TIMESTAMP, {self._NEXT_REPUTATION_SEQ})
+                ON CONFLICT(number) DO UPDATE SET
+                    blocked = 1,
+                    block_reason = excluded.block_reason,
+                    blocked_at = excluded.blocked_at,
+                    seq = excluded.seq
+                WHERE blocked = 0
+            ''', (number, reason))
+            return cursor.rowcount > 0
+    
+    def get_caller_ranges(self, since_seq=0):
+        """Number ranges changed after since_seq, in change order"""
+        cursor = self.connection().cursor()
+        cursor.execute('''
+            SELECT prefix, blocked, risk_modifier, reason, seq
+            FROM caller_ranges WHERE seq > ? ORDER BY seq
+        ''', (since_seq,))
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def save_caller_range(self, prefix, blocked, risk_modifier, reason):
+        """Block or score every number starting with an E.164 prefix; neither lifts it"""
+        conn = self.connection()
+        with conn:
+            conn.execute('''
+                INSERT INTO caller_ranges (prefix, blocked, risk_modifier, reason, seq)
+                VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM caller_ranges))
+                ON CONFLICT(prefix) DO UPDATE SET
+                    blocked = excluded.blocked,
+                    risk_modifier = excluded.risk_modifier,
+                    reason = excluded.reason,
+                    updated_at = CURRENT_TIMESTAMP,
+                    seq = excluded.seq
+            ''', (prefix, int(bool(blocked)), risk_modifier, reason))
+    
+    def get_blocklist(self, limit=100):
+        """Blocked numbers, most recently blocked first"""
+        cursor = self.connection().cursor()
+        cursor.execute('''
+            SELECT number, block_reason AS reason, blocked_at, scam_reports
+            FROM caller_reputation WHERE blocked = 1
+            ORDER BY blocked_at DESC, seq DESC LIMIT ?
+        ''', (limit,))
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
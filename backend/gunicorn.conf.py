@@ -0,0 +1,32 @@
+"""
+VocalGuard Gunicorn Settings
+Multi-worker serving: the write server starts before the workers fork, and
+every worker sends its database writes to it
+
+Usage: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+import secrets
+
+from write_server import WriteServer
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+write_server = None
+
+
+def on_starting(server):
+    global write_server
+    authkey = os.getenv('VOCALGUARD_WRITE_SERVER_KEY') or secrets.token_hex(16)
+    write_server = WriteServer(os.getenv('VOCALGUARD_DB', 'vocalguard.db'), authkey=authkey.encode()).start()
+    # Inherited by the workers
+    os.environ['VOCALGUARD_WRITE_SERVER'] = write_server.address
+    os.environ['VOCALGUARD_WRITE_SERVER_KEY'] = authkey
+
+
+def on_exit(server):
+    if write_server is not None:
+        write_server.stop()
@@ -0,0 +1,151 @@
+"""
+VocalGuard Keyword Engine
+Aho-Corasick multi-pattern matcher used by the detectors to find every
+keyword of every signature group in a single pass over the transcript
+"""
+
+from collections import deque
+from typing import Dict, List, Set, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton compiled from named keyword groups.
+
+    By default matching is plain substring matching, so results are identical
+    to running `keyword in text` for every keyword, but the text is walked only
+    once no matter how many keywords are loaded. With whole_words=True a hit
+    only counts when it is not glued to letters or digits on either side
+    ('ein' no longer fires inside 'being'). A keyword may belong to several
+    groups (and appear several times in one group); counts honour that.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]], whole_words: bool = False):
+        self.groups = {name: list(keywords) for name, keywords in groups.items()}
+        self.whole_words = whole_words
+        self.patterns: List[str] = []
+        self._pattern_ids: Dict[str, int] = {}
+        # pattern id -> group names it counts towards (with multiplicity)
+        self._pattern_groups: List[List[str]] = []
+
+        for name, keywords in self.groups.items():
+            for keyword in keywords:
+                pattern_id = self._pattern_ids.get(keyword)
+                if pattern_id is None:
+                    pattern_id = len(self.patterns)
+                    self._pattern_ids[keyword] = pattern_id
+                    self.patterns.append(keyword)
+                    self._pattern_groups.append([])
+                self._pattern_groups[pattern_id].append(name)
+
+        self._delta, self._output = self._compile(self.patterns)
+        # Only edges that are word characters need a boundary check
+        self._boundaries = [
+            (len(p), bool(p) and _is_word_char(p[0]), bool(p) and _is_word_char(p[-1]))
+            for p in self.patterns
+        ]
+
+    @staticmethod
+    def _compile(patterns: List[str]) -> Tuple[List[Dict[str, int]], List[Tuple[int, ...]]]:
+        """Build the trie, failure links and the full transition table"""
+        goto: List[Dict[str, int]] = [{}]
+        output: List[Tuple[int, ...]] = [()]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    output.append(())
+                    nxt = len(goto) - 1
+                    goto[state][ch] = nxt
+                state = nxt
+            output[state] = output[state] + (pattern_id,)
+
+        # Breadth-first walk: failure links, merged outputs and a complete
+        # transition table so scanning never has to follow failure links
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            row = dict(delta[fail[state]])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                output[nxt] = output[nxt] + output[fail[nxt]]
+                queue.append(nxt)
+            row.update(goto[state])
+            delta[state] = row
+
+        return delta, output
+
+    def scan(self, text: str, state: int = 0) -> Tuple[Set[int], int]:
+        """
+        Walk text once and collect the ids of every pattern that occurs
+
+        Args:
+            text: Text to scan (callers lowercase it beforehand)
+            state: Automaton state to resume from, for streaming input.
+                Word boundaries are only checked inside text, so whole-word
+                automatons should be resumed on whitespace-aligned chunks.
+
+        Returns:
+            Tuple of (matched pattern ids, final automaton state)
+        """
+        delta = self._delta
+        output = self._output
+        found: Set[int] = set()
+
+        if not self.whole_words:
+            for ch in text:
+                state = delta[state].get(ch, 0)
+                if output[state]:
+                    found.update(output[state])
+            return found, state
+
+        boundaries = self._boundaries
+        last = len(text) - 1
+        for end, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if not output[state]:
+                continue
+            for pattern_id in output[state]:
+                if pattern_id in found:
+                    continue
+                length, check_left, check_right = boundaries[pattern_id]
+                start = end - length + 1
+                if check_left and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if check_right and end < last and _is_word_char(text[end + 1]):
+                    continue
+                found.add(pattern_id)
+        return found, state
+
+    def count_groups(self, found: Set[int]) -> Dict[str, int]:
+        """Number of keywords matched per group for a set of pattern ids"""
+        counts = dict.fromkeys(self.groups, 0)
+        for pattern_id in found:
+            for name in self._pattern_groups[pattern_id]:
+                counts[name] += 1
+        return counts
+
+    def group_masks(self, names: List[str]) -> List[int]:
+        """Bitmask of the groups each pattern id belongs to (bit i is names[i])"""
+        bits = {name: 1 << position for position, name in enumerate(names)}
+        masks = []
+        for groups in self._pattern_groups:
+            mask = 0
+            for name in groups:
+                mask |= bits[name]
+            masks.append(mask)
+        return masks
+
+    def match_counts(self, text: str) -> Dict[str, int]:
+        """Scan text and return the per-group keyword counts"""
+        found, _ = self.scan(text)
+        return self.count_groups(found)
@@ -0,0 +1,68 @@
+"""
+VocalGuard Schema Migrations
+Ordered, versioned schema changes recorded in a schema_version table,
+safe to run against a live database file
+
+Usage: python migrations.py [path/to/vocalguard.db]
+"""
+
+import sys
+
+
+def current_version(conn):
+    """Highest applied migration version, 0 for a fresh or unversioned database"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def run_migrations(conn, migrations):
+    """
+    Apply every migration newer than the database's schema version
+
+    Args:
+        conn: sqlite3 connection
+        migrations: (version, description, apply) tuples in version order;
+            apply(cursor) makes the change and must not commit
+
+    Each step runs in its own BEGIN IMMEDIATE transaction together with its
+    schema_version row, so a failed step leaves the previous version intact,
+    WAL readers carry on throughout, and other processes starting at the
+    same time wait for the write lock and then skip what is already applied.
+
+    Returns:
+        List of versions applied by this call
+    """
+    applied = []
+    if current_version(conn) >= migrations[-1][0]:
+        return applied
+
+    for version, description, apply in migrations:
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Re-read under the write lock; another process may have got here first
+            if conn.execute('SELECT 1 FROM schema_version WHERE version = ?', (version,)).fetchone():
+                continue
+            apply(conn.cursor())
+            conn.execute(
+                'INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                (version, description)
+            )
+        print(f"Applied schema migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from database import VocalGuardDB
+
+    db = VocalGuardDB(*sys.argv[1:2])
+    try:
+        print(f"Schema version: {current_version(db.connection())}")
+    finally:
+        db.close()
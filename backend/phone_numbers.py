@@ -0,0 +1,154 @@
+"""
+VocalGuard Phone Numbers
+E.164 normalization of caller numbers and a digit trie for matching
+numbers against blocked or scored ranges
+"""
+
+import re
+from functools import lru_cache
+
+DEFAULT_COUNTRY_CODE = '1'
+
+_E164 = re.compile(r'\+[1-9]\d{6,14}')
+_FORMATTING = re.compile(r'[\s\-(). /]')
+_DIGITS = re.compile(r'\+?\d+')
+
+
+def normalize(number, default_country_code=DEFAULT_COUNTRY_CODE):
+    """
+    Canonical E.164 form of a phone number ('+12025550123')
+
+    Accepts the usual ways numbers are written: spaces, dashes, dots and
+    parentheses, 00 / 011 international prefixes, and national numbers
+    without a country code (read as default_country_code). Returns None
+    for anything that is not a phone number ('Unknown', 'Private', '').
+    """
+    if not number:
+        return None
+    # Callers repeat: the memoized result is a single dict lookup
+    return _normalize(str(number), default_country_code)
+
+
+@lru_cache(maxsize=65536)
+def _normalize(number, default_country_code):
+    if _E164.fullmatch(number):
+        return number
+    number = _FORMATTING.sub('', number)
+    if not _DIGITS.fullmatch(number):
+        return None
+    if number.startswith('+'):
+        digits = number[1:]
+    elif number.startswith('011'):
+        digits = number[3:]
+    elif number.startswith('00'):
+        digits = number[2:]
+    elif default_country_code == '1' and len(number) == 11 and number.startswith('1'):
+        digits = number
+    elif default_country_code == '1' and len(number) == 10:
+        digits = '1' + number
+    elif default_country_code != '1' and number.startswith('0'):
+        digits = default_country_code + number[1:]  # trunk prefix
+    else:
+        digits = default_country_code + number
+    candidate = '+' + digits
+    return candidate if _E164.fullmatch(candidate) else None
+
+
+def normalize_prefix(prefix, default_country_code=DEFAULT_COUNTRY_CODE):
+    """
+    Leading digits of E.164 numbers ('1202555') for a partly typed number
+    ('(202) 555', '+1 202', '0044 20'), read the way normalize() reads a
+    whole one; None when it is not digits
+    """
+    prefix = _FORMATTING.sub('', str(prefix or ''))
+    if not _DIGITS.fullmatch(prefix):
+        return None
+    if prefix.startswith('+'):
+        return prefix[1:] or None
+    if prefix.startswith('011'):
+        return prefix[3:] or None
+    if prefix.startswith('00'):
+        return prefix[2:] or None
+    if default_country_code == '1':
+        # North American area codes never start with 1: a leading 1 is the country code
+        return prefix if prefix.startswith('1') else '1' + prefix
+    if prefix.startswith('0'):
+        return default_country_code + prefix[1:]  # trunk prefix
+    return default_country_code + prefix
+
+
+def exchange_prefix(e164):
+    """
+    Country code, area code and exchange of a North American number
+    ('+1202555'), the part shared by neighbor-spoofed calls; None elsewhere
+    """
+    if e164 and len(e164) == 12 and e164.startswith('+1'):
+        return e164[:8]
+    return None
+
+
+class PrefixTrie:
+    """
+    Values keyed by digit prefixes of E.164 numbers (country code, area
+    code, exchange, ...). longest_match() walks one node per digit, so a
+    lookup costs O(digits) however many ranges are stored.
+    """
+
+    __slots__ = ('_root', '_size')
+
+    def __init__(self):
+        self._root = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _digits(prefix):
+        digits = prefix[1:] if prefix.startswith('+') else prefix
+        if not digits.isdigit():
+            raise ValueError(f'Not a number prefix: {prefix!r}')
+        return digits
+
+    def insert(self, prefix, value):
+        """Store value for every number starting with prefix ('+1', '+1900')"""
+        node = self._root
+        for digit in self._digits(prefix):
+            node = node.setdefault(digit, {})
+        if None not in node:
+            self._size += 1
+        node[None] = value  # digits are str keys, None marks a stored value
+
+    def remove(self, prefix):
+        """Drop the value stored for prefix; returns False if there was none"""
+        path = [self._root]
+        for digit in self._digits(prefix):
+            node = path[-1].get(digit)
+            if node is None:
+                return False
+            path.append(node)
+        if None not in path[-1]:
+            return False
+        del path[-1][None]
+        self._size -= 1
+        # Prune branches left empty
+        for digit, parent in zip(reversed(self._digits(prefix)), reversed(path[:-1])):
+            if parent[digit]:
+                break
+            del parent[digit]
+        return True
+
+    def longest_match(self, e164):
+        """(prefix, value) of the most specific range containing e164, or None"""
+        digits = e164[1:] if e164.startswith('+') else e164
+        node = self._root
+        length, value = (0, node[None]) if None in node else (-1, None)
+        for position, digit in enumerate(digits, 1):
+            node = node.get(digit)
+            if node is None:
+                break
+            if None in node:
+                length, value = position, node[None]
+        if length < 0:
+            return None
+        return '+' + digits[:length], value
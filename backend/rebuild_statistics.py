@@ -0,0 +1,24 @@
+"""
+VocalGuard Statistics Repair
+Recomputes the per-user and global statistics counters from the calls table
+
+Usage: python rebuild_statistics.py [path/to/vocalguard.db]
+"""
+
+import sys
+
+from database import VocalGuardDB
+
+
+def rebuild(db_path='vocalguard.db'):
+    db = VocalGuardDB(db_path)
+    try:
+        db.rebuild_statistics()
+        return db.get_statistics()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    stats = rebuild(*sys.argv[1:2])
+    print(f"Statistics rebuilt: {stats['total_calls']} calls, {stats['scams_detected']} scams")
@@ -0,0 +1,191 @@
+"""
+VocalGuard Reputation Store
+Caller reputation held in memory for the analyze hot path, backed by the
+caller_reputation table and kept in step with it incrementally
+"""
+
+import threading
+
+from phone_numbers import PrefixTrie
+
+
+class CallerRecord:
+    """Reputation counters of one number"""
+
+    __slots__ = ('scam_reports', 'total_calls', 'scam_calls', 'risk_sum',
+                 'last_category', 'blocked', 'block_reason')
+
+    def __init__(self, scam_reports=0, total_calls=0, scam_calls=0, risk_sum=0.0,
+                 last_category=None, blocked=False, block_reason=None):
+        self.scam_reports = scam_reports
+        self.total_calls = total_calls
+        self.scam_calls = scam_calls
+        self.risk_sum = risk_sum
+        self.last_category = last_category
+        self.blocked = blocked
+        self.block_reason = block_reason
+
+    def add_call(self, is_scam, risk_score, scam_category=None):
+        self.total_calls += 1
+        self.scam_calls += 1 if is_scam else 0
+        self.risk_sum += risk_score or 0
+        self.last_category = scam_category or self.last_category
+
+    def add_calls(self, other):
+        """Fold in the call counts of another record"""
+        self.total_calls += other.total_calls
+        self.scam_calls += other.scam_calls
+        self.risk_sum += other.risk_sum
+        self.last_category = other.last_category or self.last_category
+
+    @property
+    def average_risk(self):
+        return self.risk_sum / self.total_calls if self.total_calls else 0.0
+
+
+class CallerRange:
+    """A blocked or scored prefix of the number space"""
+
+    __slots__ = ('blocked', 'risk_modifier', 'reason')
+
+    def __init__(self, blocked, risk_modifier, reason):
+        self.blocked = blocked
+        self.risk_modifier = risk_modifier
+        self.reason = reason
+
+
+class ReputationStore:
+    """
+    Number -> CallerRecord map loaded from the database at startup, plus a
+    prefix trie of blocked and scored number ranges. Numbers are E.164.
+
+    get() is a plain dict lookup and never touches the database. Call
+    verdicts update the map straight away and are written back in batches
+    every flush_interval seconds; reports and blocks are committed before
+    they show up in the map. The same background pass pulls rows other
+    processes changed since the last one (by the table's seq column), so
+    every worker converges on the database without reloading everything.
+    """
+
+    def __init__(self, db, flush_interval=1.0):
+        self.db = db
+        self.flush_interval = flush_interval
+        self._records = {}
+        self._pending = {}
+        self._seq = 0
+        # prefix -> CallerRange, for numbers without a record of their own
+        self.ranges = PrefixTrie()
+        self._range_seq = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.sync()
+        self._thread = threading.Thread(target=self._run, name='reputation-store', daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, number):
+        """CallerRecord for number, or None if it was never seen"""
+        return self._records.get(number)
+
+    def match_range(self, number):
+        """(prefix, CallerRange) of the narrowest range containing number, or None"""
+        return self.ranges.longest_match(number)
+
+    def record_call(self, number, is_scam, risk_score, scam_category=None):
+        """Count a finished call against number"""
+        with self._lock:
+            for records in (self._records, self._pending):
+                record = records.get(number)
+                if record is None:
+                    record = records[number] = CallerRecord()
+                record.add_call(is_scam, risk_score, scam_category)
+
+    def add_report(self, number, description, risk_score, scam_category):
+        """Persist a community scam report; returns its id"""
+        with self._lock:
+            report_id = self.db.save_caller_report(number, description, risk_score, scam_category)
+            record = self._records.setdefault(number, CallerRecord())
+            record.scam_reports += 1
+            record.last_category = scam_category or record.last_category
+        return report_id
+
+    def block(self, number, reason):
+        """Persist a block; returns False when number was already blocked"""
+        with self._lock:
+            blocked = self.db.block_caller(number, reason)
+            if blocked:
+                record = self._records.setdefault(number, CallerRecord())
+                record.blocked = True
+                record.block_reason = reason
+        return blocked
+
+    def set_range(self, prefix, blocked, risk_modifier, reason):
+        """Persist a blocked or scored number range; neither removes it"""
+        with self._lock:
+            self.db.save_caller_range(prefix, blocked, risk_modifier, reason)
+            self._apply_range(prefix, blocked, risk_modifier, reason)
+
+    def _apply_range(self, prefix, blocked, risk_modifier, reason):
+        if blocked or risk_modifier:
+            self.ranges.insert(prefix, CallerRange(bool(blocked), risk_modifier, reason))
+        else:
+            self.ranges.remove(prefix)
+
+    def flush(self):
+        """Write queued call counts to the database"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self.db.apply_caller_activity([
+                (number, record.total_calls, record.scam_calls, record.risk_sum, record.last_category)
+                for number, record in pending.items()
+            ])
+        except Exception as e:
+            print(f"Reputation flush error: {e}")
+            with self._lock:
+                # Keep the counts for the next pass, merged with anything newer
+                for number, record in pending.items():
+                    newer = self._pending.get(number)
+                    if newer is not None:
+                        record.add_calls(newer)
+                    self._pending[number] = record
+
+    def sync(self):
+        """Apply rows changed in the database since the last sync"""
+        with self._lock:
+            rows = self.db.get_caller_reputation(self._seq)
+            for row in rows:
+                record = CallerRecord(
+                    row['scam_reports'], row['total_calls'], row['scam_calls'], row['risk_sum'],
+                    row['last_category'], bool(row['blocked']), row['block_reason']
+                )
+                # Calls counted here but not yet written back
+                pending = self._pending.get(row['number'])
+                if pending is not None:
+                    record.add_calls(pending)
+                self._records[row['number']] = record
+                self._seq = row['seq']
+            ranges = self.db.get_caller_ranges(self._range_seq)
+            for row in ranges:
+                self._apply_range(row['prefix'], row['blocked'], row['risk_modifier'], row['reason'])
+                self._range_seq = row['seq']
+        return len(rows) + len(ranges)
+
+    def _run(self):
+        # Flush before syncing, so a synced row never misses counts in flight
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                self.sync()
+            except Exception as e:
+                print(f"Reputation sync error: {e}")
+
+    def close(self):
+        """Stop the background pass and write back what is queued"""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
@@ -6,6 +6,56 @@ Multi-language AI-powered scam detection with behavioral analysis
 import re
 from typing import Dict, List, Tuple
 import math
+from keyword_engine import KeywordAutomaton
+from transcript_view import TranscriptView
+
+
+# One scanner for every PII shape. Alternatives are tried in order at each
+# position, so specific shapes win over the generic digit run at the end.
+PII_SCANNER = re.compile(r"""
+    (?P<email>(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})
+  | (?P<passport>\b[A-Z]{2}\d{7}\b)
+  | (?P<card>\b\d{4}(?:[ -]?\d{4}){3}\b|\b\d{13,19}\b)
+  | (?P<phone>(?<![\w+])(?:\+?1[ .-]?)?(?:\(\d{3}\)[ ]?|\d{3}[.-]?)\d{3}[.-]?\d{4}\b)
+  | (?P<zip_code>\b\d{5}-\d{4}\b)
+  | (?P<ssn>\b\d{3}[- ]?\d{2}[- ]?\d{4}\b)
+  | (?P<digits>\b\d+\b)
+""", re.VERBOSE)
+
+PII_REDACTION_LABELS = {
+    'credit_card': '[CREDIT CARD REDACTED]',
+    'ssn': '[SSN REDACTED]',
+    'phone': '[PHONE REDACTED]',
+    'email': '[EMAIL REDACTED]',
+    'zip_code': '[ZIP REDACTED]',
+    'bank_account': '[BANK ACCOUNT REDACTED]',
+    'cvv': '[CVV REDACTED]',
+    'passport': '[PASSPORT REDACTED]',
+    'drivers_license': '[LICENSE REDACTED]'
+}
+
+
+def _luhn_valid(digits: str) -> bool:
+    """Luhn checksum used by every major card network"""
+    total = 0
+    for index, ch in enumerate(reversed(digits)):
+        value = ord(ch) - 48
+        if index % 2:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return total % 10 == 0
+
+
+def _number_context(text: str, start: int) -> str:
+    """Lowercased words just before a number, back to the previous number"""
+    context = text[max(start - 24, 0):start]
+    for index in range(len(context) - 1, -1, -1):
+        if context[index].isdigit():
+            context = context[index + 1:]
+            break
+    return context.lower()
 
 
 class ScamDetector:
@@ -154,70 +204,96 @@ class ScamDetector:
             'payment_urgency': ['pay now', 'send immediately', 'right away'],
             'verification_bypass': ['no need to verify', 'trust me', 'skip verification']
         }
+        
+        # Question phrases (verification attempts)
+        self.question_phrases = ['what is your', 'can you provide', 'please confirm', 'verify your']
+        
+        # One whole-word index over every list above, scanned once per text
+        self.keyword_index = self._build_keyword_index()
+    
+    def _build_keyword_index(self) -> KeywordAutomaton:
+        """Compile threat, behavioral and question phrases into one matcher"""
+        groups = dict(self.threat_keywords)
+        for pattern_type, keywords in self.behavioral_patterns.items():
+            groups[f'behavior:{pattern_type}'] = keywords
+        groups['questions'] = self.question_phrases
+        return KeywordAutomaton(groups, whole_words=True)
     
     def redact_pii(self, text: str) -> Dict[str, any]:
         """
         Redact personally identifiable information from text
         
+        Candidates (emails, passport numbers and digit runs) are found in a
+        single pass of one compiled scanner, classified once each and the
+        redacted text is assembled in a single join.
+        
         Args:
-            text: Input text containing potential PII
+            text: Input text containing potential PII, or a TranscriptView
+                (whose digit runs let PII-free text skip the scan entirely)
             
         Returns:
-            Dictionary with redacted_text and pii_found list
+            Dictionary with redacted_text, pii_found list and pii_matches
+            (type plus start/end span in the original text for every hit)
         """
-        redacted_text = text
-        pii_found = []
-        
-        # Redact credit card numbers
-        if re.search(self.pii_patterns['credit_card'], text):
-            pii_found.append('credit_card')
-            redacted_text = re.sub(
-                self.pii_patterns['credit_card'],
-                '[CREDIT CARD REDACTED]',
-                redacted_text
-            )
-        
-        # Redact SSN
-        if re.search(self.pii_patterns['ssn'], text):
-            pii_found.append('ssn')
-            redacted_text = re.sub(
-                self.pii_patterns['ssn'],
-                '[SSN REDACTED]',
-                redacted_text
-            )
-        
-        # Redact phone numbers
-        if re.search(self.pii_patterns['phone'], text):
-            pii_found.append('phone')
-            redacted_text = re.sub(
-                self.pii_patterns['phone'],
-                '[PHONE REDACTED]',
-                redacted_text
-            )
-        
-        # Redact email addresses
-        if re.search(self.pii_patterns['email'], text):
-            pii_found.append('email')
-            redacted_text = re.sub(
-                self.pii_patterns['email'],
-                '[EMAIL REDACTED]',
-                redacted_text
-            )
-        
-        # Redact ZIP codes
-        if re.search(self.pii_patterns['zip_code'], text):
-            pii_found.append('zip_code')
-            redacted_text = re.sub(
-                self.pii_patterns['zip_code'],
-                '[ZIP REDACTED]',
-                redacted_text
-            )
+        if isinstance(text, TranscriptView):
+            # Every PII shape but email contains a digit
+            if not text.digit_runs and '@' not in text.text:
+                return {'redacted_text': text.text, 'pii_found': [], 'pii_matches': []}
+            text = text.text
+        
+        parts = []
+        pii_matches = []
+        found_types = set()
+        position = 0
+        
+        for match in PII_SCANNER.finditer(text):
+            pii_type = self._classify_pii(text, match)
+            if pii_type is None:
+                continue
+            start, end = match.span()
+            parts.append(text[position:start])
+            parts.append(PII_REDACTION_LABELS[pii_type])
+            position = end
+            found_types.add(pii_type)
+            pii_matches.append({'type': pii_type, 'start': start, 'end': end})
         
+        if not pii_matches:
+            return {'redacted_text': text, 'pii_found': [], 'pii_matches': []}
+        
+        parts.append(text[position:])
         return {
-            'redacted_text': redacted_text,
-            'pii_found': pii_found
+            'redacted_text': ''.join(parts),
+            'pii_found': [t for t in self.pii_patterns if t in found_types],
+            'pii_matches': pii_matches
         }
     
+    @staticmethod
+    def _classify_pii(text: str, match) -> str:
+        """
+        Decide which PII type a scanner match is, or None to leave it alone
+        """
+        kind = match.lastgroup
+        if kind in ('email', 'passport', 'phone', 'ssn', 'zip_code'):
+            return kind
+        
+        digits = match.group().replace(' ', '').replace('-', '')
+        if kind == 'card' and _luhn_valid(digits):
+            return 'credit_card'
+        
+        # Short numbers are only sensitive when the caller is asking for one
+        count = len(digits)
+        if count <= 8:
+            context = _number_context(text, match.start())
+            if 3 <= count <= 4 and any(k in context for k in ('cvv', 'cvc', 'security code')):
+                return 'cvv'
+            if 5 <= count and 'license' in context:
+                return 'drivers_license'
+            if count == 5:
+                return 'zip_code'
+        if 8 <= count <= 17:
+            return 'bank_account'
+        return None
+    
     def flag_threats(self, text: str) -> Dict[str, any]:
         """
         Advanced ML-style scam detection with behavioral analysis
@@ -246,9 +322,12 @@ class ScamDetector:
             'tech_scam': 0.17
         }
         
+        # Single whole-word scan shared with the behavioral and linguistic checks
+        keyword_counts = self.keyword_index.match_counts(text_lower)
+        
         # Pattern matching with frequency analysis
-        for category, keywords in self.threat_keywords.items():
-            matches = sum(1 for keyword in keywords if keyword in text_lower)
+        for category in self.threat_keywords:
+            matches = keyword_counts[category]
             
             if matches > 0:
                 detected_patterns.append(category)
@@ -258,10 +337,10 @@ class ScamDetector:
                 threat_scores[category] = weighted_score
         
         # Behavioral analysis
-        behavioral_score = self._analyze_behavior(text_lower)
+        behavioral_score = self._analyze_behavior(text_lower, keyword_counts)
         
         # Linguistic analysis
-        linguistic_score = self._analyze_linguistics(text_lower)
+        linguistic_score = self._analyze_linguistics(text_lower, keyword_counts)
         
         # Composite confidence score (ML-style ensemble)
         pattern_confidence = sum(threat_scores.values())
@@ -295,14 +374,16 @@ class ScamDetector:
             'threat_breakdown': {k: round(v, 2) for k, v in threat_scores.items()}
         }
     
-    def _analyze_behavior(self, text: str) -> float:
+    def _analyze_behavior(self, text: str, keyword_counts: Dict[str, int] = None) -> float:
         """
         Analyze behavioral red flags in conversation
         """
         score = 0.0
+        if keyword_counts is None:
+            keyword_counts = self.keyword_index.match_counts(text)
         
-        for pattern_type, keywords in self.behavioral_patterns.items():
-            matches = sum(1 for keyword in keywords if keyword in text)
+        for pattern_type in self.behavioral_patterns:
+            matches = keyword_counts[f'behavior:{pattern_type}']
             if matches > 0:
                 score += min(matches * 0.15, 0.3)
         
@@ -322,11 +403,13 @@ class ScamDetector:
         
         return min(score, 1.0)
     
-    def _analyze_linguistics(self, text: str) -> float:
+    def _analyze_linguistics(self, text: str, keyword_counts: Dict[str, int] = None) -> float:
         """
         Analyze linguistic patterns common in scams
         """
         score = 0.0
+        if keyword_counts is None:
+            keyword_counts = self.keyword_index.match_counts(text)
         
         # Poor grammar indicators
         double_spaces = text.count('  ')
@@ -344,8 +427,7 @@ class ScamDetector:
             score += 0.1
         
         # Question words (verification attempts)
-        questions = ['what is your', 'can you provide', 'please confirm', 'verify your']
-        question_count = sum(1 for q in questions if q in text)
+        question_count = keyword_counts['questions']
         if question_count >= 2:
             score += 0.2
         
@@ -103,8 +103,9 @@ def seed_data():
             INSERT INTO calls 
             (user_id, caller_name, caller_number, transcript, is_scam, confidence, 
              threat_level, detected_threats, redacted_transcript, detected_pii, 
-             warning_message, duration, language, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             warning_message, duration, language, timestamp, scam_category, risk_score, seq)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                    (SELECT COALESCE(MAX(seq), 0) + 1 FROM calls))
         ''', (
             None, # No user_id for public history
             call.get('caller_name'),
@@ -119,12 +120,16 @@ def seed_data():
             call.get('warning_message'),
             random.randint(30, 300),
             'en',
-            call_time
+            call_time,
+            call.get('scam_category'),
+            round(call.get('confidence', 0) * 100, 2)
         ))
     
     conn.commit()
-    print(f"Successfully added {len(calls_to_add)} records to the database.")
     conn.close()
+    # Rows were inserted directly, so bring the statistics counters up to date
+    db.rebuild_statistics()
+    print(f"Successfully added {len(calls_to_add)} records to the database.")
 
 if __name__ == "__main__":
     seed_data()
@@ -0,0 +1,149 @@
+"""
+VocalGuard Signature Packs
+Versioned JSON keyword packs, compiled ahead of time and hot-swapped into
+the detectors without a restart
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from category_index import CategoryIndex
+from keyword_engine import KeywordAutomaton
+
+DEFAULT_PACK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'signature_packs')
+PACK_FILE_PATTERN = re.compile(r'-v(\d+)\.json$')
+
+
+class SignaturePack:
+    """
+    One compiled, immutable signature set.
+
+    Everything a request needs (keyword tables, the keyword automaton and
+    the category index) hangs off a single object, so swapping packs is one
+    reference assignment and a request that holds a pack keeps a consistent
+    view of it however long it runs. categories, when given, replaces the
+    pack's own category table (see load_category_table).
+    """
+
+    def __init__(self, data, source=None, categories=None):
+        if categories is not None:
+            data = dict(data, categories=categories)
+        self.version = int(data['version'])
+        self.description = data.get('description', '')
+        self.source = source
+        self.scam_signatures = data['scam_signatures']
+        self.intent_concepts = data['intent_concepts']
+        self.signal_keywords = data['signal_keywords']
+        self.fingerprint = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()[:12]
+
+        groups = {name: entry['keywords'] for name, entry in self.scam_signatures.items()}
+        groups.update(self.intent_concepts)
+        groups.update(self.signal_keywords)
+        self.keyword_automaton = KeywordAutomaton(groups)
+        self.category_index = CategoryIndex(data['categories'])
+
+    @classmethod
+    def load(cls, path, categories=None):
+        """Read and compile a pack file"""
+        with open(path, encoding='utf-8') as pack_file:
+            return cls(json.load(pack_file), source=os.path.abspath(path), categories=categories)
+
+    @property
+    def tag(self):
+        """Version plus content hash; edits without a version bump still differ"""
+        return f"{self.version}:{self.fingerprint}"
+
+    def info(self):
+        return {
+            'version': self.version,
+            'fingerprint': self.fingerprint,
+            'description': self.description,
+            'source': os.path.basename(self.source) if self.source else None,
+            'keywords': len(self.keyword_automaton.patterns)
+        }
+
+
+def latest_pack_path(directory=DEFAULT_PACK_DIR):
+    """Pack file with the highest -v<N>.json version in directory, or None"""
+    best = None
+    for name in os.listdir(directory):
+        match = PACK_FILE_PATTERN.search(name)
+        if match and (best is None or int(match.group(1)) > best[0]):
+            best = (int(match.group(1)), os.path.join(directory, name))
+    return best[1] if best else None
+
+
+def load_latest_pack(directory=DEFAULT_PACK_DIR, categories=None):
+    path = latest_pack_path(directory)
+    if path is None:
+        raise FileNotFoundError(f"No signature pack (*-v<N>.json) in {directory}")
+    return SignaturePack.load(path, categories)
+
+
+def load_category_table(path):
+    """
+    A category table kept outside the packs ({"default": ..., "categories":
+    [...]}, the shape of a pack's "categories"), or None without a path.
+    It replaces the table of every pack loaded with it, so a deployment can
+    tune categories without editing the shipped packs.
+    """
+    if not path:
+        return None
+    with open(path, encoding='utf-8') as table_file:
+        return json.load(table_file)
+
+
+class SignaturePackWatcher:
+    """
+    Polls the pack directory and installs newer packs.
+
+    New packs are compiled on the watcher thread (or the caller of check),
+    never on a request thread, and then handed to install() in one call. A
+    pack that fails to load is reported and the current one stays active.
+    """
+
+    def __init__(self, install, current=None, directory=DEFAULT_PACK_DIR, interval=30, categories=None):
+        self.install = install
+        self.directory = directory
+        self.interval = interval
+        self.categories = categories
+        self._loaded = self._stamp(current.source) if current and current.source else None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _stamp(path):
+        return (path, os.path.getmtime(path))
+
+    def check(self):
+        """Install the latest pack if it changed since the last check; returns it or None"""
+        try:
+            path = latest_pack_path(self.directory)
+            if path is None:
+                return None
+            stamp = self._stamp(os.path.abspath(path))
+            if stamp == self._loaded:
+                return None
+            pack = SignaturePack.load(path, self.categories)
+        except Exception as e:
+            print(f"Signature pack reload error: {e}")
+            return None
+        self._loaded = stamp
+        self.install(pack)
+        print(f"Signature pack v{pack.version} ({pack.fingerprint}) installed")
+        return pack
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='signature-pack-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,58 @@
+"""
+VocalGuard Transcript View
+Normalized forms of one transcript, derived once and shared by every
+detector that looks at the same request
+"""
+
+import hashlib
+import re
+from functools import cached_property
+
+DIGIT_RUN_PATTERN = re.compile(r'\d+')
+PUNCTUATION_MARKS = '!?.,;:'
+
+
+class TranscriptView:
+    """
+    Read-only view of a transcript for the detectors.
+
+    Each derived form (lowercased text, uppercase and punctuation counts,
+    digit runs, digest) is computed on first use and then reused, so building
+    a view costs nothing and a request never lowercases or rescans the same
+    text twice.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+
+    @classmethod
+    def of(cls, transcript):
+        """Wrap a plain string; views are passed through unchanged"""
+        return transcript if isinstance(transcript, cls) else cls(transcript)
+
+    @cached_property
+    def lower(self):
+        return self.text.lower()
+
+    @cached_property
+    def uppercase(self):
+        return sum(map(str.isupper, self.text))
+
+    @cached_property
+    def punctuation(self):
+        return {mark: self.text.count(mark) for mark in PUNCTUATION_MARKS}
+
+    @cached_property
+    def digit_runs(self):
+        return DIGIT_RUN_PATTERN.findall(self.text)
+
+    @cached_property
+    def digest(self):
+        return hashlib.md5(self.text.encode()).hexdigest()
+
+    def __str__(self):
+        return self.text
+
+    def __len__(self):
+        return self.length
@@ -0,0 +1,273 @@
+"""
+VocalGuard Write Server
+One process owns every write to the SQLite file; app workers send their
+writes over a local socket and read through read-only WAL connections
+
+Usage: VOCALGUARD_WRITE_SERVER_KEY=<secret> python write_server.py [path/to/vocalguard.db]
+"""
+
+import multiprocessing
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from multiprocessing.connection import Client, Listener
+
+from connection_manager import ConnectionManager
+from database import VocalGuardDB
+
+# VocalGuardDB methods that write; ReadReplicaDB forwards these to the server
+WRITE_METHODS = (
+    'create_user', 'save_call', 'update_save_call', 'save_calls', 'reserve_call_ids',
+    'save_calls_with_ids', 'save_report', 'rebuild_statistics', 'compact_rollups',
+    'apply_caller_activity', 'save_caller_report', 'block_caller', 'save_caller_range'
+)
+
+_SHUTDOWN = '__shutdown__'
+
+
+def default_address(db_path):
+    """Unix socket path of the write server for db_path"""
+    return os.path.abspath(db_path) + '.writer.sock'
+
+
+class WriteServer:
+    """
+    Serializes the writes of every worker through one connection.
+
+    Each client connection gets a thread that queues its requests; a single
+    writer thread runs them in arrival order, so workers never contend for
+    the database lock. Queued save_calls_with_ids batches from different
+    workers are committed together in one transaction. A client is answered
+    once its write has committed (or failed, with the error).
+    """
+
+    def __init__(self, db_path, address=None, authkey=None, max_batch=2048):
+        self.db_path = db_path
+        self.address = address or default_address(db_path)
+        self.authkey = authkey or os.urandom(16)
+        self.max_batch = max_batch
+        self._process = None
+
+    def start(self, timeout=30):
+        """Run the server in a child process; returns once it accepts connections"""
+        ready = multiprocessing.Event()
+        self._process = multiprocessing.Process(
+            target=self.serve_forever, args=(ready,), name='vocalguard-writer', daemon=True
+        )
+        self._process.start()
+        if not ready.wait(timeout):
+            self._process.terminate()
+            raise RuntimeError('Write server did not start')
+        return self
+
+    def stop(self, timeout=30):
+        """Finish queued writes and shut the server down"""
+        if self._process is None:
+            return
+        client = WriteClient(self.address, self.authkey)
+        try:
+            client.call(_SHUTDOWN)
+        except ConnectionError:
+            pass
+        finally:
+            client.close()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+
+    def serve_forever(self, ready=None):
+        """Open the database (running migrations) and serve until shut down"""
+        self._db = VocalGuardDB(self.db_path)
+        self._requests = queue.Queue()
+        if os.path.exists(self.address):
+            os.unlink(self.address)  # left behind by a server that died
+        self._listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        self._stopping = False
+        threading.Thread(target=self._run_writes, name='write-server', daemon=True).start()
+        if ready is not None:
+            ready.set()
+
+        while True:
+            try:
+                conn = self._listener.accept()
+            except multiprocessing.AuthenticationError as e:
+                print(f"Write server rejected a client: {e}")
+                continue
+            if self._stopping:
+                conn.close()
+                self._listener.close()
+                return
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+
+    def _serve_client(self, conn):
+        reply = queue.Queue(maxsize=1)
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                self._requests.put((request, reply))
+                try:
+                    conn.send(reply.get())
+                except OSError:
+                    return
+
+    def _run_writes(self):
+        carry = None
+        while True:
+            item = carry or self._requests.get()
+            carry = None
+            (method, args, kwargs), reply = item
+
+            if method == _SHUTDOWN:
+                self._drain()
+                self._db.close()
+                reply.put(('ok', None))
+                # Wake the accept loop so the process can exit
+                self._stopping = True
+                Client(self.address, family='AF_UNIX', authkey=self.authkey).close()
+                return
+
+            if method == 'save_calls_with_ids':
+                group = [item]
+                entries = list(args[0])
+                while len(entries) < self.max_batch:
+                    try:
+                        following = self._requests.get_nowait()
+                    except queue.Empty:
+                        break
+                    if following[0][0] != 'save_calls_with_ids':
+                        carry = following
+                        break
+                    group.append(following)
+                    entries.extend(following[0][1][0])
+                if len(group) > 1:
+                    try:
+                        self._db.save_calls_with_ids(entries)
+                        for _, group_reply in group:
+                            group_reply.put(('ok', None))
+                        continue
+                    except Exception as e:
+                        # Retry one batch at a time so each caller gets its own outcome
+                        print(f"Write server group commit failed, retrying per batch: {e}")
+                    for request, group_reply in group:
+                        group_reply.put(self._execute(request))
+                    continue
+
+            reply.put(self._execute((method, args, kwargs)))
+
+    def _drain(self):
+        while True:
+            try:
+                request, reply = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            reply.put(self._execute(request))
+
+    def _execute(self, request):
+        method, args, kwargs = request
+        if method not in WRITE_METHODS:
+            return ('error', 'ValueError', f'Not a write method: {method}')
+        try:
+            return ('ok', getattr(self._db, method)(*args, **kwargs))
+        except Exception as e:
+            return ('error', type(e).__name__, str(e))
+
+
+class WriteClient:
+    """
+    Sends write requests to a WriteServer; one connection per thread,
+    reopened after a fork or a dropped connection
+    """
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _connection(self):
+        if self._pid != os.getpid():
+            # Sockets inherited across a fork belong to the parent
+            self._local = threading.local()
+            self._connections = []
+            self._pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            try:
+                conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+            except OSError as e:
+                raise ConnectionError(f"Write server unavailable: {e}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def call(self, method, *args, **kwargs):
+        """Run a VocalGuardDB write method in the server; returns its result"""
+        conn = self._connection()
+        try:
+            conn.send((method, args, kwargs))
+            status, *payload = conn.recv()
+        except (EOFError, OSError) as e:
+            self._local.conn = None
+            conn.close()
+            raise ConnectionError(f"Write server connection lost: {e}")
+        if status == 'error':
+            error_name, message = payload
+            error_type = getattr(sqlite3, error_name, None)
+            if not (isinstance(error_type, type) and issubclass(error_type, Exception)):
+                error_type = RuntimeError
+            raise error_type(message)
+        return payload[0]
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+
+class ReadReplicaDB(VocalGuardDB):
+    """
+    VocalGuardDB for a worker process: reads use this process's read-only
+    WAL connections, writes go to the write server. The schema is the
+    server's business, so no migrations run here.
+    """
+
+    def __init__(self, db_path, writer):
+        self.db_path = db_path
+        self.writer = writer
+        self.connections = ConnectionManager(db_path, read_only=True)
+
+    def close(self):
+        super().close()
+        self.writer.close()
+
+
+def _forward(method):
+    def write(self, *args, **kwargs):
+        return self.writer.call(method, *args, **kwargs)
+    write.__name__ = method
+    write.__doc__ = getattr(VocalGuardDB, method).__doc__
+    return write
+
+
+for _method in WRITE_METHODS:
+    setattr(ReadReplicaDB, _method, _forward(_method))
+
+
+if __name__ == "__main__":
+    authkey = os.environ.get('VOCALGUARD_WRITE_SERVER_KEY', '').encode()
+    if not authkey:
+        sys.exit("Set VOCALGUARD_WRITE_SERVER_KEY (shared with the app workers)")
+    server = WriteServer(sys.argv[1] if len(sys.argv) > 1 else 'vocalguard.db', authkey=authkey)
+    print(f"Write server listening on {server.address}")
+    server.serve_forever()
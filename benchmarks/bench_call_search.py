@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+VocalGuard Call Search Benchmark
+/api/calls/search at scale: the old LIKE '%query%' scan versus the FTS5
+index and the caller-number prefix index
+
+Usage: bench_call_search.py [rows]   (default 1,000,000)
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from database import VocalGuardDB
+
+SCAM_PHRASES = [
+    'there is a warrant for your arrest', 'pay the fee with gift cards', 'your package is held at customs',
+    'medicare benefits will be suspended', 'microsoft detected a virus on your computer',
+    'you are the lottery winner'
+]
+
+
+def vocabulary(size, rng):
+    """Pseudo-words with a Zipf-like frequency, like everyday conversation"""
+    syllables = ['ka', 'lo', 'mi', 'ne', 'ra', 'to', 'su', 'vi', 'de', 'po', 'an', 'el', 'or', 'us']
+    words = sorted({''.join(rng.choice(syllables) for _ in range(rng.randint(1, 4))) for _ in range(size * 2)})
+    words = words[:size]
+    rng.shuffle(words)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return words, weights
+
+
+def populate(db, rows, batch=20_000):
+    rng = random.Random(42)
+    words, weights = vocabulary(5000, rng)
+    for start in range(0, rows, batch):
+        calls = []
+        for n in range(start, min(start + batch, rows)):
+            transcript = ' '.join(rng.choices(words, weights, k=rng.randint(12, 40)))
+            if rng.random() < 0.02:
+                transcript += ' ' + rng.choice(SCAM_PHRASES)
+            calls.append({
+                'caller_name': rng.choice(['Unknown', 'Mom', 'IRS Agent', 'Pharmacy', 'Bank']),
+                'caller_number': f"+1{rng.randint(200, 999)}{rng.randint(0, 9999999):07d}",
+                'transcript': transcript,
+                'is_scam': rng.random() < 0.3
+            })
+        db.save_calls(calls)
+
+
+def like_scan(db, query, limit):
+    """The previous search_calls, with the page limit the API now applies"""
+    pattern = f'%{query}%'
+    return db.connection().execute(
+        'SELECT * FROM calls WHERE transcript LIKE ? OR caller_name LIKE ? OR caller_number LIKE ? '
+        'ORDER BY timestamp DESC LIMIT ?', (pattern, pattern, pattern, limit)
+    ).fetchall()
+
+
+def best_ms(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    path = os.path.join(tempfile.mkdtemp(prefix='vocalguard-search-'), 'bench.db')
+    db = VocalGuardDB(path)
+
+    start = time.perf_counter()
+    populate(db, rows)
+    print(f"Inserted {rows:,} calls (with index triggers) in {time.perf_counter() - start:.1f} s\n")
+
+    print(f"{'query':>28} {'LIKE scan':>12} {'indexed':>10}")
+    for query in ('warrant arrest', 'customs package', 'medicare benefits', 'gift car'):
+        like_ms = best_ms(lambda: like_scan(db, query, 20), repeat=1)
+        fts_ms = best_ms(lambda: db.search_calls(query, limit=20))
+        print(f"{query:>28} {like_ms:>9.1f} ms {fts_ms:>7.2f} ms")
+    for prefix in ('1202555', '+1 (415) 9'):
+        like_ms = best_ms(lambda: like_scan(db, prefix, 20), repeat=1)
+        prefix_ms = best_ms(lambda: db.search_calls(prefix, limit=20))
+        print(f"{prefix:>28} {like_ms:>9.1f} ms {prefix_ms:>7.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
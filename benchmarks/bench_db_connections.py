@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+VocalGuard Database Connection Benchmark
+/api/analyze throughput (and raw insert latency) with a fresh sqlite3
+connection per query versus the pooled, thread-local connections
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+# Importing the app creates its database and evidence folder in the cwd
+os.chdir(tempfile.mkdtemp(prefix='vocalguard-bench-'))
+
+import app as vocalguard_app
+from database import VocalGuardDB
+
+TRANSCRIPTS = [
+    "This is the IRS. Pay immediately with gift cards or you will be arrested. Call {n}.",
+    "Hi, it's the dentist confirming your appointment number {n} for tomorrow.",
+]
+
+
+class PerQueryConnectionDB(VocalGuardDB):
+    """The previous behaviour: connect (with default settings) on every query"""
+
+    def connection(self):
+        return sqlite3.connect(self.db_path)
+
+
+def analyze_throughput(db, requests, threads):
+    vocalguard_app.db = db
+    # Every request is a new transcript, so the analysis cache does not help
+    payloads = [{'transcript': TRANSCRIPTS[n % 2].format(n=n), 'caller_number': '+12025550111'}
+                for n in range(requests)]
+
+    def worker(chunk):
+        with vocalguard_app.app.test_client() as client:
+            for payload in chunk:
+                assert client.post('/api/analyze', json=payload).status_code == 200
+
+    chunks = [payloads[i::threads] for i in range(threads)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, chunks))
+    return requests / (time.perf_counter() - start)
+
+
+def insert_latency(db, repeat):
+    record = {'transcript': 'hello', 'detected_threats': [], 'detected_pii': []}
+    start = time.perf_counter()
+    for _ in range(repeat):
+        db.update_save_call(record)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    vocalguard_app.app.config['TESTING'] = True
+    print(f"{'':>24} {'per-query connect':>18} {'pooled':>10}")
+
+    legacy = PerQueryConnectionDB('legacy.db')
+    pooled = VocalGuardDB('pooled.db')
+    print(f"{'insert latency':>24} {insert_latency(legacy, 500):>15.3f} ms {insert_latency(pooled, 500):>7.3f} ms")
+    print(f"{'get_user_calls latency':>24} "
+          f"{min_ms(lambda: legacy.get_user_calls(None, 50)):>15.3f} ms "
+          f"{min_ms(lambda: pooled.get_user_calls(None, 50)):>7.3f} ms")
+
+    for threads in (1, 4):
+        before = analyze_throughput(PerQueryConnectionDB(f'legacy-{threads}.db'), 400, threads)
+        after = analyze_throughput(VocalGuardDB(f'pooled-{threads}.db'), 400, threads)
+        label = f"/api/analyze x{threads} thr"
+        print(f"{label:>24} {before:>13.0f} req/s {after:>5.0f} req/s")
+
+
+def min_ms(func, repeat=200):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    main()
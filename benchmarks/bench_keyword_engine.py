@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+VocalGuard Keyword Engine Benchmark
+Per-call latency of the keyword stage of calculate_risk_score: one
+substring scan per keyword versus one pass of the compiled automaton
+"""
+
+import sys
+import os
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from advanced_detector import AdvancedScamDetector
+
+SCRIPT = (
+    "Hello, this is Officer John Smith calling from the IRS fraud department. "
+    "We have an arrest warrant in your name for unpaid taxes and the police are coming "
+    "to your address today. To avoid legal action you must pay immediately with gift "
+    "cards from any store. Do not hang up and do not tell anyone about this call. "
+    "Read me the code on the back of each card so we can verify the payment. "
+)
+FILLER = (
+    "I understand, I was just looking at the weather for the weekend and thinking "
+    "about what to cook for dinner with the family on sunday afternoon. "
+)
+
+
+def make_transcript(size):
+    """Mostly ordinary conversation with one scam script in the middle"""
+    filler = FILLER * (size // len(FILLER) + 1)
+    half = max(size - len(SCRIPT), 0) // 2
+    return (filler[:half] + SCRIPT + filler[:half])[:size]
+
+
+def naive_counts(detector, transcript_lower):
+    """The per-keyword substring sweep calculate_risk_score used to run"""
+    counts = {}
+    for name, data in detector.scam_signatures.items():
+        counts[name] = sum(1 for k in data['keywords'] if k in transcript_lower)
+    for name, concepts in detector.intent_concepts.items():
+        counts[name] = int(any(c in transcript_lower for c in concepts))
+    return counts
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    detector = AdvancedScamDetector()
+    automaton = detector.keyword_automaton
+    print(f"{len(automaton.patterns)} distinct patterns in {len(automaton.groups)} groups\n")
+    print(f"{'size':>8} {'substring sweep':>18} {'automaton':>12}")
+
+    for size, repeat in ((1_000, 500), (10_000, 100), (100_000, 10)):
+        text = make_transcript(size).lower()
+        naive_ms = timed(lambda: naive_counts(detector, text), repeat)
+        automaton_ms = timed(lambda: automaton.match_counts(text), repeat)
+        print(f"{size // 1000:>6}KB {naive_ms:>15.3f} ms {automaton_ms:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
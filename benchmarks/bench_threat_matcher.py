@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+VocalGuard Threat Matcher Benchmark
+ScamDetector.flag_threats with the shared whole-word index versus the
+previous per-list substring sweeps, on long transcripts
+"""
+
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from scam_detector import ScamDetector
+from bench_keyword_engine import make_transcript, timed
+
+
+def naive_sweep(detector, text_lower):
+    """The three keyword sweeps flag_threats used to run"""
+    counts = {}
+    for category, keywords in detector.threat_keywords.items():
+        counts[category] = sum(1 for k in keywords if k in text_lower)
+    for pattern_type, keywords in detector.behavioral_patterns.items():
+        counts[f'behavior:{pattern_type}'] = sum(1 for k in keywords if k in text_lower)
+    counts['questions'] = sum(1 for q in detector.question_phrases if q in text_lower)
+    return counts
+
+
+def main():
+    detector = ScamDetector()
+    print(f"{len(detector.keyword_index.patterns)} distinct phrases\n")
+    print(f"{'size':>8} {'substring sweep':>18} {'word index':>12} {'flag_threats':>14}")
+
+    for size, repeat in ((1_000, 500), (10_000, 100), (100_000, 10)):
+        text = make_transcript(size)
+        lower = text.lower()
+        naive_ms = timed(lambda: naive_sweep(detector, lower), repeat)
+        index_ms = timed(lambda: detector.keyword_index.match_counts(lower), repeat)
+        total_ms = timed(lambda: detector.flag_threats(text), repeat)
+        print(f"{size // 1000:>6}KB {naive_ms:>15.3f} ms {index_ms:>9.3f} ms {total_ms:>11.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+VocalGuard Transcript View Benchmark
+Per-request CPU time of the transcript stages of /api/analyze (signals,
+scoring, PII redaction and category lowercasing) when every stage derives
+its own copy of the text versus sharing one TranscriptView
+"""
+
+import sys
+import os
+import hashlib
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from advanced_detector import AdvancedScamDetector
+from scam_detector import ScamDetector
+from transcript_view import TranscriptView
+from bench_keyword_engine import make_transcript
+
+
+def legacy_signals(detector, transcript):
+    """extract_signals before TranscriptView: its own lower() and char walk"""
+    return {
+        'keyword_counts': detector.keyword_automaton.match_counts(transcript.lower()),
+        'length': len(transcript),
+        'uppercase': sum(1 for c in transcript if c.isupper()),
+        'exclamations': transcript.count('!'),
+        'head': transcript[:50],
+        'digest': hashlib.md5(transcript.encode()).hexdigest()
+    }
+
+
+def before(detector, pii_detector, transcript):
+    scoring = detector.score_signals(legacy_signals(detector, transcript))
+    pii_detector.redact_pii(transcript)
+    transcript.lower()  # detect_scam_category
+    return scoring
+
+
+def after(detector, pii_detector, transcript):
+    view = TranscriptView(transcript)
+    scoring = detector.score_signals(detector.extract_signals(view))
+    pii_detector.redact_pii(view)
+    view.lower  # detect_scam_category
+    return scoring
+
+
+def cpu_ms(func, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - start) / repeat * 1000
+
+
+def main():
+    detector = AdvancedScamDetector(deterministic=True)
+    pii_detector = ScamDetector()
+    print(f"{'size':>8} {'before':>12} {'after':>12} {'speedup':>9}")
+
+    for size, repeat in ((1_000, 2000), (10_000, 300), (100_000, 30)):
+        text = make_transcript(size)
+        assert before(detector, pii_detector, text) == after(detector, pii_detector, text)
+        before_ms = cpu_ms(lambda: before(detector, pii_detector, text), repeat)
+        after_ms = cpu_ms(lambda: after(detector, pii_detector, text), repeat)
+        print(f"{size // 1000:>6}KB {before_ms:>9.3f} ms {after_ms:>9.3f} ms {before_ms / after_ms:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
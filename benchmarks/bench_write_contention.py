@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+VocalGuard Write Contention Benchmark
+N worker processes each saving calls through a CallWriter (as
+/api/analyze does) and reading history: every process writing to the file
+itself versus all writes going through the write server
+"""
+
+import sys
+import os
+import multiprocessing
+import tempfile
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from call_writer import CallWriter
+from database import VocalGuardDB
+from write_server import ReadReplicaDB, WriteClient, WriteServer
+
+CALLS_PER_WORKER = 2000
+
+
+def worker(db_factory, results, start):
+    db = db_factory()
+    writer = CallWriter(db, flush_interval=0.005, max_retries=1)
+    record = {'transcript': 'This is the IRS, pay now', 'is_scam': True, 'risk_score': 80.0,
+              'detected_threats': ['urgency'], 'detected_pii': []}
+    start.wait()
+    for n in range(CALLS_PER_WORKER):
+        writer.submit(record)
+        if n % 10 == 0:
+            db.get_call_page(limit=20)
+    writer.close()
+    db.close()
+    results.put(writer.failed)
+
+
+class DirectDB:
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self):
+        db = VocalGuardDB(self.path)
+        # A short busy timeout surfaces lock waits as failed batches
+        db.connections.busy_timeout_ms = 50
+        return db
+
+
+class ReplicaDB:
+    def __init__(self, path, address, authkey):
+        self.path, self.address, self.authkey = path, address, authkey
+
+    def __call__(self):
+        return ReadReplicaDB(self.path, WriteClient(self.address, self.authkey))
+
+
+def run(db_factory, processes):
+    results = multiprocessing.Queue()
+    start = multiprocessing.Event()
+    workers = [multiprocessing.Process(target=worker, args=(db_factory, results, start))
+               for _ in range(processes)]
+    for process in workers:
+        process.start()
+    began = time.perf_counter()
+    start.set()
+    errors = sum(results.get() for _ in workers)
+    elapsed = time.perf_counter() - began
+    for process in workers:
+        process.join()
+    return processes * CALLS_PER_WORKER / elapsed, errors
+
+
+def main():
+    directory = tempfile.mkdtemp(prefix='vocalguard-bench-')
+    print(f"{'':>12} {'direct writes':>24} {'write server':>24}")
+    for processes in (1, 4, 8):
+        direct_path = os.path.join(directory, f'direct-{processes}.db')
+        VocalGuardDB(direct_path).close()
+        direct_rate, direct_errors = run(DirectDB(direct_path), processes)
+
+        served_path = os.path.join(directory, f'served-{processes}.db')
+        server = WriteServer(served_path).start()
+        served_rate, served_errors = run(ReplicaDB(served_path, server.address, server.authkey), processes)
+        server.stop()
+
+        print(f"{processes:>3} workers {direct_rate:>9.0f} calls/s {direct_errors:>4} lost "
+              f"{served_rate:>9.0f} calls/s {served_errors:>4} lost")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""
+VocalGuard API Tests
+Exercises the Flask endpoints against a throwaway database
+"""
+
+import sys
+import os
+import atexit
+import json
+import shutil
+import tempfile
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+# Importing app opens its database and blocklist; keep them out of the repo
+_app_data = tempfile.mkdtemp(prefix='vocalguard-test-')
+atexit.register(shutil.rmtree, _app_data, ignore_errors=True)
+os.environ['VOCALGUARD_DB'] = os.path.join(_app_data, 'vocalguard.db')
+os.environ['VOCALGUARD_BLOCKLIST'] = os.path.join(_app_data, 'blocklist.bin')
+
+import app as vocalguard_app
+from analysis_cache import AnalysisCache
+from auth import generate_token
+from blocklist import Blocklist, BlocklistTable, import_numbers, key_number
+from call_velocity import CallVelocityTracker
+from call_writer import CallWriter
+from caller_intelligence import CallerIntelligence
+from database import VocalGuardDB
+from signature_pack import SignaturePack, SignaturePackWatcher
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    db = VocalGuardDB(str(tmp_path / 'test.db'))
+    writer = CallWriter(db, flush_interval=0.01)
+    monkeypatch.setattr(vocalguard_app, 'db', db)
+    monkeypatch.setattr(vocalguard_app, 'call_writer', writer)
+    monkeypatch.setattr(vocalguard_app, 'analysis_cache', AnalysisCache())
+    intelligence = CallerIntelligence(
+        db, flush_interval=0.01, burst_calls=5, blocklist_path=str(tmp_path / 'blocklist.bin')
+    )
+    monkeypatch.setattr(vocalguard_app, 'caller_intelligence', intelligence)
+    vocalguard_app.app.config['TESTING'] = True
+    with vocalguard_app.app.test_client() as test_client:
+        yield test_client
+    writer.close()
+    intelligence.close()
+    db.close()
+
+
+def auth_headers():
+    return {'Authorization': 'Bearer ' + generate_token(1, 'analyst@example.com')}
+
+
+def saved_calls():
+    """Calls in the database once the write-behind queue has drained"""
+    vocalguard_app.call_writer.flush()
+    return vocalguard_app.db.get_all_calls()
+
+
+def test_live_session_matches_one_shot_analysis(client, monkeypatch):
+    parts = [
+        "Hello, this is Officer Smith from the IRS.",
+        "You must pay immediately with gift cards or you will be arrested.",
+        "Read me the code and your card 4532 0151 1283 0366."
+    ]
+    opened = client.post('/api/calls/session', json={'caller_name': 'IRS', 'caller_number': '+12025550111'})
+    assert opened.status_code == 201
+    session_id = opened.get_json()['session_id']
+
+    # Interim updates only hand the new text to the transcript analyzers
+    analyzed = []
+    match_emerging_patterns = vocalguard_app.threat_intelligence.match_emerging_patterns
+    monkeypatch.setattr(vocalguard_app.threat_intelligence, 'match_emerging_patterns',
+                        lambda text: analyzed.append(text) or match_emerging_patterns(text))
+    for part in parts:
+        update = client.post(f'/api/calls/session/{session_id}/transcript', json={'delta': part})
+        assert update.status_code == 200
+        assert 'call_id' not in update.get_json()
+    assert analyzed == parts
+    assert saved_calls() == []
+
+    final = client.post(f'/api/calls/session/{session_id}/close', json={}).get_json()
+    single = vocalguard_app.advanced_detector.calculate_risk_score(' '.join(parts), '+12025550111')
+    assert analyzed[3:] == [' '.join(parts)]
+
+    assert final['detected_threats'] == single[1] == update.get_json()['detected_threats']
+    assert final['scam_category'] == update.get_json()['scam_category'] != 'General Scam'
+    assert final['detected_pii'] == ['credit_card']
+    assert final['redacted_transcript'].endswith('[CREDIT CARD REDACTED].')
+    calls = saved_calls()
+    assert len(calls) == 1 and calls[0]['id'] == final['call_id']
+    assert calls[0]['transcript'] == ' '.join(parts)
+
+    assert client.post(f'/api/calls/session/{session_id}/transcript', json={'delta': 'x'}).status_code == 404
+
+
+def test_session_close_redacts_pii_split_across_deltas(client):
+    session_id = client.post('/api/calls/session', json={}).get_json()['session_id']
+    client.post(f'/api/calls/session/{session_id}/transcript', json={'delta': 'My card is 4532 0151'})
+    final = client.post(f'/api/calls/session/{session_id}/close', json={'delta': '1283 0366 thanks'}).get_json()
+    assert final['detected_pii'] == ['credit_card']
+    assert '0151' not in final['redacted_transcript'] and '0366' not in final['redacted_transcript']
+    assert saved_calls()[0]['redacted_transcript'] == final['redacted_transcript']
+
+
+def test_batch_analysis_saves_every_call_once(client):
+    payload = {'calls': [
+        {'transcript': "This is the IRS, pay immediately with gift cards or be arrested.", 'caller_number': '+12025550111'},
+        "Hi mom, are we still on for dinner on Sunday?",
+        {'transcript': ''}
+    ]}
+    response = client.post('/api/analyze/batch', json=payload)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['total'] == 3
+    assert body['results'][2] == {'index': 2, 'error': 'Transcript is required'}
+    assert body['results'][0]['is_scam'] and not body['results'][1]['is_scam']
+
+    calls = {c['id']: c for c in saved_calls()}
+    assert len(calls) == 2
+    assert calls[body['results'][1]['call_id']]['transcript'].startswith('Hi mom')
+    assert client.post('/api/analyze/batch', json={'calls': []}).status_code == 400
+
+
+def test_repeated_script_is_served_from_cache(client, monkeypatch):
+    script = "This is the IRS. Pay immediately with gift cards or you will be arrested."
+    first = client.post('/api/analyze', json={'transcript': script, 'caller_number': '+12025550111'}).get_json()
+    second = client.post('/api/analyze', json={'transcript': script, 'caller_number': '+13125550199'}).get_json()
+    for volatile in ('call_id', 'caller_reputation', 'spoofing_analysis'):
+        first.pop(volatile)
+        second.pop(volatile)
+    assert first == second
+
+    stats = client.get('/api/analyze/cache').get_json()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+    assert len(saved_calls()) == 2
+
+    # A different signature set must not see results scored under the old one
+    data = json.load(open(vocalguard_app.advanced_detector.pack.source))
+    data['scam_signatures']['urgency']['keywords'].append('without delay')
+    monkeypatch.setattr(vocalguard_app.advanced_detector, 'pack', SignaturePack(data))
+    client.post('/api/analyze', json={'transcript': script})
+    stats = client.get('/api/analyze/cache').get_json()
+    assert (stats['hits'], stats['misses']) == (1, 2)
+    assert stats['version'] == vocalguard_app.advanced_detector.pack.tag
+
+
+def test_analysis_cache_evicts_and_expires():
+    cache = AnalysisCache(max_entries=2, ttl=60)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, key.upper())
+    assert cache.get('a') is None and cache.get('c') == 'C'
+
+    cache.ttl = -1
+    cache.put('d', 'D')
+    assert cache.get('d') is None
+    assert AnalysisCache.key_for('Cafe\u0301') == AnalysisCache.key_for('Caf\u00e9')
+
+
+def test_signature_pack_hot_swap(client, tmp_path, monkeypatch):
+    detector = vocalguard_app.advanced_detector
+    monkeypatch.setattr(detector, 'pack', detector.pack)
+    shutil.copy(detector.pack.source, tmp_path / 'vocalguard-v1.json')
+    watcher = SignaturePackWatcher(detector.install_pack, directory=str(tmp_path), interval=0)
+    assert watcher.check().version == 1
+    assert watcher.check() is None
+
+    session_id = client.post('/api/calls/session', json={}).get_json()['session_id']
+    script = "Your toll balance is overdue, settle it through this portal."
+    before = client.post('/api/analyze', json={'transcript': script}).get_json()
+    assert before['signature_version'] == 1 and 'urgency' not in before['detected_threats']
+
+    data = json.load(open(tmp_path / 'vocalguard-v1.json'))
+    data['version'] = 2
+    data['scam_signatures']['urgency']['keywords'].append('overdue')
+    (tmp_path / 'vocalguard-v2.json').write_text(json.dumps(data))
+    assert watcher.check().version == 2
+
+    after = client.post('/api/analyze', json={'transcript': script}).get_json()
+    assert after['signature_version'] == 2 and 'urgency' in after['detected_threats']
+    assert client.get('/api/signatures').get_json()['version'] == 2
+
+    # A call that was already running keeps the pack it started with
+    live = client.post(f'/api/calls/session/{session_id}/transcript', json={'delta': script}).get_json()
+    assert live['signature_version'] == 1
+
+    # Broken packs are reported and ignored
+    (tmp_path / 'vocalguard-v3.json').write_text('{"version": 3')
+    assert watcher.check() is None and detector.pack.version == 2
+
+
+def test_call_writer_batches_and_drains_on_close(tmp_path):
+    db = VocalGuardDB(str(tmp_path / 'writer.db'))
+    writer = CallWriter(db, batch_size=50, flush_interval=0.01, max_queue=10, put_timeout=0, id_block=4)
+    ids = writer.submit_many([{'transcript': f'call {n}'} for n in range(30)])
+    ids.append(writer.submit({'transcript': 'last'}, user_id=7))
+    assert ids == list(range(1, 32))
+
+    # Ids handed out up front never collide with direct inserts
+    direct_id = db.update_save_call({'transcript': 'direct'})
+    assert direct_id not in ids
+
+    writer.close()
+    calls = {c['id']: c for c in db.get_all_calls(100)}
+    assert len(calls) == 32 and calls[31]['user_id'] == 7
+    # The queue only holds 10 rows, the overflow was written by the caller
+    assert writer.written + writer.direct_writes == 31 and writer.direct_writes > 0
+    db.close()
+
+
+def test_call_writer_close_race_and_failed_batches(tmp_path):
+    db = VocalGuardDB(str(tmp_path / 'writer.db'))
+    writer = CallWriter(db, flush_interval=0.01, max_retries=1)
+    # The thread can notice _closed on an idle timeout before close() queues its sentinel
+    writer._closed = True
+    writer._thread.join()
+    writer._closed = False
+    writer.close()
+    assert writer.failed == 0
+
+    # A batch that keeps failing is written row by row; only the bad row is lost
+    save_calls_with_ids = db.save_calls_with_ids
+
+    def save_without_bad_rows(entries):
+        if any(call_data.get('transcript') == 'bad' for _, call_data, _ in entries):
+            raise ValueError('bad row')
+        save_calls_with_ids(entries)
+
+    db.save_calls_with_ids = save_without_bad_rows
+    writer = CallWriter(db, batch_size=10, flush_interval=0.05, max_retries=1)
+    ids = writer.submit_many([{'transcript': text} for text in ('good', 'bad', 'fine')])
+    writer.close()
+    assert (writer.written, writer.failed) == (2, 1)
+    assert sorted(c['id'] for c in db.get_all_calls()) == [ids[0], ids[2]]
+    db.close()
+
+
+def test_history_cursors(client):
+    client.post('/api/analyze/batch', json=[f"Call number {n} about dinner" for n in range(3)])
+    vocalguard_app.call_writer.flush()
+
+    first = client.get('/api/calls/history?limit=2').get_json()
+    assert len(first['calls']) == 2 and first['has_more'] and first['next_before']
+    older = client.get(f"/api/calls/history?limit=2&before={first['next_before']}").get_json()
+    assert len(older['calls']) == 1 and older['next_before'] is None
+
+    idle = client.get(f"/api/calls/history?since={first['latest']}").get_json()
+    assert idle['calls'] == [] and idle['latest'] == first['latest']
+
+    client.post('/api/analyze', json={'transcript': 'One more call'})
+    vocalguard_app.call_writer.flush()
+    delta = client.get(f"/api/calls/history?since={first['latest']}").get_json()
+    assert [c['transcript'] for c in delta['calls']] == ['One more call']
+    assert client.get('/api/calls/history?before=garbage').status_code == 400
+
+
+def test_reports_are_rendered_once_per_call(client, monkeypatch):
+    call_id = client.post('/api/analyze', json={'transcript': 'This is the IRS, pay now'}).get_json()['call_id']
+    vocalguard_app.call_writer.flush()
+
+    first = client.post('/api/report/generate', json={'call_id': call_id})
+    assert first.status_code == 200 and first.get_json()['call_id'] == call_id
+    assert client.post('/api/report/generate', json={'call_id': call_id + 1}).status_code == 404
+    assert client.post('/api/report/generate', json={'call_id': 'x'}).status_code == 400
+
+    # Served from the reports table without reading or rebuilding the call
+    monkeypatch.setattr(vocalguard_app.db, 'get_call_by_id', None)
+    monkeypatch.setattr(vocalguard_app, 'build_call_report', None)
+    assert client.post('/api/report/generate', json={'call_id': str(call_id)}).data == first.data
+
+
+def test_statistics_timeseries(client):
+    client.post('/api/analyze/batch', json=["Pay the IRS now with gift cards", "See you at dinner"])
+    vocalguard_app.call_writer.flush()
+
+    series = client.get('/api/statistics/timeseries?interval=hour').get_json()
+    assert sum(point['total_calls'] for point in series['points']) == 2
+    assert client.get('/api/statistics/timeseries?interval=week').status_code == 400
+
+
+def test_caller_reputation_is_stored_and_reloaded(client):
+    number = '+12025550147'
+    for _ in range(3):
+        client.post('/api/analyze', json={'transcript': 'This is the IRS, pay now with gift cards', 'caller_number': number})
+    reputation = vocalguard_app.caller_intelligence.check_number_reputation('+1 (202) 555-0147')
+    assert reputation['total_calls'] == 3 and reputation['trust_level'] == 'HIGH RISK'
+
+    for _ in range(3):
+        assert client.post('/api/submit_scam_report', json={'phone_number': number}).get_json()['report_id']
+    assert vocalguard_app.caller_intelligence.check_number_reputation(number)['is_verified_scammer']
+    assert client.post('/api/block', json={'phone_number': number}).get_json()['success']
+    assert not client.post('/api/block', json={'phone_number': number}).get_json()['success']
+
+    # A fresh store (another worker, or a restart) loads the same picture
+    vocalguard_app.caller_intelligence.store.flush()
+    reloaded = CallerIntelligence(vocalguard_app.db, blocklist_path=vocalguard_app.caller_intelligence.blocklist.path)
+    reputation = reloaded.check_number_reputation(number)
+    reloaded.close()
+    assert (reputation['trust_level'], reputation['community_reports'], reputation['total_calls']) == ('BLOCKED', 3, 3)
+    assert reloaded.check_number_reputation('+1234567890')['trust_level'] == 'BLOCKED'
+    assert [entry['number'] for entry in vocalguard_app.db.get_blocklist()][0] == number
+
+
+def test_numbers_are_normalized_and_ranges_blocked(client):
+    intelligence = vocalguard_app.caller_intelligence
+    for number in ('+1 (202) 555-0123', '202.555.0123', '0012025550123'):
+        client.post('/api/analyze', json={'transcript': 'Hello there', 'caller_number': number})
+    assert intelligence.check_number_reputation('12025550123')['total_calls'] == 3
+    vocalguard_app.call_writer.flush()
+    assert {c['caller_number'] for c in vocalguard_app.db.get_all_calls()} == {'+12025550123'}
+
+    # Neighbor spoofing compares area code and exchange, not raw characters
+    assert intelligence.check_number_reputation('+1 202 555 0199', '+12025550123')['is_neighbor_spoof']
+    assert not intelligence.check_number_reputation('+1 202 556 0199', '+12025550123')['is_neighbor_spoof']
+
+    # The narrowest range wins
+    auth = auth_headers()
+    assert client.post('/api/block/range', json={'prefix': '+1900', 'reason': 'Premium rate'}, headers=auth).status_code == 200
+    client.post('/api/block/range', json={'prefix': '+1900555', 'blocked': False, 'risk_modifier': 20}, headers=auth)
+    assert intelligence.check_number_reputation('1-900-123-4567')['trust_level'] == 'BLOCKED'
+    scored = intelligence.check_number_reputation('+19005551234')
+    assert (scored['trust_level'], scored['matched_range'], scored['risk_modifier']) == ('SUSPICIOUS', '+1900555', 20)
+    assert client.post('/api/block/range', json={'prefix': '+1abc'}, headers=auth).status_code == 400
+    assert client.post('/api/block/range', json={'prefix': '+1212'}).status_code == 401
+    assert client.post('/api/block', json={'phone_number': 'Unknown'}).status_code == 400
+
+    reloaded = CallerIntelligence(vocalguard_app.db, blocklist_path=intelligence.blocklist.path)
+    reloaded.close()
+    assert reloaded.check_number_reputation('+19001234567')['matched_range'] == '+1900'
+
+
+def test_number_search_accepts_national_format(client):
+    client.post('/api/analyze', json={'transcript': 'Hello there', 'caller_number': '(202) 555-0123'})
+    client.post('/api/analyze', json={'transcript': 'Hello again', 'caller_number': '+44 20 7946 0958'})
+    vocalguard_app.call_writer.flush()
+    for query in ('(202) 555', '202-555-0123', '2025550123', '+1 202 555', '1202555'):
+        found = client.post('/api/calls/search', json={'query': query}).get_json()['calls']
+        assert [c['caller_number'] for c in found] == ['+12025550123'], query
+    found = client.post('/api/calls/search', json={'query': '0044 20 7946'}).get_json()['calls']
+    assert [c['caller_number'] for c in found] == ['+442079460958']
+
+
+def test_call_velocity_window_and_heavy_hitters():
+    now = [1000.0]
+    tracker = CallVelocityTracker(window=60, buckets=6, width=256, depth=4, top_k=3, clock=lambda: now[0])
+    for _ in range(30):
+        tracker.record('+12025550100')
+    for n in range(200):
+        tracker.record(f'+1202555{n:04d}')
+    assert tracker.rate('+12025550100') >= 31
+    assert tracker.top(1)[0][0] == '+12025550100'
+    assert len(tracker.top()) <= 3
+
+    now[0] += 30
+    tracker.record('+12025550100')
+    assert tracker.rate('+12025550100') >= 32
+    # Older buckets slide out of the window
+    now[0] += 45
+    assert tracker.rate('+12025550100') == 1
+    now[0] += 600
+    assert tracker.rate('+12025550100') == 0 and tracker.top() == []
+
+
+def test_heavy_hitters_make_room_for_new_burst_dialers():
+    now = [1000.0]
+    tracker = CallVelocityTracker(window=60, buckets=6, width=1024, top_k=3, clock=lambda: now[0])
+    for dialer in ('+12025550001', '+12025550002', '+12025550003'):
+        for _ in range(100):
+            tracker.record(dialer)
+    now[0] += 120  # all of them leave the window
+    for _ in range(40):
+        tracker.record('+13125550009')
+    assert tracker.top(3) == [('+13125550009', 40)]
+
+    # With the list full of live dialers, a busier newcomer displaces the quietest
+    for count, dialer in ((5, '+12025550004'), (6, '+12025550005')):
+        for _ in range(count):
+            tracker.record(dialer)
+    for _ in range(10):
+        tracker.record('+14155550000')
+    assert [number for number, _ in tracker.top()] == ['+13125550009', '+14155550000', '+12025550005']
+
+
+def test_burst_dialing_raises_risk(client):
+    script = {'transcript': 'Hello, quick question about your account', 'caller_number': '+1 202 555 0177'}
+    first = client.post('/api/analyze', json=script).get_json()
+    assert first['call_velocity']['calls_in_window'] == 1 and not first['call_velocity']['burst_detected']
+
+    client.post('/api/analyze/batch', json={'calls': [script] * 5})
+    burst = client.post('/api/analyze', json=script).get_json()
+    assert burst['call_velocity']['calls_in_window'] == 7 and burst['call_velocity']['burst_detected']
+    assert burst['risk_score'] == first['risk_score'] + burst['call_velocity']['risk_modifier']
+
+    dialers = client.get('/api/calls/top-dialers?limit=5').get_json()['dialers']
+    assert dialers[0]['number'] == '+12025550177' and dialers[0]['calls_in_window'] == 7
+
+
+def test_blocklist_import_is_mapped_and_swapped(client):
+    intelligence = vocalguard_app.caller_intelligence
+    other_worker = Blocklist(intelligence.blocklist.path, interval=0)
+    csv_body = "name,phone_number\nrobo,+1 (202) 555-0101\nrobo,202.555.0102\nbad,not a number\n"
+    assert client.post('/api/blocklist/import', data=csv_body, content_type='text/csv').status_code == 401
+    auth = auth_headers()
+    imported = client.post('/api/blocklist/import', data=csv_body, content_type='text/csv', headers=auth).get_json()
+    assert (imported['read'], imported['rejected'], imported['count']) == (3, 1, 2)
+    assert intelligence.check_number_reputation('+12025550102')['trust_level'] == 'BLOCKED'
+    assert not intelligence.check_number_reputation('+12025550103')['on_blocklist']
+
+    ndjson_body = '{"number": "+442079460958"}\n"+12025550101"\n'
+    client.post('/api/blocklist/import', data=ndjson_body, content_type='application/x-ndjson', headers=auth)
+    table = intelligence.blocklist.table
+    assert len(table) == 3 and list(table.contains_many(['+442079460958', '+12025550199'])) == [True, False]
+
+    # Another worker sees the new file once it notices the swap; the old mapping stays readable
+    assert other_worker.check() and '+442079460958' in other_worker
+    client.post('/api/blocklist/import?replace=true', data='+13125550100\n', content_type='text/csv', headers=auth)
+    assert '+442079460958' in table and other_worker.check()
+    assert '+442079460958' not in other_worker and '+13125550100' in other_worker
+
+    listing = client.get('/api/blocklist').get_json()
+    assert listing['imported']['count'] == 1 and listing['blocked_numbers'][0]['reason'] == 'Demo blacklist'
+    assert client.post('/api/blocklist/import?format=xml', data='', headers=auth).status_code == 400
+
+
+def test_blocklist_import_merges_sorted_runs(tmp_path):
+    path = str(tmp_path / 'blocklist.bin')
+    import_numbers(path, ['+12025550100', '+12025550300'])
+    # Chunks of three numbers: spilled as sorted runs and merged with the current list
+    numbers = [f'+1202555{n:04d}' for n in (907, 5, 300, 12, 5, 640, 100, 1, 77, 300)]
+    result = import_numbers(path, numbers + ['junk'], chunk_size=3)
+    assert (result['read'], result['rejected'], result['count']) == (11, 1, 8)
+    table = BlocklistTable(path)
+    assert [key_number(key) for key in table.keys()] == [
+        f'+1202555{n:04d}' for n in (1, 5, 12, 77, 100, 300, 640, 907)
+    ]
+    assert '+12025550640' in table and '+12025550641' not in table
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('.blocklist-')]
+
+
+def test_reputation_batch(client):
+    auth = auth_headers()
+    client.post('/api/blocklist/import', data='+12025550101\n', content_type='text/csv', headers=auth)
+    client.post('/api/block/range', json={'prefix': '+1900'}, headers=auth)
+    numbers = ['+1 202 555 0101', '1-900-555-0000', 'Unknown', '+1234567890', '(312) 555-0100', '+12025550101']
+    body = client.post('/api/reputation/batch', json={'numbers': numbers}).get_json()
+    assert body['count'] == 6
+    rows = [dict(zip(body['fields'], row)) for row in body['results']]
+    assert [row['trust_level'] for row in rows] == ['BLOCKED', 'BLOCKED', 'INVALID', 'BLOCKED', 'UNKNOWN', 'BLOCKED']
+    assert rows[0]['on_blocklist'] and rows[1]['matched_range'] == '+1900' and rows[4]['e164'] == '+13125550100'
+
+    single = client.get('/api/reputation/+12025550101').get_json()
+    assert single['reputation']['trust_level'] == 'BLOCKED'
+
+    many = client.post('/api/reputation/batch', json=[f'+1312555{n:04d}' for n in range(2500)])
+    assert many.is_streamed
+    streamed = json.loads(many.get_data())
+    assert streamed['count'] == len(streamed['results']) == 2500
+    assert streamed['results'][-1][1] == '+13125552499'
+    assert client.post('/api/reputation/batch', json={'numbers': []}).status_code == 400
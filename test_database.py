@@ -0,0 +1,399 @@
+"""
+VocalGuard Database Tests
+Storage layer behaviour against throwaway SQLite files
+"""
+
+import sys
+import os
+import threading
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from database import VocalGuardDB
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = VocalGuardDB(str(tmp_path / 'test.db'))
+    yield database
+    database.close()
+
+
+def test_connections_are_configured_once_per_thread(db):
+    conn = db.connection()
+    assert db.connection() is conn
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+    assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+
+    def in_thread():
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(db.connection()))
+        thread.start()
+        thread.join()
+        del thread
+        return seen[0]
+
+    first = in_thread()
+    assert first is not conn
+    # A finished thread hands its connection to the next one
+    assert in_thread() is first and len(db.connections) == 2
+
+    # A forked child must never reuse the parent's handles
+    db.connections._pid = -1
+    assert db.connection() is not conn
+
+
+def test_failed_writes_do_not_leave_a_transaction_open(db):
+    assert db.create_user('a@example.com', 'hash') is not None
+    assert db.create_user('a@example.com', 'hash') is None
+    assert not db.connection().in_transaction
+
+    with pytest.raises(Exception):
+        db.save_calls([{'transcript': 'x', 'detected_threats': [object()]}])
+    assert not db.connection().in_transaction
+    assert db.save_calls([{'transcript': 'ok'}]) == [1]
+
+
+def test_close_releases_every_connection(db):
+    db.update_save_call({'transcript': 'hello'})
+    db.close()
+    assert len(db.connections) == 0
+    assert db.get_all_calls()[0]['transcript'] == 'hello'
+
+
+def test_search_is_ranked_paginated_and_kept_in_sync(db):
+    db.save_calls([
+        {'caller_name': 'IRS Agent', 'caller_number': '+1 (202) 555-0111',
+         'transcript': 'This is the IRS, pay the IRS today with gift cards'},
+        {'caller_name': 'Mom', 'caller_number': '+1-312-555-0199',
+         'transcript': 'Dinner on Sunday? Bring the gift for grandma'},
+        {'caller_name': 'Unknown', 'caller_number': '2025550123',
+         'transcript': 'Your IRS refund is waiting'}
+    ])
+
+    results = db.search_calls('irs gift')
+    assert [c['id'] for c in results] == [1]
+    assert '<mark>IRS</mark>' in results[0]['snippet']
+
+    # The last word is a prefix, and pages do not overlap
+    assert {c['id'] for c in db.search_calls('gif')} == {1, 2}
+    first, second = db.search_calls('gif', limit=1), db.search_calls('gif', limit=1, offset=1)
+    assert len(first) == len(second) == 1 and first[0]['id'] != second[0]['id']
+
+    # FTS syntax in user input is treated as plain words
+    assert db.search_calls('IRS" OR "x') == []
+
+    # Phone-number queries use the digits prefix index, newest first
+    assert [c['id'] for c in db.search_calls('+1 202')] == [1]
+    assert [c['id'] for c in db.search_calls('202555')] == [3, 1]
+    assert [c['id'] for c in db.search_calls('1312')] == [2]
+    # Newest first by time, not by id (ids are reserved in blocks per process)
+    conn = db.connection()
+    with conn:
+        conn.execute("UPDATE calls SET timestamp = '2020-01-01 00:00:00' WHERE id = 3")
+    assert [c['id'] for c in db.search_calls('202555')] == [1, 3]
+
+    with conn:
+        conn.execute("UPDATE calls SET transcript = 'nothing to see' WHERE id = 3")
+        conn.execute('DELETE FROM calls WHERE id = 2')
+    assert [c['id'] for c in db.search_calls('irs')] == [1]
+    assert db.search_calls('1312') == []
+
+
+def test_derived_tables_backfill_existing_calls(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / 'old.db')
+    old = sqlite3.connect(path)
+    old.execute('CREATE TABLE calls (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, '
+                'caller_name TEXT, caller_number TEXT, transcript TEXT, is_scam BOOLEAN, '
+                'confidence REAL, threat_level TEXT, detected_threats TEXT, redacted_transcript TEXT, '
+                'detected_pii TEXT, warning_message TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, '
+                'duration INTEGER, language TEXT)')
+    old.execute("INSERT INTO calls (caller_number, transcript, is_scam, detected_threats, detected_pii) "
+                "VALUES ('+15550001111', 'warrant for your arrest', 1, '[\"urgency\", \"threats\"]', "
+                "'[\"phone\"]')")
+    old.commit()
+    old.close()
+
+    db = VocalGuardDB(path)
+    assert [c['id'] for c in db.search_calls('arrest')] == [1]
+    assert [c['id'] for c in db.search_calls('1555')] == [1]
+    call = db.get_all_calls()[0]
+    assert call['detected_threats'] == ['urgency', 'threats'] and call['detected_pii'] == ['phone']
+    assert db.get_statistics()['top_threats'] == {'threats': 1, 'urgency': 1}
+    db.close()
+
+
+def test_call_history_keyset_pages_and_delta_polls(db):
+    db.save_calls([{'transcript': f'call {n}'} for n in range(5)], user_id=1)
+    db.save_calls([{'transcript': 'other user'}], user_id=2)
+    conn = db.connection()
+    with conn:
+        # Two calls in the same second are told apart by id
+        conn.execute("UPDATE calls SET timestamp = '2026-01-01 10:00:00' WHERE id IN (1, 2)")
+        conn.execute("UPDATE calls SET timestamp = '2026-01-01 10:00:05' WHERE id IN (3, 4, 5)")
+
+    page, more = db.get_call_page(1, limit=2)
+    assert [c['id'] for c in page] == [5, 4] and more
+    cursor = (page[-1]['timestamp'], page[-1]['id'])
+    page, more = db.get_call_page(1, limit=2, before=cursor)
+    assert [c['id'] for c in page] == [3, 2] and more
+    page, more = db.get_call_page(1, limit=2, before=(page[-1]['timestamp'], page[-1]['id']))
+    assert [c['id'] for c in page] == [1] and not more
+
+    # Delta polls return only rows committed later, earliest pending first
+    assert db.get_call_page(1, since=db.get_latest_call_seq(1)) == ([], False)
+    page, more = db.get_call_page(1, limit=2, since=page[-1]['seq'])
+    assert [c['id'] for c in page] == [3, 2] and more
+
+
+def test_delta_polls_follow_commit_order_not_ids(db):
+    # Two writers with their own reserved id blocks commit out of id order
+    first_block = db.reserve_call_ids(64)
+    second_block = db.reserve_call_ids(64)
+    db.save_calls_with_ids([(second_block, {'transcript': 'worker B'}, None)])
+    cursor = db.get_latest_call_seq()
+
+    db.save_calls_with_ids([(first_block, {'transcript': 'worker A'}, None)])
+    conn = db.connection()
+    with conn:
+        conn.execute('UPDATE calls SET timestamp = ?', ('2026-01-01 10:00:00',))
+    page, more = db.get_call_page(since=cursor)
+    assert [c['id'] for c in page] == [first_block] and not more
+    assert db.get_call_page(since=page[0]['seq']) == ([], False)
+
+
+def test_statistics_counters_track_inserts_and_rebuild(db):
+    user_id = db.create_user('stats@example.com', 'hash', 'stats')
+    scam = {'is_scam': True, 'confidence': 0.9, 'detected_threats': ['urgency', 'payment']}
+    db.update_save_call(scam, user_id)
+    db.save_calls([scam, {'is_scam': False, 'confidence': 0.3, 'detected_threats': []}], user_id)
+    call_id = db.reserve_call_ids(1)
+    db.save_calls_with_ids([(call_id, {'is_scam': True, 'confidence': 0.6,
+                                       'detected_threats': ['urgency']}, None)])
+
+    user_stats = db.get_user_statistics(user_id)
+    assert user_stats['total_calls'] == 3 and user_stats['scams_detected'] == 2
+    assert user_stats['average_confidence'] == 0.7
+    assert user_stats['top_threats'] == {'urgency': 2, 'payment': 2}
+    overall = db.get_statistics()
+    assert overall['total_calls'] == 4 and overall['top_threats']['urgency'] == 3
+    assert db.get_user_by_id(user_id)['scams_blocked'] == 2
+
+    # Reads are lookups that write nothing
+    conn = db.connection()
+    changes = conn.total_changes
+    db.get_user_statistics(user_id)
+    assert conn.total_changes == changes and not conn.in_transaction
+
+    # Rows written behind the counters' back are picked up by a rebuild
+    with conn:
+        conn.execute("INSERT INTO calls (user_id, is_scam, confidence, detected_threats) "
+                     "VALUES (?, 1, 0.8, '[\"payment\"]')", (user_id,))
+    assert db.get_user_statistics(user_id)['total_calls'] == 3
+    db.rebuild_statistics()
+    assert db.get_user_statistics(user_id)['total_calls'] == 4
+    assert db.get_user_statistics(user_id)['top_threats'] == {'payment': 3, 'urgency': 2}
+    assert db.get_statistics()['total_calls'] == 5
+
+
+def test_threat_and_pii_tags_are_normalized(db):
+    db.save_calls([
+        {'is_scam': True, 'detected_threats': ['urgency', 'payment'], 'detected_pii': ['ssn']},
+        {'is_scam': True, 'detected_threats': ['payment'], 'detected_pii': []},
+        {'is_scam': False, 'detected_threats': ['urgency'], 'detected_pii': ['email']},
+    ])
+    conn = db.connection()
+    with conn:
+        conn.execute("UPDATE calls SET timestamp = '2026-01-01 09:00:00' WHERE id = 1")
+
+    page, _ = db.get_call_page()
+    assert [(c['detected_threats'], c['detected_pii']) for c in page] == [
+        (['urgency'], ['email']), (['payment'], []), (['urgency', 'payment'], ['ssn'])
+    ]
+    assert db.get_tag_counts() == {'threats': {'payment': 2, 'urgency': 1},
+                                   'pii': {'email': 1, 'ssn': 1}}
+    assert db.get_tag_counts(start='2026-01-02') == {'threats': {'payment': 1}, 'pii': {'email': 1}}
+
+    with conn:
+        conn.execute("UPDATE calls SET detected_threats = '[\"impersonation\"]' WHERE id = 2")
+        conn.execute('DELETE FROM calls WHERE id = 3')
+    assert db.get_tag_counts(start='2026-01-02') == {'threats': {'impersonation': 1}, 'pii': {}}
+
+
+def query_plans(db, read):
+    """(sql, plan steps) for every SELECT that read() runs"""
+    conn = db.connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        read()
+    finally:
+        conn.set_trace_callback(None)
+    return [(sql, [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)])
+            for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+
+
+def test_hot_queries_use_indexes(db):
+    user_id = db.create_user('plans@example.com', 'hash', 'plans')
+    db.save_calls([{'transcript': 'IRS warrant, pay now', 'caller_number': '+1 555 010 9999',
+                    'is_scam': True, 'confidence': 0.9, 'detected_threats': ['urgency'],
+                    'detected_pii': ['ssn']}] * 3, user_id)
+    cursor = ('2030-01-01 00:00:00', 99)
+
+    hot_reads = {
+        'history': lambda: db.get_call_page(limit=10),
+        'history_user': lambda: db.get_call_page(user_id, limit=10),
+        'history_before': lambda: db.get_call_page(user_id, limit=10, before=cursor),
+        'history_since': lambda: db.get_call_page(None, limit=10, since=0),
+        'history_user_since': lambda: db.get_call_page(user_id, limit=10, since=0),
+        'search_text': lambda: db.search_calls('warrant'),
+        'search_number': lambda: db.search_calls('555010'),
+        'call_by_id': lambda: db.get_call_by_id(1),
+        'report': lambda: db.get_report(1, 'call_report:v1'),
+        'user_statistics': lambda: db.get_user_statistics(user_id),
+        'tag_counts_range': lambda: db.get_tag_counts(start='2020-01-01'),
+        'tag_counts_user': lambda: db.get_tag_counts(user_id=user_id, start='2020-01-01'),
+    }
+    for name, read in hot_reads.items():
+        plans = query_plans(db, read)
+        assert plans, name
+        for sql, plan in plans:
+            # Only the unfiltered history walks an index, newest first, up to its LIMIT
+            scans = [step for step in plan if step.startswith('SCAN') and 'VIRTUAL TABLE' not in step
+                     and step != 'SCAN calls USING INDEX idx_calls_time']
+            assert not scans, (name, sql, plan)
+            if name.startswith('history') and 'FROM calls' in sql:
+                assert not any('ORDER BY' in step for step in plan), (name, plan)
+
+    [(_, plan)] = query_plans(db, lambda: db.connection().execute(
+        'SELECT id FROM calls WHERE caller_number = ? ORDER BY timestamp DESC', ('+15550109999',)).fetchall())
+    assert plan == ['SEARCH calls USING COVERING INDEX idx_calls_caller_number (caller_number=?)']
+
+
+def test_migrations_are_versioned_and_run_once(tmp_path):
+    from migrations import current_version, run_migrations
+
+    path = str(tmp_path / 'versioned.db')
+    db = VocalGuardDB(path)
+    conn = db.connection()
+    latest = db._migrations()[-1][0]
+    assert current_version(conn) == latest
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(calls)')}
+    assert {'scam_category', 'risk_score'} <= columns
+
+    call_id = db.update_save_call({'confidence': 0.42, 'scam_category': 'IRS/Tax Scam', 'risk_score': 42.0})
+    assert db.get_call_by_id(call_id)['scam_category'] == 'IRS/Tax Scam'
+    db.close()
+
+    # Reopening applies nothing; a failing step rolls back and keeps the old version
+    db = VocalGuardDB(path)
+    conn = db.connection()
+    assert run_migrations(conn, db._migrations()) == []
+
+    def broken(cursor):
+        cursor.execute('CREATE TABLE half_done (id INTEGER)')
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        run_migrations(conn, db._migrations() + [(latest + 1, 'broken', broken)])
+    assert current_version(conn) == latest
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+    db.close()
+
+
+def test_rollups_serve_timeseries_and_compact(db):
+    user_id = db.create_user('series@example.com', 'hash', 'series')
+    db.save_calls([{'is_scam': True, 'risk_score': 80.0, 'scam_category': 'IRS/Tax Scam'},
+                   {'is_scam': False, 'risk_score': 20.0}], user_id)
+    conn = db.connection()
+    now = conn.execute("SELECT strftime('%Y-%m-%d %H:00:00', 'now')").fetchone()[0]
+    assert db.get_timeseries(now, '9999-01-01', 'hour') == [
+        {'period': now, 'total_calls': 2, 'scams_detected': 1, 'average_risk_score': 50.0}
+    ]
+    assert db.get_timeseries(now, '9999-01-01', user_id=user_id)[0]['total_calls'] == 2
+    assert db.get_timeseries(now, '9999-01-01', category='IRS/Tax Scam')[0]['scams_detected'] == 1
+
+    # Calls from older days, written behind the counters' back, then rebuilt
+    with conn:
+        conn.executemany(
+            "INSERT INTO calls (is_scam, risk_score, timestamp) VALUES (1, 90, ?)",
+            [('2026-01-01 09:15:00',), ('2026-01-01 17:40:00',), ('2026-01-02 08:00:00',)]
+        )
+    db.rebuild_statistics()
+    hourly = db.get_timeseries('2026-01-01 12:00:00', '2026-01-02 00:00:00', 'hour')
+    assert [p['period'] for p in hourly] == ['2026-01-01 17:00:00']
+
+    assert db.compact_rollups(retain_hours=48) == 3
+    assert db.get_timeseries('2026-01-01', '2026-01-03') == [
+        {'period': '2026-01-01', 'total_calls': 2, 'scams_detected': 2, 'average_risk_score': 90.0},
+        {'period': '2026-01-02', 'total_calls': 1, 'scams_detected': 1, 'average_risk_score': 90.0},
+    ]
+    # Compacted days show up whole in hourly series, and only when they overlap the range
+    assert [p['period'] for p in db.get_timeseries('2026-01-01 12:00:00', '2026-01-02 00:00:00', 'hour')] \
+        == ['2026-01-01']
+    assert db.get_timeseries(now, '9999-01-01', 'hour')[0]['total_calls'] == 2
+    assert db.compact_rollups(retain_hours=48) == 0
+
+
+def _hammer_database(address, authkey, db_path, worker, calls, results):
+    """One worker process: write-behind inserts interleaved with history and stats reads"""
+    from call_writer import CallWriter
+    from write_server import ReadReplicaDB, WriteClient
+
+    db = ReadReplicaDB(db_path, WriteClient(address, authkey))
+    writer = CallWriter(db, batch_size=32, flush_interval=0.005, id_block=16)
+    reads = 0
+    try:
+        for n in range(calls):
+            writer.submit({'transcript': f'worker {worker} call {n}', 'is_scam': n % 3 == 0,
+                           'risk_score': 50.0, 'detected_threats': ['urgency']})
+            if n % 10 == 0:
+                db.get_call_page(limit=20)
+                db.get_statistics()
+                reads += 1
+        writer.close()
+        results.put((worker, writer.stats()['written'], writer.failed, reads, None))
+    except Exception as e:
+        results.put((worker, 0, 0, reads, repr(e)))
+    finally:
+        db.close()
+
+
+def test_write_server_serializes_concurrent_worker_writes(tmp_path):
+    import multiprocessing
+    from write_server import WriteServer
+
+    db_path = str(tmp_path / 'shared.db')
+    server = WriteServer(db_path).start()
+    workers, calls = 4, 300
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_hammer_database,
+                                args=(server.address, server.authkey, db_path, w, calls, results))
+        for w in range(workers)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        outcomes = [results.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join(10)
+    finally:
+        server.stop()
+
+    assert all(error is None for *_, error in outcomes), outcomes
+    assert sum(written for _, written, *_ in outcomes) == workers * calls
+    assert all(failed == 0 and reads > 0 for _, _, failed, reads, _ in outcomes)
+
+    db = VocalGuardDB(db_path)
+    stats = db.get_statistics()
+    assert stats['total_calls'] == workers * calls
+    assert stats['scams_detected'] == workers * len(range(0, calls, 3))
+    assert db.connection().execute('SELECT COUNT(DISTINCT id) FROM calls').fetchone()[0] == workers * calls
+    db.close()
@@ -0,0 +1,216 @@
+"""
+VocalGuard Detection Engine Tests
+Checks the compiled matchers against the straightforward implementations
+"""
+
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from advanced_detector import AdvancedScamDetector
+from keyword_engine import KeywordAutomaton
+from scam_detector import ScamDetector
+
+SAMPLE_TRANSCRIPTS = [
+    "Hello, this is your doctor's office calling to confirm your appointment.",
+    "This is Officer John Smith from the IRS. We have a warrant for your arrest due to unpaid taxes. You must pay immediately via gift cards.",
+    "Hello, this is Microsoft Support. Your computer has a virus. Please download our remote access tool so we can fix it for $200.",
+    "Grandma? It's me. I'm in trouble. I got arrested in Mexico and I need bail money fast. Please don't tell mom.",
+    "Congratulations, you won the lottery! Read me the code on the back of your card and the police are coming otherwise.",
+    "wire transfer wire wiretransfer banking pin atm pinatm pin",
+]
+
+
+def test_automaton_matches_substring_semantics():
+    groups = {'a': ['he', 'she', 'his', 'hers'], 'b': ['hers', 'is', 'he']}
+    automaton = KeywordAutomaton(groups)
+    for text in ['ushers', 'this is his', 'nothing', '', 'hehehe']:
+        expected = {name: sum(1 for k in kws if k in text) for name, kws in groups.items()}
+        assert automaton.match_counts(text) == expected
+
+
+def test_automaton_resumes_across_chunks():
+    automaton = KeywordAutomaton({'g': ['gift card', 'wire transfer']})
+    found, state = automaton.scan('please buy a gift ca')
+    more, _ = automaton.scan('rd today', state)
+    assert automaton.count_groups(found | more) == {'g': 1}
+
+
+def test_risk_score_keyword_counts_unchanged():
+    detector = AdvancedScamDetector()
+    for transcript in SAMPLE_TRANSCRIPTS:
+        text = transcript.lower()
+        counts = detector.keyword_automaton.match_counts(text)
+        for name, data in detector.scam_signatures.items():
+            assert counts[name] == sum(1 for k in data['keywords'] if k in text)
+        for name, concepts in detector.intent_concepts.items():
+            assert bool(counts[name]) == any(c in text for c in concepts)
+
+
+def test_whole_word_matching_ignores_embedded_keywords():
+    automaton = KeywordAutomaton({'g': ['ein', 'pc', 'won', 'risk-free', 'gift card']}, whole_words=True)
+    assert automaton.match_counts('being upcoming wonderful') == {'g': 0}
+    assert automaton.match_counts('my ein, a pc. you won a risk-free gift card!') == {'g': 5}
+
+
+def test_flag_threats_schema_and_word_boundaries():
+    detector = ScamDetector()
+    result = detector.flag_threats("What a wonderful, upcoming weekend we are having.")
+    assert set(result) == {
+        'is_threat', 'confidence', 'detected_patterns', 'risk_score',
+        'behavioral_score', 'linguistic_score', 'threat_breakdown'
+    }
+    assert 'too_good' not in result['detected_patterns']
+    assert 'tech_scam' not in result['detected_patterns']
+
+    scam = detector.flag_threats(
+        "URGENT! Wire transfer now using a gift card or you will be arrested. What is your ssn? Please confirm."
+    )
+    assert scam['is_threat']
+    assert {'urgency', 'payment', 'personal_info', 'threats'} <= set(scam['detected_patterns'])
+
+
+def test_redact_pii_single_pass_with_spans():
+    detector = ScamDetector()
+    text = "Card 4532 0151 1283 0366, SSN 123-45-6789, call (202) 555-0123 or mail john@example.com from 90210"
+    result = detector.redact_pii(text)
+    assert result['redacted_text'] == (
+        "Card [CREDIT CARD REDACTED], SSN [SSN REDACTED], call [PHONE REDACTED] "
+        "or mail [EMAIL REDACTED] from [ZIP REDACTED]"
+    )
+    assert result['pii_found'] == ['credit_card', 'ssn', 'phone', 'email', 'zip_code']
+    for match in result['pii_matches']:
+        assert text[match['start']:match['end']].strip() == text[match['start']:match['end']]
+    assert text[result['pii_matches'][0]['start']:result['pii_matches'][0]['end']] == '4532 0151 1283 0366'
+
+
+def test_redact_pii_luhn_and_context():
+    detector = ScamDetector()
+    # Fails the Luhn check, so it is not reported as a card
+    assert detector.redact_pii("number 4532-1234-5678-9012")['pii_found'] == ['bank_account']
+    result = detector.redact_pii("read me the cvv 123 then pay $200 in 2024, passport AB1234567")
+    assert result['redacted_text'] == "read me the cvv [CVV REDACTED] then pay $200 in 2024, passport [PASSPORT REDACTED]"
+    assert detector.redact_pii("nothing to see here") == {
+        'redacted_text': "nothing to see here", 'pii_found': [], 'pii_matches': []
+    }
+
+
+def test_batch_scorer_matches_single_path():
+    from batch_scorer import BatchScorer
+
+    detector = AdvancedScamDetector()
+    scorer = BatchScorer(detector)
+    transcripts = SAMPLE_TRANSCRIPTS + ["STOP! LISTEN TO ME you idiot!!! automated message, many people talking"]
+
+    single = [detector.calculate_risk_score(t, None, '2026-01-01T10:00:00') for t in transcripts]
+    batch = scorer.score([detector.extract_signals(t) for t in transcripts], '2026-01-01T10:00:00')
+    assert batch == single
+
+
+def test_deterministic_scoring_is_repeatable_across_threads():
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    detector = AdvancedScamDetector(deterministic=True)
+    expected = [detector.calculate_risk_score(t) for t in SAMPLE_TRANSCRIPTS]
+
+    state = random.getstate()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for _ in range(20):
+            assert list(pool.map(detector.calculate_risk_score, SAMPLE_TRANSCRIPTS)) == expected
+    # Scoring never touches the process-wide generator
+    assert random.getstate() == state
+
+
+def test_transcript_view_feeds_detectors_like_plain_text():
+    from transcript_view import TranscriptView
+
+    detector = AdvancedScamDetector(deterministic=True)
+    scam_detector = ScamDetector()
+    for transcript in SAMPLE_TRANSCRIPTS + ["STOP! Email me at a.b@example.com, zip 94105!"]:
+        view = TranscriptView(transcript)
+        assert detector.extract_signals(view) == detector.extract_signals(transcript)
+        assert scam_detector.redact_pii(view) == scam_detector.redact_pii(transcript)
+
+    view = TranscriptView("CALL NOW! Press 1, then 2. Card 4532 0151 1283 0366?")
+    assert view.digit_runs == ['1', '2', '4532', '0151', '1283', '0366']
+    assert view.punctuation['!'] == 1 and view.punctuation['?'] == 1
+
+
+def legacy_scam_category(patterns, transcript_lower):
+    """The if-chain detect_scam_category used before the category table"""
+    chain = [
+        ('IRS/Tax Scam', ['irs', 'tax', 'refund']),
+        ('Tech Support Scam', ['microsoft', 'apple', 'computer', 'virus', 'tech support']),
+        ('Banking/Financial Scam', ['bank', 'credit card', 'account', 'fraud department']),
+        ('Social Security Scam', ['social security', 'ssa', 'benefits']),
+        ('Prize/Lottery Scam', ['lottery', 'prize', 'winner', 'congratulations']),
+        ('Investment Scam', ['invest', 'crypto', 'bitcoin', 'returns']),
+        ('Utility Scam', ['electric', 'power', 'utility', 'water', 'gas']),
+        ('Delivery Scam', ['package', 'delivery', 'shipping', 'customs']),
+        ('Healthcare Scam', ['medicare', 'medicaid', 'health insurance'])
+    ]
+    for name, words in chain:
+        if name == 'IRS/Tax Scam' and 'impersonation' not in patterns:
+            continue
+        if any(word in transcript_lower for word in words):
+            return name
+    return 'Romance Scam' if 'romance' in patterns else 'General Scam'
+
+
+def test_category_index_matches_legacy_chain():
+    from signature_pack import load_latest_pack
+
+    index = load_latest_pack().category_index
+    detector = AdvancedScamDetector(deterministic=True)
+    texts = SAMPLE_TRANSCRIPTS + [
+        "Your package is held at customs, pay the delivery fee with bitcoin.",
+        "Medicare here, your health insurance benefits are about to lapse.",
+        "Congratulations, you are our lottery winner!"
+    ]
+    for text in texts:
+        patterns = detector.calculate_risk_score(text)[1]
+        for extra in ([], ['romance']):
+            category, others = index.classify(patterns + extra, text.lower())
+            assert category == legacy_scam_category(patterns + extra, text.lower())
+            assert category not in others
+
+    category, others = index.classify([], "pay the delivery fee with bitcoin")
+    assert (category, others) == ('Investment Scam', ['Delivery Scam'])
+
+
+def test_category_table_accepts_new_categories():
+    from category_index import CategoryIndex
+
+    index = CategoryIndex({'categories': [
+        {'name': 'Toll Scam', 'priority': 5, 'terms': ['unpaid toll', 'e-zpass']},
+        {'name': 'Utility Scam', 'priority': 1, 'terms': ['electric']}
+    ]})
+    assert index.classify([], 'unpaid toll, or we cut your electric') == ('Toll Scam', ['Utility Scam'])
+    assert index.classify([], 'hello there') == ('General Scam', [])
+
+
+def test_category_table_override_applies_to_every_pack(tmp_path):
+    import json
+    from signature_pack import SignaturePackWatcher, load_category_table, load_latest_pack
+
+    table_path = tmp_path / 'categories.json'
+    table_path.write_text(json.dumps({'default': 'Other', 'categories': [
+        {'name': 'Toll Scam', 'priority': 1, 'terms': ['unpaid toll']}
+    ]}))
+    table = load_category_table(str(table_path))
+    assert load_category_table('') is None
+
+    shipped = load_latest_pack()
+    pack = load_latest_pack(categories=table)
+    assert pack.category_index.classify([], 'your unpaid toll') == ('Toll Scam', [])
+    assert pack.category_index.classify([], 'gift cards') == ('Other', [])
+    # Results cached under the shipped table are not reused
+    assert pack.tag != shipped.tag
+
+    installed = []
+    (tmp_path / 'vocalguard-v1.json').write_text(open(shipped.source).read())
+    SignaturePackWatcher(installed.append, directory=str(tmp_path), categories=table).check()
+    assert installed[0].category_index.names == ['Toll Scam']